@@ -22,11 +22,10 @@ import threading
 import importlib.util  # importing gamemodes
 from os import _exit  # exit the program
 from time import sleep
-from queue import Queue  # store mouse clicks
+from queue import Queue, Empty  # store mouse clicks
 from pathlib import Path
 from codecs import decode  # decode instructions from file
 from warnings import warn
-from random import randint
 from types import ModuleType  # module class for type hints
 from datetime import datetime  # get time for logs
 from argparse import ArgumentParser  # cli args
@@ -45,8 +44,22 @@ WORKING_DIRECTORY = Path(__file__).parent.resolve()
 PARSER = ArgumentParser()
 PARSER.add_argument("--Panda3D", default=None, type=Path,
                     help="run Panda3D from a local installation")
+# e.g. "python3 Mancala.py --speed 2" to move the stones twice as fast
+PARSER.add_argument("--speed", default=1, type=float,
+                    help="how fast the stones move (default 1)")
+# e.g. "python3 Mancala.py --physics-rate 30" on a slow computer
+PARSER.add_argument("--physics-rate", dest="physicsRate", default=60, type=float,
+                    help="physics steps a second (default 60)")
+# e.g. "python3 Mancala.py --picking ray" to pick the pits with a collision ray
+PARSER.add_argument("--picking", default="screen", choices=("screen", "ray"),
+                    help="how the clicked pit is found (default screen)")
 ARGS = PARSER.parse_args()
 
+if ARGS.speed <= 0:
+    PARSER.error("the speed must be more than 0")
+if ARGS.physicsRate <= 0:
+    PARSER.error("the physics rate must be more than 0")
+
 if ARGS.Panda3D:
     # command line arguments to use local installation of Panda3D
     if not ARGS.Panda3D.exists():
@@ -67,6 +80,24 @@ except ImportError:
         '''Please import the panda3d library to run this program
 You can do this using pip or https://docs.panda3d.org/1.10/python/introduction/index''')
 
+try:
+    # computer opponents that play on the headless engine boards
+    from engine.ai import createAgent, SearchWorker
+except ImportError:
+    raise ImportError(
+        '''The engine folder was not found...
+Make sure the engine folder is present in the same directory as Mancala.py''')
+
+try:
+    # the physics is stepped at a fixed rate (see scene/physics.py)
+    from scene.physics import FixedTimestep
+    from scene.groups import CLICK_MASK
+    from scene.picking import ScreenPicker
+except ModuleNotFoundError:
+    raise ImportError(
+        '''The scene folder was not found...
+Make sure the scene folder is present in the same directory as Mancala.py''')
+
 USE_TKINTER = False
 
 try:
@@ -142,8 +173,20 @@ class Mancala(ShowBase):
 
         # automatically handle physics operations
         self.cTrav = CollisionTraverser('physics')
+        # step the physics and the traverser at a fixed rate instead of every frame
+        # so the stones move the same on any computer
+        self.PHYSICS_LOOP = FixedTimestep(self, ARGS.physicsRate)
 
         self.CLICKABLE_TAG = "clickable"  # clickable objects have this tag
+        # how fast the stones move in every gamemode (2 is twice as fast)
+        self.SPEED = ARGS.speed
+
+        # set when going back to the main menu so the old game thread stops
+        # every game gets a new event (see reset)
+        self.cancelEvent = threading.Event()
+        self.searchWorker = None  # the opponents search running in the background
+        self.opponent = None  # the computer opponent of the current game
+
         self.ROBOTO = self.loader.loadFont("fonts/Roboto/Roboto-Regular.ttf")
         self.ROBOTO_BOLD = self.loader.loadFont("fonts/Roboto/Roboto-Bold.ttf")
 
@@ -211,11 +254,23 @@ class Mancala(ShowBase):
         Returns:
             None
         """
+        if not base.mouseWatcherNode.hasMouse():
+            return  # the mouse is outside the window
         MOUSE = base.mouseWatcherNode.getMouse()  # get mouse
+
+        if self.SCREEN_PICKER is not None:
+            # the nearest pit on the screen (see scene/picking.py)
+            pickedObj = self.SCREEN_PICKER.pick(MOUSE.getX(), MOUSE.getY())
+            if pickedObj is not None:
+                self.MOUSE_Q.queue.clear()  # empty queue
+                self.MOUSE_Q.put(pickedObj)  # put clicked obj in queue
+            return
+
         # sets collsion ray to start at camera and extend to inf in mouse direction
         self.PICKER_RAY.setFromLens(base.camNode, MOUSE.getX(), MOUSE.getY())
 
-        self.cTrav.traverse(self.render)  # detect collisions
+        # detect collisions with the clickables only (not the stones and the board)
+        self.PICKER_TRAV.traverse(self.CLICKABLE_ROOT)
 
         if self.MOUSE_HANDLER.getNumEntries() > 0:
             # This is so we get the closest object
@@ -226,9 +281,10 @@ class Mancala(ShowBase):
             self.MOUSE_Q.put(pickedObj)  # put clicked obj in queue
 
     def startMouse(self) -> None:
-        """Setup collision-based mouse clicker.
+        """Setup the mouse clicker.
 
-        This uses code from the Panda3D documentation
+        Pits are picked on the screen by default, or with a collision ray (--picking ray)
+        The ray uses code from the Panda3D documentation
         https://docs.panda3d.org/1.10/python/programming/collision-detection/clicking-on-3d-objects
 
         Args:
@@ -240,12 +296,19 @@ class Mancala(ShowBase):
         self.PICKER_NODE = CollisionNode('mouseRay')
         # attach collision node to camera
         self.PICKER_NP = self.camera.attachNewNode(self.PICKER_NODE)
-        self.PICKER_NODE.setFromCollideMask(GeomNode.getDefaultCollideMask())
+        # the clickables have their own bit (see scene/groups.py)
+        self.PICKER_NODE.setFromCollideMask(CLICK_MASK)
+        self.PICKER_NODE.setIntoCollideMask(BitMask32.allOff())
         self.PICKER_RAY = CollisionRay()
         # add the collision ray to the collision node
         self.PICKER_NODE.addSolid(self.PICKER_RAY)
+        # the ray has its own traverser, only run when clicked
+        # the physics traverser runs every step and clicks don't need the stones
+        self.PICKER_TRAV = CollisionTraverser('picking')
         # detect collisions from pickerNP and handle with myHandler
-        self.cTrav.addCollider(self.PICKER_NP, self.MOUSE_HANDLER)
+        self.PICKER_TRAV.addCollider(self.PICKER_NP, self.MOUSE_HANDLER)
+        # picks without the ray and highlights the pit under the mouse
+        self.SCREEN_PICKER = ScreenPicker(self) if ARGS.picking == 'screen' else None
 
         # store mouse clicks in a queue so if you want to wait for mouse click, call the blocking Queue.get()
         self.MOUSE_Q = Queue()
@@ -262,6 +325,22 @@ class Mancala(ShowBase):
         Returns:
             None
         """
+        # stop the old game thread and the opponents search
+        # otherwise the search would keep a core busy after going back to the main menu
+        self.cancelEvent.set()
+        if self.searchWorker:
+            self.searchWorker.cancel()
+            # the agent can't be closed while it is still searching
+            # (e.g. the endgame database would be closed under the search)
+            # the newest search finishes after the searches before it
+            self.searchWorker.join()
+            self.searchWorker = None
+        if self.opponent:
+            # e.g. stop the process pool of the MCTS opponent
+            self.opponent.close()
+            self.opponent = None
+        self.cancelEvent = threading.Event()
+
         self.clearScene()
 
         self.disableGravity()
@@ -457,24 +536,48 @@ Make sure the gamemode folder is present in the same directory as this script'''
         Args:
             None
         Returns:
-            clickedPit (NodePath): The clicked pit node path
+            clickedPit (NodePath): The clicked pit node path, None if the game was reset
         """
+        cancel = self.cancelEvent  # set if this game is reset
         clickedPit = None
-        while not clickedPit:
-            # blocking, so it will wait until a value is placed in queue
-            clickedObj = self.MOUSE_Q.get()
-            # check if clicked is a clickable
-            pickedObj = clickedObj.findNetTag(self.CLICKABLE_TAG)
-            if not pickedObj.isEmpty():
-                # clicked on clickable
-                side = int(pickedObj.getTag('side'))
-                n = int(pickedObj.getTag('n'))
-                if side == 0 and len(self.controller.stones[side][n]):
-                    # is on plr 0 side and not empty
+        if self.SCREEN_PICKER is not None:
+            self.SCREEN_PICKER.highlight = True  # show the pit under the mouse
+        try:
+            while not clickedPit:
+                # blocking, so it will wait until a value is placed in queue
+                # but check every 0.1s if the game was reset (see reset)
+                try:
+                    clickedObj = self.MOUSE_Q.get(timeout=0.1)
+                except Empty:
+                    if cancel.is_set():
+                        return None
+                    continue
+                # check if clicked is a clickable
+                pickedObj = clickedObj.findNetTag(self.CLICKABLE_TAG)
+                if self.isPickable(pickedObj):
                     clickedPit = pickedObj
+        finally:
+            if self.SCREEN_PICKER is not None:
+                self.SCREEN_PICKER.highlight = False
 
         return clickedPit
 
+    def isPickable(self, pickedObj: NodePath) -> bool:
+        """Return if the player can pick the pit.
+
+        Args:
+            pickedObj (NodePath): The clicked object
+        Returns:
+            If it is a clickable on the players side that is not empty (bool)
+        """
+        if pickedObj.isEmpty() or not pickedObj.hasTag(self.CLICKABLE_TAG):
+            return False
+        # clicked on clickable
+        side = int(pickedObj.getTag('side'))
+        n = int(pickedObj.getTag('n'))
+        # is on plr 0 side and not empty
+        return side == 0 and bool(self.controller.board.stonesAt(side, n))
+
     def startGame(self) -> None:
         """Start the game.
 
@@ -493,17 +596,27 @@ Make sure the gamemode folder is present in the same directory as this script'''
         self.INS_BUTTON.hide()
 
         controller = app.controller  # game controller
+        cancel = self.cancelEvent  # set if this game is reset
 
-        # the max number (ceiling) the rng can generate (because of the amount of clickables)
-        CHOICE_CEIL = len(controller.clickables[1])-1
+        # the computer opponent is picked by the gamemode
+        # (random if the gamemode does not pick one)
+        opponent = createAgent(getattr(controller, 'OPPONENT', 'random'),
+                               timeLimit=getattr(controller, 'OPPONENT_TIME', 300),
+                               **getattr(controller, 'OPPONENT_OPTIONS', {}))
+        self.opponent = opponent
 
         while not controller.isGameComplete():
+            if cancel.is_set():
+                # back at the main menu, this game is over
+                return
             turn = controller.turn
             self.TURN_TEXT.show()
             if turn == 0:
                 # change the text to "Your turn"
                 self.TURN_TEXT['text'] = "Your turn"
                 clickedObj = app.returnClickedPit()
+                if clickedObj is None:
+                    return
                 self.TURN_TEXT.hide()
 
                 # the side of the selected pit
@@ -513,14 +626,16 @@ Make sure the gamemode folder is present in the same directory as this script'''
             else:
                 # change the text to "Opponents turn"
                 self.TURN_TEXT['text'] = "Opponents turn"
-                hasStones = False
-                while not hasStones:
-                    n = randint(0, CHOICE_CEIL)
-                    clickedSide = 1
-                    clickedN = n
-                    if len(controller.stones[1][n]):
-                        # keep generating a new pit until it has stones
-                        hasStones = True
+                clickedSide = 1
+                # the opponent searches a copy of the board (not the stones)
+                # on a worker thread, it never takes longer than the time limit
+                # the last search is passed on so the two never run at once
+                self.searchWorker = SearchWorker(opponent, controller.board,
+                                                 getattr(controller, 'OPPONENT_TIME', 300),
+                                                 self.searchWorker)
+                clickedN = self.searchWorker.result()
+                if cancel.is_set() or clickedN is None:
+                    return
 
             controller.clickedPit(clickedSide, clickedN)
         if controller.winner == 0:
@@ -0,0 +1,19 @@
+"""
+Headless mancala rules engines.
+
+The board states of the gamemodes without Panda3D
+so moves can be played without a window
+
+Author: Ritesh Ravji
+"""
+
+from .classic import ClassicBoard
+from .congklak import CongklakBoard
+from .omweso import OmwesoBoard
+
+# the engine board of each gamemode (by the gamemode file name)
+BOARDS = {
+    'classic': ClassicBoard,
+    'congklak': CongklakBoard,
+    'omweso': OmwesoBoard
+}
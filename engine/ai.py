@@ -0,0 +1,514 @@
+"""
+Computer opponents written in Python.
+
+This file picks the opponents move from an engine board on:
+    - Random moves (the old opponent)
+    - Negamax search with alpha-beta pruning
+    - Remembering searched boards in a transposition table
+    - Searching deeper until the time runs out on a worker thread
+    - Looking up exact results in the classic endgame database
+    - Playing opening book moves without searching
+    - Monte Carlo tree search (see engine/mcts.py)
+    - and more...
+
+Author: Ritesh Ravji
+"""
+
+import threading
+from pathlib import Path
+from time import perf_counter
+from random import Random
+from typing import Callable, Union
+
+from .transposition import Zobrist, TranspositionTable, touchedSlots, EXACT, LOWER, UPPER
+from .mcts import MCTSAgent
+from .endgame import EndgameDB
+from .book import OpeningBook
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+# score of a won game, bigger than any store difference
+# so a win is always better than being ahead
+WIN_SCORE = 10000
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out (or it is cancelled)."""
+
+
+class RandomAgent:
+    """Opponent that clicks a random pit with stones."""
+
+    def __init__(self, seed: int = None, **kwargs) -> None:
+        """Setup the agent.
+
+        Args:
+            seed (int): The seed for the random moves (None for a different game every time)
+            **kwargs: Ignored, so every agent can be made the same way
+        Returns:
+            None
+        """
+        self._rng = Random(seed)
+
+    def chooseMove(self, board: object, cancel: threading.Event = None,
+                   found: Callable[[int], None] = None) -> int:
+        """Return a random legal move.
+
+        Args:
+            board (object): The engine board, it is not changed
+            cancel (Event): Ignored, picking a move is instant
+            found (Callable): Ignored, there is only one move found
+        Returns:
+            The nth pit of the current player to click (int)
+        """
+        return self._rng.choice(board.legalMoves())
+
+    def close(self) -> None:
+        """Free anything the agent is holding (nothing for this agent).
+
+        Args:
+            None
+        Returns:
+            None
+        """
+
+
+class AlphaBetaAgent:
+    """Opponent that searches ahead with negamax and alpha-beta pruning.
+
+    The score of a board is always from the view of the player to move
+    so the score of the opponents move is the negative of their score
+    an extra turn keeps the same player so the score is not negated
+
+    The search goes 1 move deep, then 2, etc (iterative deepening)
+    so there is always a best move ready when the time runs out
+    """
+
+    def __init__(self, depth: int = 30, timeLimit: int = 300,
+                 tableSize: float = 16, endgame: Union[str, Path] = None,
+                 book: Union[str, Path] = None, **kwargs) -> None:
+        """Setup the agent.
+
+        Args:
+            depth (int): The most moves to search ahead
+            timeLimit (int): The time budget for each move in milliseconds
+            tableSize (float): The memory of the transposition table in MB (0 to turn off)
+            endgame (str/Path): The endgame database file (see engine/endgame.py)
+                it is not used if the file has not been built
+            book (str/Path): The opening book file (see engine/book.py)
+                it is not used if the file has not been built
+            **kwargs: Ignored, so every agent can be made the same way
+        Returns:
+            None
+        """
+        self.depth = depth
+        self.timeLimit = timeLimit
+        self.nodes = 0  # boards searched in the last move (for debugging)
+        # the table is kept between moves as the next move searches the same boards
+        self.table = TranspositionTable(tableSize) if tableSize else None
+        # the database is memory mapped so nothing is loaded until a board is looked up
+        self.endgame = EndgameDB(endgame) if endgame and Path(endgame).exists() else None
+        self.book = OpeningBook(book) if book and Path(book).exists() else None
+        self._zobrist = None
+        # the deadline and cancel event of the search on each thread
+        # a cancelled search can still be running when the next one starts
+        self._search = threading.local()
+        # the best move of the deepest finished search of the last move (for debugging)
+        # use found in chooseMove to get the best move while searching
+        self.bestMove = None
+        self.completedDepth = 0  # how deep the last move was searched
+
+    def chooseMove(self, board: object, cancel: threading.Event = None,
+                   found: Callable[[int], None] = None) -> int:
+        """Return the best move found within the time budget.
+
+        Args:
+            board (object): The engine board, it is not changed
+            cancel (Event): Stops the search early when set (e.g. going to the main menu)
+            found (Callable): Called with the best move every time a deeper search finishes
+                (e.g. so another thread can use it if the search runs out of time)
+        Returns:
+            The nth pit of the current player to click (int)
+        """
+        self.nodes = 0
+        self.completedDepth = 0
+        self.bestMove = None  # nothing found for this board yet
+        if self.book is not None:
+            # the opening was searched deeper offline
+            bestMove = self.book.lookup(board)
+            if bestMove is not None:
+                self.bestMove = bestMove
+                return bestMove
+        search = self._search
+        search.deadline = perf_counter()+self.timeLimit/1000
+        search.cancel = cancel
+        key = self._hash(board)
+        moves = board.legalMoves()
+        # if the time runs out straight away the first ordered move is still good
+        bestMove = self._orderedChildren(board, key)[0][1]
+        if found:
+            found(bestMove)
+        if len(moves) > 1:
+            for depth in range(1, self.depth+1):
+                try:
+                    bestMove = self._searchRoot(board, key, depth)
+                except SearchTimeout:
+                    # out of time, keep the best move of the deepest finished search
+                    break
+                self.completedDepth = depth
+                if found:
+                    found(bestMove)
+        # else nothing to think about
+        self.bestMove = bestMove
+        return bestMove
+
+    def close(self) -> None:
+        """Free the transposition table and the endgame database.
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        self.table = None
+        if self.endgame is not None:
+            self.endgame.close()
+            self.endgame = None
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _searchRoot(self, board: object, key: int, depth: int) -> int:
+        """Return the best move searching the given number of moves ahead.
+
+        Args:
+            board (object): The engine board
+            key (int): The Zobrist hash of the board (0 without a table)
+            depth (int): How many moves to search ahead
+        Returns:
+            The nth pit of the best move (int)
+        """
+        ttMove = -1
+        if self.table is not None:
+            entry = self.table.probe(key)
+            if entry:
+                ttMove = entry[3]
+        # the best move of the last search goes first (from the table)
+        children = self._orderedChildren(board, key, ttMove)
+        bestMove = children[0][1]
+        bestValue = -WIN_SCORE*2
+        alpha = -WIN_SCORE*2
+        beta = WIN_SCORE*2
+        me = board.turn
+        for child, move, childKey in children:
+            if child.turn == me:
+                value = self._negamax(child, childKey, depth-1, alpha, beta)
+            else:
+                value = -self._negamax(child, childKey, depth-1, -beta, -alpha)
+            if value > bestValue:
+                bestValue = value
+                bestMove = move
+            alpha = max(alpha, value)
+        if self.table is not None:
+            self.table.store(key, depth, EXACT, bestValue, bestMove)
+        return bestMove
+
+    def _negamax(self, board: object, key: int, depth: int, alpha: int, beta: int) -> int:
+        """Return the score of the board for the player to move.
+
+        Args:
+            board (object): The engine board
+            key (int): The Zobrist hash of the board (0 without a table)
+            depth (int): How many more moves to search
+            alpha (int): The score the player to move is already sure of
+            beta (int): The score the opponent is already sure of
+        Returns:
+            The score of the board (int)
+        """
+        self.nodes += 1
+        if board.isGameComplete():
+            return self._evaluate(board)
+        if self.endgame is not None:
+            # few stones left so the final score may be in the database
+            final = self.endgame.probe(board)
+            if final is not None:
+                return self._finalScore(final)
+        if depth <= 0:
+            return self._evaluate(board)
+        search = self._search
+        if perf_counter() > search.deadline or (search.cancel and search.cancel.is_set()):
+            raise SearchTimeout
+
+        table = self.table
+        ttMove = -1
+        alphaStart = alpha
+        if table is not None:
+            entry = table.probe(key)
+            if entry:
+                ttDepth, flag, ttValue, ttMove = entry
+                if ttDepth >= depth:
+                    # searched at least as deep before so the score can be reused
+                    if flag == EXACT:
+                        return ttValue
+                    elif flag == LOWER and ttValue > alpha:
+                        alpha = ttValue
+                    elif flag == UPPER and ttValue < beta:
+                        beta = ttValue
+                    if alpha >= beta:
+                        return ttValue
+
+        me = board.turn
+        value = -WIN_SCORE*2
+        bestMove = -1
+        for child, move, childKey in self._orderedChildren(board, key, ttMove):
+            if child.turn == me:
+                # extra turn so it is still my score
+                childValue = self._negamax(child, childKey, depth-1, alpha, beta)
+            else:
+                childValue = -self._negamax(child, childKey, depth-1, -beta, -alpha)
+            if childValue > value:
+                value = childValue
+                bestMove = move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                # the opponent will never let the game get here
+                break
+
+        if table is not None:
+            if value <= alphaStart:
+                flag = UPPER
+            elif value >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            table.store(key, depth, flag, value, bestMove)
+        return value
+
+    def _orderedChildren(self, board: object, key: int, ttMove: int = -1) -> list:
+        """Return the boards after each legal move, best looking first.
+
+        The best move from the transposition table goes first,
+        then extra turn moves, then the moves that gain the most
+        searching the best moves first lets alpha-beta prune more
+
+        Args:
+            board (object): The engine board
+            key (int): The Zobrist hash of the board (0 without a table)
+            ttMove (int): The best move stored in the transposition table (-1 if none)
+        Returns:
+            The boards, moves and hashes [(board, move, key), ...] (list)
+        """
+        me = board.turn
+        zobrist = self._zobrist if self.table is not None else None
+        children = []
+        for move in board.legalMoves():
+            child = board.copy()
+            childKey = 0
+            if zobrist is not None:
+                # the steps give the slots the move touched so only those are rehashed
+                slots = touchedSlots(board, move, child.traceMove(move))
+                childKey = zobrist.update(key, board.pits, child.pits, slots, child.turn != me)
+            else:
+                child.applyMove(move)
+            extraTurn = child.turn == me and not child.isGameComplete()
+            children.append((move != ttMove, not extraTurn, -child.score(me), move,
+                             child, childKey))
+        children.sort(key=lambda c: c[:4])
+        return [(child, move, childKey) for _, _, _, move, child, childKey in children]
+
+    def _hash(self, board: object) -> int:
+        """Return the Zobrist hash of the board.
+
+        The keys are made the first time (and again if the board is a different size)
+
+        Args:
+            board (object): The engine board
+        Returns:
+            The hash of the board (0 without a table)
+        """
+        if self.table is None:
+            return 0
+        zobrist = self._zobrist
+        stones = sum(board.pits)
+        if (zobrist is None or len(zobrist.KEYS) != len(board.pits)
+                or len(zobrist.KEYS[0]) <= stones):
+            self._zobrist = zobrist = Zobrist(len(board.pits), stones)
+            self.table.clear()
+        return zobrist.hash(board)
+
+    def _evaluate(self, board: object) -> int:
+        """Return the static score of the board for the player to move.
+
+        Args:
+            board (object): The engine board
+        Returns:
+            The score of the board (int)
+        """
+        me = board.turn
+        score = board.score(me)
+        if board.isGameComplete():
+            if board.winner == me:
+                return WIN_SCORE+score
+            elif board.winner == 1-me:
+                return -WIN_SCORE+score
+        return score
+
+    def _finalScore(self, final: int) -> int:
+        """Return the score of a board that is known to end with the given score.
+
+        This is the same as _evaluate on the final board
+
+        Args:
+            final (int): The players final store minus the opponents final store
+        Returns:
+            The score of the board (int)
+        """
+        if final > 0:
+            return WIN_SCORE+final
+        elif final < 0:
+            return -WIN_SCORE+final
+        return 0
+
+
+class SearchWorker:
+    """Runs an agents search on a worker thread.
+
+    The thread that asks for the move never waits longer than the time budget
+    and the search can be cancelled at any time (e.g. the main menu button)
+    a search that went over the budget is stopped but can still be finishing
+    so the next search on the same agent waits for it first (pass it as previous)
+    """
+
+    def __init__(self, agent: object, board: object, timeLimit: int = 300,
+                 previous: 'SearchWorker' = None) -> None:
+        """Start searching in the background.
+
+        Args:
+            agent (object): The agent to choose the move
+            board (object): The engine board (a copy is searched)
+            timeLimit (int): The longest time to wait for the move in milliseconds
+            previous (SearchWorker): The last search of the agent, it is finished
+                before this search starts so the agent never runs two searches at once
+        Returns:
+            None
+        """
+        self.agent = agent
+        self.board = board.copy()  # the game can change the board while searching
+        self.timeLimit = timeLimit
+        self.move = None  # set when the search finishes
+        self.bestMove = None  # the best move so far of this search
+        self._stop = threading.Event()
+        self._cancelled = False  # stopped by cancel (not by the time running out)
+        self._previous = previous
+        # daemon threads close with main thread
+        self._thread = threading.Thread(target=self._search, daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stop the search as soon as possible.
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        self._cancelled = True
+        self._stop.set()
+
+    def join(self, timeout: float = None) -> bool:
+        """Wait for the search thread to finish (e.g. before closing the agent).
+
+        The previous searches have always finished once this search has
+
+        Args:
+            timeout (float): The most seconds to wait, None to wait until it finishes
+        Returns:
+            If the search has finished (bool)
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def isCancelled(self) -> bool:
+        """Return if the search was cancelled.
+
+        Args:
+            None
+        Returns:
+            If the search was cancelled (bool)
+        """
+        return self._stop.is_set()
+
+    def result(self) -> Union[int, None]:
+        """Wait for the search and return the move.
+
+        If the time budget runs out the best move so far is returned
+
+        Args:
+            None
+        Returns:
+            The nth pit to click, None if cancelled before any move was found
+        """
+        self._thread.join(self.timeLimit/1000)
+        if self._thread.is_alive():
+            # the search went over the budget so stop it and use the best so far
+            self._stop.set()
+            self._thread.join(0.05)
+        if self._cancelled:
+            return None
+        legalMoves = self.board.legalMoves()
+        move = self.move if self.move is not None else self.bestMove
+        if move not in legalMoves:
+            # nothing found in time (or a broken agent) so click the first legal pit
+            move = legalMoves[0]
+        return move
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _search(self) -> None:
+        """Run the search (on the worker thread).
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        if self._previous is not None:
+            self._previous.join()  # it was stopped so it finishes soon
+            self._previous = None
+        self.move = self.agent.chooseMove(self.board, self._stop, self._found)
+
+    def _found(self, move: int) -> None:
+        """Remember the best move so far (called by the agent on the worker thread).
+
+        Args:
+            move (int): The best move so far
+        Returns:
+            None
+        """
+        self.bestMove = move
+
+
+# the agents a gamemode can pick for the opponent
+AGENTS = {
+    'random': RandomAgent,
+    'alphabeta': AlphaBetaAgent,
+    'mcts': MCTSAgent
+}
+
+
+def createAgent(name: str, **kwargs) -> object:
+    """Create the agent with the given name.
+
+    Args:
+        name (str): The name of the agent in AGENTS
+        **kwargs: Options for the agent (e.g. timeLimit)
+    Returns:
+        The agent (object)
+    """
+    if name not in AGENTS:
+        raise ValueError('''The agent '{}' does not exist...
+The agents are: {}'''.format(name, ', '.join(AGENTS)))
+    return AGENTS[name](**kwargs)
@@ -0,0 +1,360 @@
+"""
+Batched mancala boards written in Python and NumPy.
+
+This file plays thousands of classic or congklak boards at once on:
+    - Storing the boards as one (N, 14) array of pit counts
+    - Sowing every board with array operations instead of a Python loop each
+    - Relaying and capturing every congklak board in lockstep
+    - Playing random games until every board is finished (rollouts)
+
+Used where the same thing is done to lots of boards
+(e.g. the MCTS rollouts and rule balance sweeps)
+
+Author: Ritesh Ravji
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError(
+        '''Please import the numpy library to use batched boards
+You can do this using pip (pip install numpy)''')
+
+from .classic import ClassicBoard, PITS, SIDE, SIZE, STORE, NEXT_SKIP
+from .congklak import CongklakBoard, MAX_LAPS
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+TIE = 2  # the winner of a tie (the engine boards use "TIE")
+NO_WINNER = -1  # the winner of a game that is not complete
+LAP = SIZE-1  # slots in one lap around the board (the opponents store is skipped)
+
+
+def _routeTables() -> tuple:
+    """Return the tables of every sowing route.
+
+    The routes are indexed by turn*14+origin (the slot the stones were picked up from)
+    ON_ROUTE[route] is 1 for every slot a full lap drops a stone in (not the opponents store)
+    PARTIAL[route, left] is 1 for the first left slots after the origin
+    ROUTE[route, d] is the slot d stones after the origin (d 1 to 13, the origin itself is 13)
+
+    Args:
+        None
+    Returns:
+        The ON_ROUTE, PARTIAL and ROUTE tables (array, array, array)
+    """
+    onRoute = np.zeros((2*SIZE, SIZE), dtype=np.int32)
+    partial = np.zeros((2*SIZE, LAP, SIZE), dtype=np.int32)
+    route = np.zeros((2*SIZE, LAP+1), dtype=np.int32)
+    for turn in (0, 1):
+        for origin in range(SIZE):
+            r = turn*SIZE+origin
+            i = origin
+            for d in range(1, LAP+1):
+                i = NEXT_SKIP[turn][i]
+                onRoute[r, i] = 1
+                route[r, d] = i
+                # every partial lap that goes at least d stones reaches this slot
+                partial[r, d:, i] = 1
+    return onRoute, partial, route
+
+
+ON_ROUTE, PARTIAL, ROUTE = _routeTables()
+
+
+class ClassicBatch:
+    """Many classic mancala boards played in lockstep.
+
+    Every board has its own turn so a batch can hold boards from different games
+    a board that is complete is skipped by every move
+    """
+
+    RULES = ClassicBoard  # the engine board with the same rules
+
+    def __init__(self, count: int, stonesPerPit: int = 4) -> None:
+        """Setup the starting boards.
+
+        Args:
+            count (int): The number of boards
+            stonesPerPit (int): The number of stones in each pit at the start
+        Returns:
+            None
+        """
+        self.pits = np.tile(np.array(self.RULES(stonesPerPit).pits, dtype=np.int32), (count, 1))
+        self.turn = np.zeros(count, dtype=np.int32)
+        self.winner = np.full(count, NO_WINNER, dtype=np.int32)  # 0, 1 or TIE when complete
+        self.complete = np.zeros(count, dtype=bool)
+
+    @classmethod
+    def fromBoards(cls, boards: list) -> 'ClassicBatch':
+        """Return a batch copied from engine boards.
+
+        Args:
+            boards (list): The engine boards (of RULES)
+        Returns:
+            The batch (ClassicBatch)
+        """
+        batch = cls(len(boards), 0)
+        batch.pits[:] = [board.pits for board in boards]
+        batch.turn[:] = [board.turn for board in boards]
+        batch.complete[:] = [board.isGameComplete() for board in boards]
+        batch.winner[:] = [NO_WINNER if board.winner is None else
+                           TIE if board.winner == "TIE" else board.winner for board in boards]
+        return batch
+
+    def __len__(self) -> int:
+        """Return the number of boards.
+
+        Args:
+            None
+        Returns:
+            The number of boards (int)
+        """
+        return len(self.pits)
+
+    def select(self, rows: np.ndarray) -> 'ClassicBatch':
+        """Return a new batch of some of the boards.
+
+        __init__ is skipped because every variable is copied over
+
+        Args:
+            rows (ndarray): The boards to keep (indexes or a True/False mask)
+        Returns:
+            The new batch (ClassicBatch)
+        """
+        batch = self.__class__.__new__(self.__class__)
+        batch.__dict__.update(self.__dict__)
+        for name, value in self.__dict__.items():
+            if isinstance(value, np.ndarray):
+                # every array has one value (or row) for each board
+                setattr(batch, name, value[rows])
+        return batch
+
+    def legalMoves(self) -> np.ndarray:
+        """Return which pits each current player can click on.
+
+        Args:
+            None
+        Returns:
+            (N, 6) array, True where the nth pit of the current player has stones
+        """
+        # view the boards as (N, side, slot) to pick the current players side
+        sides = self.pits.reshape(-1, 2, SIDE)[np.arange(len(self.pits)), self.turn, :PITS]
+        return (sides > 0) & ~self.complete[:, None]
+
+    def randomMoves(self, rng: np.random.Generator) -> np.ndarray:
+        """Return a random legal move for every board.
+
+        Args:
+            rng (Generator): The NumPy random number generator
+        Returns:
+            (N,) array of the nth pit to click, -1 if the board is complete
+        """
+        legal = self.legalMoves()
+        moves = np.argmax(rng.random(legal.shape)*legal, axis=1)
+        # a board that is not complete always has a move (both sides have stones)
+        moves[self.complete] = -1
+        return moves
+
+    def applyMoves(self, moves: np.ndarray) -> np.ndarray:
+        """Sow the chosen pit of every board.
+
+        Args:
+            moves (ndarray): (N,) array of the nth pit of the current player (-1 to skip)
+        Returns:
+            (N,) array of the slot the last stone landed in, -1 if skipped
+        """
+        moves = np.asarray(moves)
+        last = np.full(len(self.pits), -1, dtype=np.int32)
+        rows = np.flatnonzero((moves >= 0) & ~self.complete)
+        if not rows.size:
+            return last
+        turn = self.turn[rows]
+        i = turn*SIDE+moves[rows]
+        hand = self.pits[rows, i]  # pick up all the stones
+        if not hand.all():
+            raise ValueError('The pits {} cannot be played'.format(moves[rows[hand == 0]]))
+        self.pits[rows, i] = 0
+        last[rows] = self._sowAll(rows, turn, i, hand)
+        self._endTurn(rows, turn, last[rows])
+        return last
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _sowAll(self, rows: np.ndarray, turn: np.ndarray, i: np.ndarray,
+                hand: np.ndarray) -> np.ndarray:
+        """Sow the hands of the given boards (the whole turn for classic).
+
+        Args:
+            rows (ndarray): The boards to sow
+            turn (ndarray): The player of each board
+            i (ndarray): The slot the stones were picked up from
+            hand (ndarray): The stones to sow
+        Returns:
+            The slot the last stone landed in (ndarray)
+        """
+        return self._sow(rows, turn, i, hand)
+
+    def _sow(self, rows: np.ndarray, turn: np.ndarray, i: np.ndarray,
+             hand: np.ndarray) -> np.ndarray:
+        """Drop the stones one by one from the slot after i (skipping the opponents store).
+
+        Every slot on the way gets one stone for every full lap
+        and the first (hand % 13) slots get one more
+
+        Args:
+            rows (ndarray): The boards to sow
+            turn (ndarray): The player of each board
+            i (ndarray): The slot the stones were picked up from
+            hand (ndarray): The stones to sow (at least 1)
+        Returns:
+            The slot the last stone landed in (ndarray)
+        """
+        route = turn*SIZE+i
+        laps, left = np.divmod(hand, LAP)
+        sown = laps[:, None]*ON_ROUTE[route]+PARTIAL[route, left]
+        if len(rows) == len(self.pits):
+            # every board is sowing so skip the fancy indexing
+            self.pits += sown
+        else:
+            self.pits[rows] += sown
+        return ROUTE[route, np.where(left, left, LAP)]
+
+    def _endTurn(self, rows: np.ndarray, turn: np.ndarray, last: np.ndarray) -> None:
+        """Check for the end of the game and change the turn of the given boards.
+
+        Args:
+            rows (ndarray): The boards that moved
+            turn (ndarray): The player that moved on each board
+            last (ndarray): The slot the last stone landed in
+        Returns:
+            None
+        """
+        pits = self.pits[rows]
+        # view the boards as (N, side, slot) to check both sides at once
+        finished = ~pits.reshape(-1, 2, SIDE)[:, :, :PITS].any(axis=2).all(axis=1)
+        if finished.any():
+            # there are no more stones on one side of the board
+            done = rows[finished]
+            store0 = pits[finished, STORE]
+            store1 = pits[finished, SIDE+STORE]
+            self.complete[done] = True
+            self.winner[done] = np.where(store0 > store1, 0, np.where(store0 < store1, 1, TIE))
+        # the turn only stays if the last stone landed in the players own store
+        self.turn[rows] = np.where(last == turn*SIDE+STORE, turn, 1-turn)
+
+
+class CongklakBatch(ClassicBatch):
+    """Many congklak boards played in lockstep.
+
+    Every board relays until it ends, the boards that are still relaying
+    are sown together again until none are left
+    """
+
+    RULES = CongklakBoard
+
+    def __init__(self, count: int, stonesPerPit: int = 7, maxLaps: int = MAX_LAPS) -> None:
+        """Setup the starting boards.
+
+        Args:
+            count (int): The number of boards
+            stonesPerPit (int): The number of stones in each pit at the start
+            maxLaps (int): The most relays in one turn before the turn is cut off
+        Returns:
+            None
+        """
+        ClassicBatch.__init__(self, count, stonesPerPit)
+        self.maxLaps = maxLaps
+        # if the last turn of each board was cut off because of too many laps
+        self.relayCapped = np.zeros(count, dtype=bool)
+
+    def _sowAll(self, rows: np.ndarray, turn: np.ndarray, i: np.ndarray,
+                hand: np.ndarray) -> np.ndarray:
+        """Sow and relay the hands of the given boards until each turn ends.
+
+        Args:
+            rows (ndarray): The boards to sow
+            turn (ndarray): The player of each board
+            i (ndarray): The slot the stones were picked up from
+            hand (ndarray): The stones to sow
+        Returns:
+            The slot the last stone landed in (ndarray)
+        """
+        pits = self.pits
+        last = np.empty(len(rows), dtype=np.int32)
+        self.relayCapped[rows] = False
+        going = np.arange(len(rows))  # the boards still relaying (index into rows)
+        laps = 0
+        while going.size:
+            r = rows[going]
+            t = turn[going]
+            i = self._sow(r, t, i, hand)
+            last[going] = i
+            store = t*SIDE+STORE
+            landed = pits[r, i]
+            # the last stone landed on an empty pit (not a store)
+            single = (landed == 1) & (i != store)
+            capture = single & (i//SIDE == t)
+            if capture.any():
+                # landed on an empty pit on their own side
+                # bank the stone and the opposite stones
+                c = r[capture]
+                j = SIZE-2-i[capture]
+                pits[c, store[capture]] += 1+pits[c, j]
+                pits[c, i[capture]] = 0
+                pits[c, j] = 0
+            # landed on a pit with stones so pick them up and keep going
+            relay = ~single & (i != store)
+            laps += 1
+            if laps > self.maxLaps and relay.any():
+                self.relayCapped[r[relay]] = True
+                break
+            going = going[relay]
+            i = i[relay]
+            hand = pits[rows[going], i]
+            pits[rows[going], i] = 0
+        return last
+
+
+# the batch of each engine board
+BATCHES = {
+    ClassicBoard: ClassicBatch,
+    CongklakBoard: CongklakBatch
+}
+
+
+def playouts(batch: ClassicBatch, rng: np.random.Generator, maxMoves: int = 200) -> np.ndarray:
+    """Play random moves on every board until they are all complete.
+
+    The finished boards are dropped from the batch as it goes
+    so the last few long games don't pay for every finished board
+
+    Args:
+        batch (ClassicBatch): The boards to play from, these are not changed
+        rng (Generator): The NumPy random number generator
+        maxMoves (int): The most moves to play before stopping
+    Returns:
+        (N,) array of the result for player 0 (1 win, 0.5 tie, 0 loss)
+    """
+    winner = batch.winner.copy()
+    going = np.flatnonzero(~batch.complete)  # the boards of the batch still playing
+    batch = batch.select(going)
+    for move in range(maxMoves):
+        if not going.size:
+            break
+        batch.applyMoves(batch.randomMoves(rng))
+        finished = batch.complete
+        if finished.sum()*4 >= len(going):
+            # a quarter of the boards have finished so drop them
+            winner[going[finished]] = batch.winner[finished]
+            going = going[~finished]
+            batch = batch.select(~finished)
+    if going.size:
+        winner[going] = batch.winner
+        stopped = going[~batch.complete]
+        # stopped early so the player that is ahead wins
+        score = batch.pits[~batch.complete, STORE]-batch.pits[~batch.complete, SIDE+STORE]
+        winner[stopped] = np.where(score > 0, 0, np.where(score < 0, 1, TIE))
+    return np.where(winner == 0, 1.0, np.where(winner == 1, 0.0, 0.5))
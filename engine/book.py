@@ -0,0 +1,198 @@
+"""
+Opening book written in Python.
+
+This file stores the best opening moves of a gamemode on:
+    - Searching every opening a few moves deep (offline)
+    - Saving the moves in a small binary file next to the gamemode assets
+    - Looking up the move before the opponent starts searching
+
+Every game starts from the same board so the first moves
+are searched again every game, the book saves that time
+
+Build a book from the command line (this takes a while):
+    python3 -m engine.book classic --plies 6 --time 1000
+
+Author: Ritesh Ravji
+"""
+
+import argparse
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from time import perf_counter
+from typing import Union
+
+from . import BOARDS
+from .transposition import Zobrist
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+MAGIC = b'MCOB'  # the first bytes of the file
+VERSION = 1
+# the header is the magic, version, spare byte, board size, stones and number of moves
+HEADER_BYTES = 16
+
+DEFAULT_PLIES = 6  # moves deep from the start of the game
+DEFAULT_TIME = 1000  # search time for each book move in milliseconds
+GAMEMODES = Path(__file__).parent.parent.resolve()/'gamemodes'
+
+
+def defaultPath(gamemode: str) -> Path:
+    """Return where the book of the gamemode is stored.
+
+    Args:
+        gamemode (str): The name of the gamemode (e.g. classic)
+    Returns:
+        The book file in the gamemodes assets folder (Path)
+    """
+    return GAMEMODES/'{}_assets'.format(gamemode)/'opening.book'
+
+
+def build(board: object, agent: object, plies: int = DEFAULT_PLIES,
+          verbose: bool = False) -> dict:
+    """Search the best move of every board in the opening.
+
+    The book is made for both players, the book players move is searched
+    and only that move is followed, every reply of the other player is followed
+    so the book covers every opening the book player can end up in
+
+    Args:
+        board (object): The engine board at the start of the game
+        agent (object): The agent that searches the book moves
+        plies (int): How many moves deep the book goes
+        verbose (bool): Print the progress
+    Returns:
+        The best move of each board {hash: move} (dict)
+    """
+    zobrist = Zobrist(len(board.pits), sum(board.pits))
+    moves = {}
+    start = perf_counter()
+    for player in (0, 1):
+        # the boards at this many moves deep {hash: board}
+        # (different openings can reach the same board)
+        frontier = {zobrist.hash(board): board}
+        for ply in range(plies):
+            nextFrontier = {}
+            for key, node in frontier.items():
+                if node.isGameComplete():
+                    continue
+                if node.turn == player:
+                    if key not in moves:
+                        moves[key] = agent.chooseMove(node)
+                        if verbose:
+                            print('{} book moves ({:.0f}s)'.format(len(moves),
+                                                                   perf_counter()-start))
+                    replies = [moves[key]]
+                else:
+                    replies = node.legalMoves()
+                for move in replies:
+                    child = node.copy()
+                    child.applyMove(move)
+                    nextFrontier[zobrist.hash(child)] = child
+            frontier = nextFrontier
+    return moves
+
+
+def save(moves: dict, board: object, path: Union[str, Path]) -> None:
+    """Write the book to a file.
+
+    The hashes are sorted so a move is found with a binary search
+    each move takes 9 bytes (8 byte hash and 1 byte move)
+
+    Args:
+        moves (dict): The best move of each board {hash: move}
+        board (object): The engine board at the start of the game
+        path (str/Path): The file to write
+    Returns:
+        None
+    """
+    keys = array('Q', sorted(moves))
+    header = (MAGIC+bytes([VERSION, 0])+len(board.pits).to_bytes(2, 'little')
+              + sum(board.pits).to_bytes(4, 'little')+len(keys).to_bytes(4, 'little'))
+    with open(path, 'wb') as file:
+        file.write(header)
+        file.write(keys.tobytes())
+        file.write(bytes(moves[key] for key in keys))
+
+
+class OpeningBook:
+    """Opening book loaded from a file.
+
+    The whole book is only a few KB so it is read straight into memory
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """Read the book.
+
+        Args:
+            path (str/Path): The book file (made with build and save)
+        Returns:
+            None
+        """
+        data = Path(path).read_bytes()
+        if data[:4] != MAGIC or data[4] != VERSION:
+            raise ValueError('''The file {} is not an opening book...
+Build it again with: python3 -m engine.book'''.format(path))
+        self.size = int.from_bytes(data[6:8], 'little')
+        self.stones = int.from_bytes(data[8:12], 'little')
+        count = int.from_bytes(data[12:16], 'little')
+        self._keys = array('Q', data[HEADER_BYTES:HEADER_BYTES+count*8])
+        self._moves = data[HEADER_BYTES+count*8:]
+        self._zobrist = Zobrist(self.size, self.stones)
+        self.hits = 0
+
+    def __len__(self) -> int:
+        """Return the number of moves in the book.
+
+        Args:
+            None
+        Returns:
+            The number of moves (int)
+        """
+        return len(self._keys)
+
+    def lookup(self, board: object) -> Union[int, None]:
+        """Return the book move of the board.
+
+        Args:
+            board (object): The engine board
+        Returns:
+            The nth pit of the current player to click, None if the board is not in the book
+        """
+        if len(board.pits) != self.size or sum(board.pits) != self.stones:
+            # a different gamemode (or stones per pit) so it can't be in the book
+            return None
+        key = self._zobrist.hash(board)
+        i = bisect_left(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            return None
+        move = self._moves[i]
+        if move not in board.legalMoves():
+            # only possible if two boards have the same hash
+            return None
+        self.hits += 1
+        return move
+
+
+if __name__ == '__main__':
+    from .ai import createAgent
+
+    parser = argparse.ArgumentParser(description='Build the opening book of a gamemode.')
+    parser.add_argument('gamemode', choices=sorted(BOARDS), help='the gamemode to build for')
+    parser.add_argument('--plies', type=int, default=DEFAULT_PLIES,
+                        help='how many moves deep the book goes (default {})'.format(DEFAULT_PLIES))
+    parser.add_argument('--time', type=int, default=DEFAULT_TIME,
+                        help='search time for each move in milliseconds (default {})'.format(DEFAULT_TIME))
+    parser.add_argument('--agent', default='alphabeta', help='the agent that searches (default alphabeta)')
+    parser.add_argument('--out', type=Path, help='the file to write (default the gamemode assets folder)')
+    args = parser.parse_args()
+
+    startBoard = BOARDS[args.gamemode]()
+    searcher = createAgent(args.agent, timeLimit=args.time)
+    start = perf_counter()
+    bookMoves = build(startBoard, searcher, args.plies, verbose=True)
+    searcher.close()
+    out = args.out or defaultPath(args.gamemode)
+    save(bookMoves, startBoard, out)
+    print('Saved {} moves to {} in {:.0f}s'.format(len(bookMoves), out, perf_counter()-start))
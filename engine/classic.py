@@ -0,0 +1,289 @@
+"""
+Classic mancala rules engine written in Python.
+
+This file is the board state behind gamemodes/classic.py on:
+    - Sowing stones
+    - Listing the legal moves
+    - Detecting the end of the game and the winner
+
+No Panda3D import is needed so moves can be played without a window
+(AI, simulations, replays, etc)
+
+Author: Ritesh Ravji
+"""
+
+from typing import Union
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+# the board is a flat array of 14 slots
+# slot = side*7 + n, where n is the nth pit from the left and n = 6 is the store
+# e.g. player 0: [0, 1, 2, 3, 4, 5, (6)] player 1: [7, 8, 9, 10, 11, 12, (13)]
+# moving one slot to the right is just +1 (wrapping 13 back to 0)
+PITS = 6  # pits on each side (not including the store)
+SIDE = PITS+1  # slots on each side (including the store)
+SIZE = SIDE*2  # total slots on the board
+STORE = PITS  # the store is the nth slot after the pits
+
+# the sowing routes, worked out once when this file is imported
+# so sowing looks up the next slot instead of wrapping and checking every stone
+NEXT = [(i+1) % SIZE for i in range(SIZE)]  # the slot after each slot
+# the opponents store of each player (skipped per the rules)
+SKIP = [(1-plr)*SIDE+STORE for plr in (0, 1)]
+# the slot after each slot when player 0 or 1 is sowing (jumps over the opponents store)
+NEXT_SKIP = [[NEXT[NEXT[i]] if NEXT[i] == SKIP[plr] else NEXT[i] for i in range(SIZE)]
+             for plr in (0, 1)]
+# the side and nth pit of each slot
+SLOT_PIT = [divmod(i, SIDE) for i in range(SIZE)]
+
+# the steps recorded by traceMove
+SOW = 'sow'  # drop one stone from the hand into a slot
+RELAY = 'relay'  # pick up every stone in a slot and keep sowing
+CAPTURE = 'capture'  # move the stones of some slots into another slot
+
+
+def index(side: int, n: int) -> int:
+    """Return the slot of the given pit.
+
+    Args:
+        side (int): The side of the pit
+        n (int): the nth from the left
+    Returns:
+        The slot in the flat board array (int)
+    """
+    return side*SIDE+n
+
+
+def pit(i: int) -> tuple:  # -> tuple[int, int]
+    """Return the side and nth pit of the given slot.
+
+    Args:
+        i (int): The slot in the flat board array
+    Returns:
+        The side and nth from the left of the pit (int, int)
+    """
+    return SLOT_PIT[i]
+
+
+def sow(pits: list, i: int, hand: int, plr: int) -> int:
+    """Drop the stones one by one from the slot after i, skipping the opponents store.
+
+    Instead of stepping one stone at a time, every full lap (13 slots)
+    adds a stone to every slot at once, then only the stones left over are stepped
+    so sowing takes the same time no matter how many stones are in the hand
+
+    Args:
+        pits (list): The stones in each slot, this is changed
+        i (int): The slot the stones were picked up from
+        hand (int): The number of stones to sow
+        plr (int): The player sowing (player 0 or 1)
+    Returns:
+        The slot the last stone landed in (int)
+    """
+    laps, left = divmod(hand, SIZE-1)
+    if laps:
+        for j in range(SIZE):
+            pits[j] += laps
+        pits[SKIP[plr]] -= laps
+        if not left:
+            # a full lap ends back on the slot it started from
+            return i
+    route = NEXT_SKIP[plr]
+    for stone in range(left):
+        i = route[i]
+        pits[i] += 1
+    return i
+
+
+class ClassicBoard:
+    """Classic mancala board state.
+
+    The stones are stored as counts, not Panda3D node paths
+    so applying a move only takes microseconds
+    """
+
+    def __init__(self, stonesPerPit: int = 4) -> None:
+        """Setup the starting board.
+
+        Args:
+            stonesPerPit (int): The number of stones in each pit at the start
+        Returns:
+            None
+        """
+        # stones in each slot, the stores start empty
+        self.pits = ([stonesPerPit]*PITS+[0])*2
+        self._turn = 0  # player 0 goes first
+        self._winner = None  # _ means it is a protected variable (PEP)
+        self._gameComplete = False
+
+    def copy(self) -> 'ClassicBoard':
+        """Return a copy of the board.
+
+        __init__ is skipped because every variable is copied over
+
+        Args:
+            None
+        Returns:
+            The copied board (ClassicBoard)
+        """
+        board = self.__class__.__new__(self.__class__)
+        board.__dict__.update(self.__dict__)
+        board.pits = self.pits[:]  # lists are mutable so copy the list
+        return board
+
+    @property
+    def turn(self) -> int:
+        """Return the current turn.
+
+        Args:
+            None
+        Returns:
+            The current turn (player 0 or 1)
+        """
+        return self._turn
+
+    @property
+    def winner(self) -> Union[int, str]:
+        """Return the winner.
+
+        Args:
+            None
+        Returns:
+            The winner (player 0 or 1 or tie), None if the game is not complete
+        """
+        return self._winner
+
+    def isGameComplete(self) -> bool:
+        """Return if the game is complete.
+
+        Args:
+            None
+        Returns:
+            If the game is complete (bool)
+        """
+        return self._gameComplete
+
+    def stonesAt(self, side: int, n: int) -> int:
+        """Return the number of stones in the given pit.
+
+        Args:
+            side (int): The side of the pit
+            n (int): the nth from the left
+        Returns:
+            The number of stones (int)
+        """
+        return self.pits[side*SIDE+n]
+
+    def sumStones(self, plr: int) -> int:
+        """Return the total stones in the pits of the given side.
+
+        Args:
+            plr (int): Sum for player 0 or 1
+        Returns:
+            The total stones of the given side (not including the store)
+        """
+        start = plr*SIDE
+        return sum(self.pits[start:start+PITS])
+
+    def score(self, plr: int) -> int:
+        """Return how far ahead the given player is.
+
+        Used by the AI to compare boards
+
+        Args:
+            plr (int): Score for player 0 or 1
+        Returns:
+            The players store minus the opponents store (int)
+        """
+        return self.pits[plr*SIDE+STORE]-self.pits[(1-plr)*SIDE+STORE]
+
+    def legalMoves(self) -> list:
+        """Return the pits the current player can click on.
+
+        Args:
+            None
+        Returns:
+            The nth from the left of each pit with stones (list)
+        """
+        if self._gameComplete:
+            return []
+        pits = self.pits
+        start = self._turn*SIDE
+        return [n for n in range(PITS) if pits[start+n]]
+
+    def applyMove(self, n: int) -> int:
+        """Sow the stones of the current player's nth pit.
+
+        This is the fast version used for searching, see traceMove for the steps
+
+        Args:
+            n (int): The pit nth from the left of the current player
+        Returns:
+            The slot the last stone landed in (int)
+        """
+        pits = self.pits
+        i = self._turn*SIDE+n
+        hand = pits[i]  # pick up all the stones
+        if not hand or self._gameComplete:
+            raise ValueError('The pit {} cannot be played'.format(n))
+        pits[i] = 0
+        # the opponents store is skipped per the rules
+        i = sow(pits, i, hand, self._turn)
+        self._endTurn(i)
+        return i
+
+    def traceMove(self, n: int) -> list:
+        """Sow the stones of the current player's nth pit step by step.
+
+        The board is updated the same as applyMove
+        but every step is recorded so the scene can animate the move
+
+        Args:
+            n (int): The pit nth from the left of the current player
+        Returns:
+            The steps of the move [(SOW, slot), ...] (list)
+        """
+        pits = self.pits
+        i = self._turn*SIDE+n
+        hand = pits[i]
+        if not hand or self._gameComplete:
+            raise ValueError('The pit {} cannot be played'.format(n))
+        pits[i] = 0
+        steps = []
+        # the route jumps over the opponents store per the rules
+        route = NEXT_SKIP[self._turn]
+        # repeat for the # of stones in the clicked pit
+        for stone in range(hand):
+            i = route[i]
+            pits[i] += 1
+            steps.append((SOW, i))
+        self._endTurn(i)
+        return steps
+
+    def _endTurn(self, last: int) -> None:
+        """Check for the end of the game and change the turn.
+
+        Args:
+            last (int): The slot the last stone landed in
+        Returns:
+            None
+        """
+        pits = self.pits
+        if not any(pits[0:PITS]) or not any(pits[SIDE:SIDE+PITS]):
+            # there are no more stones on one side of the board
+            # this means game is finished
+            self._gameComplete = True
+            if pits[STORE] > pits[SIDE+STORE]:
+                # player 0 has more stones in their store
+                self._winner = 0
+            elif pits[STORE] < pits[SIDE+STORE]:
+                # player 1 has more stones in their store
+                self._winner = 1
+            else:
+                self._winner = "TIE"
+
+        if last != self._turn*SIDE+STORE:
+            # the last stone did not land in the players own store
+            # so it is the other players turn
+            self._turn = 1-self._turn
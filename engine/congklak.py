@@ -0,0 +1,169 @@
+"""
+Congklak rules engine written in Python.
+
+This file is the board state behind gamemodes/congklak.py on:
+    - Relay sowing (picking up the last pit and sowing again)
+    - Capturing the opposite pit
+    - and more (see engine/classic.py)
+
+A whole relay turn is resolved in one loop over the board array
+(no recursion) so long relays can't hit the recursion limit
+
+Author: Ritesh Ravji
+"""
+
+from .classic import ClassicBoard, sow, SIDE, SIZE, STORE, NEXT_SKIP, SOW, RELAY, CAPTURE
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+# every relay (picking up the last pit and sowing again) is one lap
+# a turn is cut off after this many laps, which should never happen in a normal game
+MAX_LAPS = 1000
+
+# the slot of the pit opposite each pit, worked out once when this file is imported
+# (None for the stores)
+OPPOSITE = [None if i % SIDE == STORE else SIZE-2-i for i in range(SIZE)]
+
+
+def opposite(i: int) -> int:
+    """Return the slot of the pit opposite the given pit.
+
+    Args:
+        i (int): The slot of the pit (not a store)
+    Returns:
+        The slot of the opposite pit on the other side (int)
+    """
+    return OPPOSITE[i]
+
+
+class CongklakBoard(ClassicBoard):
+    """Congklak board state.
+
+    The board is the same as classic mancala (see engine/classic.py)
+    only the end of the sowing is different
+    """
+
+    def __init__(self, stonesPerPit: int = 7, maxLaps: int = MAX_LAPS) -> None:
+        """Setup the starting board.
+
+        Args:
+            stonesPerPit (int): The number of stones in each pit at the start
+            maxLaps (int): The most relays in one turn before the turn is cut off
+        Returns:
+            None
+        """
+        ClassicBoard.__init__(self, stonesPerPit)
+        self.maxLaps = maxLaps
+        # if the last turn was cut off because of too many laps
+        self.relayCapped = False
+
+    def applyMove(self, n: int) -> int:
+        """Sow the stones of the current player's nth pit including relays.
+
+        This is the fast version used for searching, see traceMove for the steps
+
+        Args:
+            n (int): The pit nth from the left of the current player
+        Returns:
+            The slot the last stone landed in (int)
+        """
+        pits = self.pits
+        turn = self._turn
+        i = turn*SIDE+n
+        hand = pits[i]  # pick up all the stones
+        if not hand or self._gameComplete:
+            raise ValueError('The pit {} cannot be played'.format(n))
+        pits[i] = 0
+        store = turn*SIDE+STORE
+        laps = 0
+        self.relayCapped = False
+        while True:
+            # the opponents store is skipped per the rules
+            i = sow(pits, i, hand, turn)
+
+            if i == store:
+                # last stone landed in the seed store so go again
+                break
+            if pits[i] == 1:
+                if i//SIDE == turn:
+                    # landed on an empty pit on their own side
+                    # bank the stone and the opposite stones
+                    j = OPPOSITE[i]
+                    pits[store] += 1+pits[j]
+                    pits[i] = 0
+                    pits[j] = 0
+                # otherwise landed on an empty pit on the opponents side
+                break
+            # landed on a pit with stones so pick them up and keep going
+            laps += 1
+            if laps > self.maxLaps:
+                self.relayCapped = True
+                break
+            hand = pits[i]
+            pits[i] = 0
+        self._endTurn(i)
+        return i
+
+    def traceMove(self, n: int) -> list:
+        """Sow the stones of the current player's nth pit step by step.
+
+        The board is updated the same as applyMove
+        but every step is recorded so the scene can animate the move
+
+        Args:
+            n (int): The pit nth from the left of the current player
+        Returns:
+            The steps of the move (list)
+                (SOW, slot): drop one stone from the hand into the slot
+                (RELAY, slot): pick up the stones in the slot
+                (CAPTURE, (slot, slot), store): bank the stones of the slots
+        """
+        pits = self.pits
+        turn = self._turn
+        i = turn*SIDE+n
+        hand = pits[i]
+        if not hand or self._gameComplete:
+            raise ValueError('The pit {} cannot be played'.format(n))
+        pits[i] = 0
+        steps = []
+        store = turn*SIDE+STORE
+        # the route jumps over the opponents store per the rules
+        route = NEXT_SKIP[turn]
+        laps = 0
+        self.relayCapped = False
+        while True:
+            for stone in range(hand):
+                i = route[i]
+                pits[i] += 1
+                steps.append((SOW, i))
+
+            if i == store:
+                # the last stone landed in the seed store so go again
+                break
+            if pits[i] == 1:
+                if i//SIDE == turn:
+                    # the last stone landed on:
+                    #   their own side
+                    #   AND was previously empty (now it has one stone)
+                    #   AND it is not a seed store (has to be a pit)
+                    # as per the rules, bank the stone and the opposite stones
+                    j = OPPOSITE[i]
+                    pits[store] += pits[i]+pits[j]
+                    pits[i] = 0
+                    pits[j] = 0
+                    steps.append((CAPTURE, (i, j), store))
+                break
+            # the last stone landed on:
+            #   has at least one stone previously (so more than one stone now)
+            #   AND it is not a seed store (has to be a pit)
+            # as per the rules, continue going around
+            laps += 1
+            if laps > self.maxLaps:
+                self.relayCapped = True
+                break
+            hand = pits[i]
+            pits[i] = 0
+            steps.append((RELAY, i))
+        self._endTurn(i)
+        return steps
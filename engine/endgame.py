@@ -0,0 +1,307 @@
+"""
+Classic mancala endgame database written in Python.
+
+This file solves classic mancala endgames on:
+    - Building the exact result of every board with a few stones left (offline)
+    - Ranking the pit counts so every board has its own byte in the file
+    - Memory mapping the file so a look up is instant and the pages are shared
+      between processes (e.g. the MCTS process pool)
+
+Build the database from the command line (this takes a while):
+    python3 -m engine.endgame --stones 12
+
+Author: Ritesh Ravji
+"""
+
+import mmap
+import argparse
+from pathlib import Path
+from array import array
+from time import perf_counter
+from typing import Union
+
+from .classic import ClassicBoard, PITS, SIDE, STORE
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+# the database only stores the 12 pits (not the stores)
+# and is always from the view of the player to move
+# so the player to move is always side 0 (the pits are swapped for player 1)
+# the value is the most stones the player to move can still gain over the opponent
+# (their future store stones minus the opponents future store stones)
+# the stores are added on when looking up so one entry works for any store counts
+BOARD_PITS = PITS*2
+
+MAGIC = b'MCEG'  # the first bytes of the file
+VERSION = 1
+HEADER_BYTES = 8  # magic, version, max stones, pits, spare
+# the value of a board that is not solved yet (the values are -48 to 48)
+UNSOLVED = -128
+
+DEFAULT_STONES = 12  # the default max stones left in the pits
+DEFAULT_PATH = Path(__file__).parent.parent.resolve()/'gamemodes'/'classic_assets'/'endgame.db'
+
+
+def binomials(n: int) -> list:
+    """Return Pascal's triangle up to n.
+
+    Args:
+        n (int): The biggest n to calculate
+    Returns:
+        The binomial coefficients, [n][k] is n choose k (list)
+    """
+    table = [[0]*(n+1) for row in range(n+1)]
+    for i in range(n+1):
+        table[i][0] = 1
+        for k in range(1, i+1):
+            table[i][k] = table[i-1][k-1]+table[i-1][k]
+    return table
+
+
+class Ranking:
+    """Combinatorial ranking of the pit counts (stars and bars).
+
+    The pit counts are stars (stones) split by 11 bars (pit walls)
+    so every board with s stones is a choice of the 11 bar positions
+    the rank is the number of boards with fewer stones
+    plus the rank of the bar positions (the combinatorial number system)
+    """
+
+    def __init__(self, maxStones: int) -> None:
+        """Setup the binomial table.
+
+        Args:
+            maxStones (int): The most stones in the pits
+        Returns:
+            None
+        """
+        self.maxStones = maxStones
+        self._BINOM = binomials(maxStones+BOARD_PITS)
+
+    def count(self, stones: int) -> int:
+        """Return the number of boards with at most the given stones in the pits.
+
+        Args:
+            stones (int): The most stones in the pits
+        Returns:
+            The number of boards (int)
+        """
+        return self._BINOM[stones+BOARD_PITS][BOARD_PITS]
+
+    def rank(self, counts: list) -> int:
+        """Return the rank of the pit counts.
+
+        Args:
+            counts (list): The stones in the 12 pits (player to move first)
+        Returns:
+            The index of the board in the database (int)
+        """
+        binom = self._BINOM
+        # the number of boards with fewer stones come first
+        bar = -1
+        rank = 0
+        for k in range(1, BOARD_PITS):
+            bar += counts[k-1]+1  # the position of the kth bar
+            rank += binom[bar][k]
+        stones = bar-(BOARD_PITS-2)+counts[-1]
+        return rank+binom[stones+BOARD_PITS-1][BOARD_PITS]
+
+    def unrank(self, rank: int) -> list:
+        """Return the pit counts of the rank.
+
+        Args:
+            rank (int): The index of the board in the database
+        Returns:
+            The stones in the 12 pits (list)
+        """
+        binom = self._BINOM
+        stones = 0
+        while binom[stones+BOARD_PITS][BOARD_PITS] <= rank:
+            stones += 1
+        rank -= binom[stones+BOARD_PITS-1][BOARD_PITS]
+        # find the bar positions from the last bar down
+        bars = []
+        bar = stones+BOARD_PITS-1
+        for k in range(BOARD_PITS-1, 0, -1):
+            bar -= 1
+            while binom[bar][k] > rank:
+                bar -= 1
+            rank -= binom[bar][k]
+            bars.append(bar)
+        bars.reverse()
+        counts = []
+        last = -1
+        for bar in bars:
+            counts.append(bar-last-1)
+            last = bar
+        counts.append(stones+BOARD_PITS-2-last)
+        return counts
+
+
+def _toBoard(counts: list) -> ClassicBoard:
+    """Return an engine board for the pit counts with player 0 to move.
+
+    Args:
+        counts (list): The stones in the 12 pits (player to move first)
+    Returns:
+        The engine board with empty stores (ClassicBoard)
+    """
+    board = ClassicBoard(0)
+    board.pits = counts[:PITS]+[0]+counts[PITS:]+[0]
+    return board
+
+
+def build(maxStones: int = DEFAULT_STONES, verbose: bool = False) -> array:
+    """Solve every board with at most the given stones in the pits.
+
+    Classic mancala has no captures, sowing past the store takes a stone out of the pits
+    and sowing that does not reach the store only moves stones to the right
+    so every move goes to a board with fewer stones or stones further to the right
+    the boards are solved from the fewest stones up (retrograde analysis)
+    and a board with the same stones is solved before the board that moves into it
+
+    Args:
+        maxStones (int): The most stones in the pits
+        verbose (bool): Print the progress
+    Returns:
+        The value of every board in rank order (array of signed bytes)
+    """
+    ranking = Ranking(maxStones)
+    rank = ranking.rank
+    values = array('b', [UNSOLVED])*ranking.count(maxStones)
+
+    def solve(counts: list) -> int:
+        """Return the value of the board, solving the boards it moves into first."""
+        r = rank(counts)
+        value = values[r]
+        if value != UNSOLVED:
+            return value
+        if not any(counts[:PITS]) or not any(counts[PITS:]):
+            # one side is empty so the game is over
+            values[r] = 0
+            return 0
+        value = UNSOLVED
+        board = _toBoard(counts)
+        for n in board.legalMoves():
+            child = board.copy()
+            child.applyMove(n)
+            pits = child.pits
+            gained = pits[STORE]  # the opponents store is always skipped
+            if child.isGameComplete():
+                childValue = gained
+            elif child.turn == 0:
+                # extra turn, still the same player to move
+                childValue = gained+solve(pits[:PITS]+pits[SIDE:SIDE+PITS])
+            else:
+                childValue = gained-solve(pits[SIDE:SIDE+PITS]+pits[:PITS])
+            if childValue > value:
+                value = childValue
+        values[r] = value
+        return value
+
+    start = perf_counter()
+    for r in range(len(values)):
+        if values[r] == UNSOLVED:
+            solve(ranking.unrank(r))
+        if verbose and r % 100000 == 0:
+            print('{}/{} boards ({:.0f}s)'.format(r, len(values), perf_counter()-start))
+    return values
+
+
+def save(values: array, maxStones: int, path: Union[str, Path] = DEFAULT_PATH) -> None:
+    """Write the database to a file.
+
+    Args:
+        values (array): The value of every board in rank order
+        maxStones (int): The most stones in the pits
+        path (str/Path): The file to write
+    Returns:
+        None
+    """
+    header = MAGIC+bytes([VERSION, maxStones, BOARD_PITS, 0])
+    with open(path, 'wb') as file:
+        file.write(header)
+        file.write(values.tobytes())
+
+
+class EndgameDB:
+    """Read only endgame database memory mapped from a file.
+
+    Nothing is read until a board is looked up
+    so opening the database is instant no matter how big it is
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_PATH) -> None:
+        """Open and memory map the database.
+
+        Args:
+            path (str/Path): The database file (made with build and save)
+        Returns:
+            None
+        """
+        with open(path, 'rb') as file:
+            # the map stays open after the file is closed
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._map[:HEADER_BYTES]
+        if header[:4] != MAGIC or header[4] != VERSION or header[6] != BOARD_PITS:
+            self.close()
+            raise ValueError('''The file {} is not a classic endgame database...
+Build it again with: python3 -m engine.endgame'''.format(path))
+        self.maxStones = header[5]
+        self._ranking = Ranking(self.maxStones)
+        if len(self._map)-HEADER_BYTES != self._ranking.count(self.maxStones):
+            self.close()
+            raise ValueError('''The endgame database {} is cut short...
+Build it again with: python3 -m engine.endgame'''.format(path))
+        self.hits = 0
+
+    def close(self) -> None:
+        """Unmap the file.
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        self._map.close()
+
+    def probe(self, board: object) -> Union[int, None]:
+        """Return the exact final score of the board for the player to move.
+
+        Args:
+            board (object): The engine board (classic only)
+        Returns:
+            The players final store minus the opponents final store,
+            None if the board is not in the database
+        """
+        if type(board) is not ClassicBoard or board.isGameComplete():
+            # congklak and omweso boards are subclasses but have different rules
+            return None
+        pits = board.pits
+        me = board.turn*SIDE
+        other = SIDE-me
+        counts = pits[me:me+PITS]+pits[other:other+PITS]
+        if sum(counts) > self.maxStones:
+            return None
+        value = self._map[HEADER_BYTES+self._ranking.rank(counts)]
+        if value > 127:
+            value -= 256  # stored as a signed byte
+        self.hits += 1
+        return board.score(board.turn)+value
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the classic mancala endgame database.')
+    parser.add_argument('--stones', type=int, default=DEFAULT_STONES,
+                        help='the most stones left in the pits (default {})'.format(DEFAULT_STONES))
+    parser.add_argument('--out', type=Path, default=DEFAULT_PATH,
+                        help='the file to write (default {})'.format(DEFAULT_PATH))
+    args = parser.parse_args()
+    if not 0 <= args.stones <= 48:
+        parser.error('--stones must be between 0 and 48')
+    print('Solving {} boards...'.format(Ranking(args.stones).count(args.stones)))
+    start = perf_counter()
+    values = build(args.stones, verbose=True)
+    save(values, args.stones, args.out)
+    print('Saved to {} in {:.0f}s'.format(args.out, perf_counter()-start))
@@ -0,0 +1,349 @@
+"""
+Monte Carlo tree search opponent written in Python.
+
+This file picks the opponents move from an engine board on:
+    - Growing a search tree with UCT (upper confidence bound for trees)
+    - Playing random games (rollouts) from the new boards in the tree
+    - Running the rollouts on every core with a process pool
+
+Random games don't need a hand written evaluation
+which is hard to write for relay sowing (congklak and omweso)
+
+Author: Ritesh Ravji
+"""
+
+import threading
+from os import cpu_count
+from math import log, sqrt
+from pathlib import Path
+from random import Random
+from time import perf_counter
+from typing import Callable, Union
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from .book import OpeningBook
+
+try:
+    # NumPy plays the classic and congklak rollouts in lockstep (see engine/batch.py)
+    import numpy as np
+    from .batch import BATCHES, playouts as batchPlayouts
+except ImportError:
+    BATCHES = {}  # NumPy is optional, the rollouts are played one by one without it
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+# how much to explore moves that have not been tried much (sqrt 2 is the usual)
+EXPLORATION = 1.4
+# rollouts are stopped after this many moves (an omweso game can go on for a long time)
+# and the player that is ahead is counted as the winner
+MAX_ROLLOUT_MOVES = 200
+# the fewest rollouts worth playing in lockstep with NumPy
+# (a small batch is slower than playing the games one by one)
+MIN_BATCH_ROLLOUTS = 256
+# a round is sized to take at most this share of the time left
+# so the last round still comes back before the deadline
+ROUND_SHARE = 0.5
+# seconds between checks of cancel while waiting for the process pool
+CANCEL_CHECK = 0.01
+
+
+def rollout(board: object, rng: Random, maxMoves: int = MAX_ROLLOUT_MOVES) -> float:
+    """Play random moves until the end of the game.
+
+    Args:
+        board (object): The engine board, this is changed
+        rng (Random): The random number generator
+        maxMoves (int): The most moves to play before stopping
+    Returns:
+        The result for player 0 (1 win, 0.5 tie, 0 loss)
+    """
+    for move in range(maxMoves):
+        if board.isGameComplete():
+            break
+        moves = board.legalMoves()
+        board.applyMove(moves[int(rng.random()*len(moves))])
+
+    if board.isGameComplete():
+        winner = board.winner
+    else:
+        # stopped early so the player that is ahead wins
+        score = board.score(0)
+        winner = 0 if score > 0 else 1 if score < 0 else None
+    if winner == 0:
+        return 1
+    elif winner == 1:
+        return 0
+    return 0.5
+
+
+def rolloutBatch(boards: list, playouts: int, seed: int) -> list:
+    """Play random games from every board.
+
+    This is run in the process pool so it has to be a module level function
+
+    Args:
+        boards (list): The engine boards to play from
+        playouts (int): The number of random games from each board
+        seed (int): The seed for the random number generator
+    Returns:
+        The total result for player 0 from each board (list)
+    """
+    batch = BATCHES.get(type(boards[0]))
+    if (batch is not None and len(boards)*playouts >= MIN_BATCH_ROLLOUTS
+            and all(type(board) is type(boards[0]) for board in boards)):
+        # every rollout of every board in one batch
+        results = batchPlayouts(batch.fromBoards([board for board in boards
+                                                  for playout in range(playouts)]),
+                                np.random.default_rng(seed), MAX_ROLLOUT_MOVES)
+        return results.reshape(len(boards), playouts).sum(axis=1).tolist()
+    rng = Random(seed)
+    return [sum(rollout(board.copy(), rng) for playout in range(playouts))
+            for board in boards]
+
+
+class Node:
+    """A board in the search tree."""
+
+    __slots__ = ('board', 'parent', 'move', 'player', 'children', 'untried',
+                 'visits', 'wins')
+
+    def __init__(self, board: object, parent: 'Node' = None, move: int = None,
+                 player: int = None) -> None:
+        """Setup the node.
+
+        Args:
+            board (object): The engine board of this node
+            parent (Node): The node before the move
+            move (int): The move from the parent to this node
+            player (int): The player that made the move
+        Returns:
+            None
+        """
+        self.board = board
+        self.parent = parent
+        self.move = move
+        self.player = player
+        self.children = []
+        self.untried = board.legalMoves()  # moves without a child node yet
+        self.visits = 0
+        self.wins = 0.0  # from the view of the player that made the move
+
+    def select(self) -> 'Node':
+        """Return the child with the best upper confidence bound.
+
+        Args:
+            None
+        Returns:
+            The child node (Node)
+        """
+        logVisits = log(self.visits)
+        return max(self.children,
+                   key=lambda c: c.wins/c.visits+EXPLORATION*sqrt(logVisits/c.visits))
+
+
+class MCTSAgent:
+    """Opponent that searches with Monte Carlo tree search.
+
+    Every round a batch of new nodes is picked from the tree
+    and their rollouts are spread over the process pool
+    while a node waits for its rollouts it counts as a loss (virtual loss)
+    so the rest of the batch explores different moves
+    """
+
+    def __init__(self, timeLimit: int = 300, workers: int = None,
+                 leavesPerWorker: int = 8, playouts: int = 4,
+                 book: Union[str, Path] = None, seed: int = None, **kwargs) -> None:
+        """Setup the agent.
+
+        Args:
+            timeLimit (int): The time budget for each move in milliseconds
+            workers (int): The number of processes (0 to run the rollouts in this process)
+            leavesPerWorker (int): New nodes sent to each process every round
+            playouts (int): Random games from each new node
+            book (str/Path): The opening book file (see engine/book.py)
+                it is not used if the file has not been built
+            seed (int): The seed for the random games (None for different games every time)
+            **kwargs: Ignored, so every agent can be made the same way
+        Returns:
+            None
+        """
+        self.timeLimit = timeLimit
+        self.workers = (cpu_count() or 1) if workers is None else workers
+        self.leavesPerWorker = leavesPerWorker
+        self.playouts = playouts
+        self.rollouts = 0  # rollouts in the last move (for debugging)
+        # the most visited move of the last move (for debugging)
+        # use found in chooseMove to get the best move while searching
+        self.bestMove = None
+        self._rng = Random(seed)
+        self._pool = None  # the process pool is started on the first move
+        self.book = OpeningBook(book) if book and Path(book).exists() else None
+
+    def chooseMove(self, board: object, cancel: threading.Event = None,
+                   found: Callable[[int], None] = None) -> int:
+        """Return the most visited move found within the time budget.
+
+        Args:
+            board (object): The engine board, it is not changed
+            cancel (Event): Stops the search early when set (e.g. going to the main menu)
+            found (Callable): Called with the most visited move after every round
+                (e.g. so another thread can use it if the search runs out of time)
+        Returns:
+            The nth pit of the current player to click (int)
+        """
+        self.rollouts = 0
+        self.bestMove = None  # nothing found for this board yet
+        if self.book is not None:
+            # the opening was searched deeper offline
+            bestMove = self.book.lookup(board)
+            if bestMove is not None:
+                self.bestMove = bestMove
+                return bestMove
+        deadline = perf_counter()+self.timeLimit/1000
+        root = Node(board.copy())
+        bestMove = root.untried[0]
+        if found:
+            found(bestMove)
+        if len(root.untried) > 1:
+            maxLeaves = max(1, self.workers)*self.leavesPerWorker
+            leafCount = max(1, self.workers)  # the first round times how long a leaf takes
+            while perf_counter() < deadline and not (cancel and cancel.is_set()):
+                start = perf_counter()
+                leaves = [self._selectLeaf(root) for leaf in range(leafCount)]
+                results = self._rollouts([leaf.board for leaf in leaves], deadline, cancel)
+                played = 0
+                # undo the newest leaves first so the nodes they added can be taken out
+                for leaf, result in reversed(list(zip(leaves, results))):
+                    if result is None:
+                        self._undoVisits(leaf)  # came back too late
+                    else:
+                        self._backpropagate(leaf, result)
+                        played += 1
+                self.rollouts += played*self.playouts
+                if played:
+                    # fit the next round in the time left
+                    leafTime = (perf_counter()-start)/len(leaves)
+                    timeLeft = deadline-perf_counter()
+                    leafCount = max(1, min(maxLeaves, int(timeLeft*ROUND_SHARE/leafTime)))
+                if root.children:
+                    bestMove = max(root.children, key=lambda c: c.visits).move
+                    if found:
+                        found(bestMove)
+        # else nothing to think about
+        self.bestMove = bestMove
+        return bestMove
+
+    def close(self) -> None:
+        """Stop the process pool.
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _selectLeaf(self, root: Node) -> Node:
+        """Walk down the tree and add a new node.
+
+        Every node on the way is visited straight away (virtual loss)
+        the result is added when the rollout comes back
+
+        Args:
+            root (Node): The root of the tree
+        Returns:
+            The new node (or a node at the end of the game)
+        """
+        node = root
+        node.visits += 1
+        while not node.untried and node.children:
+            node = node.select()
+            node.visits += 1
+        if node.untried:
+            # expand a random untried move
+            move = node.untried.pop(int(self._rng.random()*len(node.untried)))
+            board = node.board.copy()
+            player = board.turn
+            board.applyMove(move)
+            child = Node(board, node, move, player)
+            node.children.append(child)
+            node = child
+            node.visits += 1
+        return node
+
+    def _backpropagate(self, node: Node, result: float) -> None:
+        """Add the rollout result to every node up to the root.
+
+        Args:
+            node (Node): The node the rollouts were played from
+            result (float): The total result for player 0
+        Returns:
+            None
+        """
+        # the visits were already added in _selectLeaf
+        # so the result is scaled back to one visit
+        result /= self.playouts
+        while node.parent is not None:
+            node.wins += result if node.player == 0 else 1-result
+            node = node.parent
+
+    def _undoVisits(self, node: Node) -> None:
+        """Take back the visits added in _selectLeaf for rollouts that never came back.
+
+        A new node left with no visits is taken out of the tree
+        so its move can be tried again
+
+        Args:
+            node (Node): The node the rollouts were played from
+        Returns:
+            None
+        """
+        while node is not None:
+            node.visits -= 1
+            parent = node.parent
+            if not node.visits and parent is not None:
+                parent.children.remove(node)
+                parent.untried.append(node.move)
+            node = parent
+
+    def _rollouts(self, boards: list, deadline: float,
+                  cancel: threading.Event = None) -> list:
+        """Play the rollouts from every board, in parallel if there are workers.
+
+        Args:
+            boards (list): The engine boards to play from
+            deadline (float): The perf_counter time to stop waiting for the workers
+            cancel (Event): Stops waiting for the workers when set
+        Returns:
+            The total result for player 0 from each board
+                None for the boards that did not come back in time (list)
+        """
+        if not self.workers:
+            return rolloutBatch(boards, self.playouts, self._rng.getrandbits(32))
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        # one batch for each process so there is not much pickling
+        size = -(-len(boards)//self.workers)  # ceiling division
+        futures = {self._pool.submit(rolloutBatch, boards[i:i+size], self.playouts,
+                                     self._rng.getrandbits(32)): i
+                   for i in range(0, len(boards), size)}
+        results = [None]*len(boards)
+        pending = set(futures)
+        while pending and not (cancel and cancel.is_set()):
+            timeLeft = deadline-perf_counter()
+            if timeLeft <= 0:
+                break
+            done, pending = wait(pending, timeout=min(timeLeft, CANCEL_CHECK))
+            for future in done:
+                batchResults = future.result()
+                i = futures[future]
+                results[i:i+len(batchResults)] = batchResults
+        for future in pending:
+            future.cancel()  # too late, the results are dropped
+        return results
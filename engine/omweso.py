@@ -0,0 +1,301 @@
+"""
+Omweso rules engine written in Python.
+
+This file is the board state behind gamemodes/omweso.py on:
+    - Relay sowing around each players 16 pits
+    - Capturing the adjacent pits on the opponents side
+    - Stopping endless relays
+    - and more (see engine/classic.py)
+
+Author: Ritesh Ravji
+"""
+
+from typing import Union
+
+from .classic import ClassicBoard, SOW, RELAY, CAPTURE
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+# the board is 2 rows of 16 pits stored as a flat array of 32 slots
+# slot = side*16 + n, n 0-7 are the outer pits and n 8-15 are the inner pits
+# stones are sown around the players own 16 pits (n 15 wraps back to n 0)
+PITS = 16  # pits on each side
+ROW = 8  # pits in each row (inner/outer) of a side
+SIDE = PITS  # slots on each side (there are no stores)
+SIZE = SIDE*2  # total slots on the board
+
+# a relay can go around the board forever so the turn is cut off
+# when a position repeats or after this many laps
+MAX_LAPS = 10000
+
+# the routes around the board, worked out once when this file is imported
+# so sowing looks up the next slot instead of wrapping and checking every stone
+# the slot after each slot (n 15 wraps back to n 0 on the same side)
+NEXT = [i-i % SIDE+(i+1) % PITS for i in range(SIZE)]
+# the side and nth pit of each slot
+SLOT_PIT = [divmod(i, SIDE) for i in range(SIZE)]
+# the slots of the adjacent pits on the opponents side of each inner pit
+# the inner pit n is next to the opponents pits n-8 (outer) and 23-n (inner)
+# (None for the outer pits, they have no adjacent pits)
+ADJACENT = [((1-side)*SIDE+n-ROW, (1-side)*SIDE+PITS+ROW-1-n) if n >= ROW else None
+            for side, n in SLOT_PIT]
+
+
+def index(side: int, n: int) -> int:
+    """Return the slot of the given pit.
+
+    Args:
+        side (int): The side of the pit
+        n (int): the nth pit (0-7 outer, 8-15 inner)
+    Returns:
+        The slot in the flat board array (int)
+    """
+    return side*SIDE+n
+
+
+def pit(i: int) -> tuple:  # -> tuple[int, int]
+    """Return the side and nth pit of the given slot.
+
+    Args:
+        i (int): The slot in the flat board array
+    Returns:
+        The side and nth pit (int, int)
+    """
+    return SLOT_PIT[i]
+
+
+def sowRing(pits: list, start: int, i: int, hand: int) -> int:
+    """Drop the stones one by one around the 16 pits of one side from the slot after i.
+
+    Every full lap adds a stone to every pit of the side at once
+    then only the stones left over are stepped (see sow in engine/classic.py)
+
+    Args:
+        pits (list): The stones in each slot, this is changed
+        start (int): The first slot of the side
+        i (int): The slot the stones were picked up from
+        hand (int): The number of stones to sow
+    Returns:
+        The slot the last stone landed in (int)
+    """
+    laps, left = divmod(hand, PITS)
+    if laps:
+        for j in range(start, start+PITS):
+            pits[j] += laps
+    for stone in range(left):
+        i = NEXT[i]
+        pits[i] += 1
+    # a full lap ends back on the slot it started from
+    return i
+
+
+def adjacentPits(i: int) -> tuple:
+    """Return the slots of the adjacent pits on the opponents side.
+
+    Only inner pits have adjacent pits, the inner pit n is next to
+    the opponents pits n-8 (outer) and 23-n (inner)
+
+    Args:
+        i (int): The slot of an inner pit
+    Returns:
+        The slots of the adjacent pits (int, int)
+    """
+    return ADJACENT[i]
+
+
+class OmwesoBoard(ClassicBoard):
+    """Omweso board state.
+
+    The stones are stored as counts, not Panda3D node paths
+    so a whole turn of relays only takes microseconds
+    """
+
+    def __init__(self, stonesPerPit: int = 4, maxLaps: int = MAX_LAPS) -> None:
+        """Setup the starting board.
+
+        Args:
+            stonesPerPit (int): The number of stones in each pit at the start
+            maxLaps (int): The most relays in one turn before the turn is cut off
+        Returns:
+            None
+        """
+        self.pits = [stonesPerPit]*SIZE
+        self._turn = 0  # player 0 goes first
+        self._winner = None  # _ means it is a protected variable (PEP)
+        self._gameComplete = False
+        self.maxLaps = maxLaps
+        # if the last turn was cut off because the relay repeated a position
+        # (so it would never end) or went over the max laps
+        self.relayCapped = False
+
+    def stonesAt(self, side: int, n: int) -> int:
+        """Return the number of stones in the given pit.
+
+        Args:
+            side (int): The side of the pit
+            n (int): the nth pit
+        Returns:
+            The number of stones (int)
+        """
+        return self.pits[side*SIDE+n]
+
+    def sumStones(self, plr: int) -> int:
+        """Return the total stones on the given side.
+
+        Args:
+            plr (int): Sum for player 0 or 1
+        Returns:
+            The total stones of the given side
+        """
+        start = plr*SIDE
+        return sum(self.pits[start:start+PITS])
+
+    def score(self, plr: int) -> int:
+        """Return how far ahead the given player is.
+
+        Stones are only lost by being captured so more stones is better
+
+        Args:
+            plr (int): Score for player 0 or 1
+        Returns:
+            The players stones minus the opponents stones (int)
+        """
+        return self.sumStones(plr)-self.sumStones(1-plr)
+
+    def legalMoves(self) -> list:
+        """Return the pits the current player can click on.
+
+        Args:
+            None
+        Returns:
+            The nth pit of each pit with stones (list)
+        """
+        if self._gameComplete:
+            return []
+        pits = self.pits
+        start = self._turn*SIDE
+        return [n for n in range(PITS) if pits[start+n]]
+
+    def applyMove(self, n: int) -> int:
+        """Sow the stones of the current player's nth pit including relays.
+
+        This is the fast version used for searching, see traceMove for the steps
+
+        Args:
+            n (int): The nth pit of the current player
+        Returns:
+            The slot the last stone landed in (int)
+        """
+        return self._sow(n, None)
+
+    def traceMove(self, n: int) -> list:
+        """Sow the stones of the current player's nth pit step by step.
+
+        The board is updated the same as applyMove
+        but every step is recorded so the scene can animate the move
+
+        Args:
+            n (int): The nth pit of the current player
+        Returns:
+            The steps of the move (list)
+                (SOW, slot): drop one stone from the hand into the slot
+                (RELAY, slot): pick up the stones in the slot
+                (CAPTURE, (slot, slot, slot), slot): move the stones into the clicked pit
+        """
+        steps = []
+        self._sow(n, steps)
+        return steps
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _sow(self, n: int, steps: Union[list, None]) -> int:
+        """Play the whole turn, recording the steps if a list is given.
+
+        Every time a relay starts, the players row and the relay pit are hashed
+        if the same position comes up again the relay would go on forever
+        so the turn is stopped there (relayCapped is set)
+
+        Args:
+            n (int): The nth pit of the current player
+            steps (list/None): The list to record the steps in
+        Returns:
+            The slot the last stone landed in (int)
+        """
+        pits = self.pits
+        turn = self._turn
+        start = turn*SIDE  # first slot of the players side
+        end = start+PITS
+        origin = i = start+n
+        hand = pits[i]  # pick up all the stones
+        if not hand or self._gameComplete:
+            raise ValueError('The pit {} cannot be played'.format(n))
+        pits[i] = 0
+        seen = set()  # positions at the start of each relay
+        laps = 0
+        self.relayCapped = False
+        while True:
+            if steps is None:
+                i = sowRing(pits, start, i, hand)
+            else:
+                for stone in range(hand):
+                    i = NEXT[i]
+                    pits[i] += 1
+                    steps.append((SOW, i))
+
+            adjacent = ADJACENT[i]
+            if adjacent:
+                # the last stone landed on an inner pit
+                adj1, adj2 = adjacent
+                if pits[adj1] and pits[adj2]:
+                    # the adjacent pits on the opponents side have stones
+                    # as per the rules, move them with the last pit to the clicked pit
+                    # (the last pit can be the clicked pit so empty it first)
+                    captured = pits[i]+pits[adj1]+pits[adj2]
+                    pits[i] = 0
+                    pits[adj1] = 0
+                    pits[adj2] = 0
+                    pits[origin] += captured
+                    if steps is not None:
+                        steps.append((CAPTURE, (i, adj1, adj2), origin))
+                    break
+            if pits[i] == 1:
+                # landed on an empty pit so the turn is over
+                break
+
+            # landed on a pit with stones so pick them up and keep going
+            # only the players side changes during a relay
+            position = (i, tuple(pits[start:end]))
+            laps += 1
+            if position in seen or laps > self.maxLaps:
+                # this relay has been here before, it would never end
+                self.relayCapped = True
+                break
+            seen.add(position)
+            hand = pits[i]
+            pits[i] = 0
+            if steps is not None:
+                steps.append((RELAY, i))
+        self._endTurn(i)
+        return i
+
+    def _endTurn(self, last: int) -> None:
+        """Check for the end of the game and change the turn.
+
+        The game ends when a player has no stones left (they cannot make a move)
+        and the winner is the last player with a possible move
+
+        Args:
+            last (int): The slot the last stone landed in
+        Returns:
+            None
+        """
+        pits = self.pits
+        if not any(pits[0:SIDE]):
+            self._gameComplete = True
+            self._winner = 1
+        elif not any(pits[SIDE:SIZE]):
+            self._gameComplete = True
+            self._winner = 0
+        self._turn = 1-self._turn
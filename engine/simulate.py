@@ -0,0 +1,167 @@
+"""
+Headless self-play simulator written in Python.
+
+This file plays games between computer opponents without a window on:
+    - Spreading the games over a process pool
+    - Writing every game (winner, stores and moves) to a JSON lines file
+    - Printing the games per second and the results
+
+Used to tune the opponents and check if the rules are balanced
+e.g. 1000 classic games between alpha-beta and random:
+    python3 -m engine.simulate classic --games 1000 --agents alphabeta random --time 20
+
+Author: Ritesh Ravji
+"""
+
+import json
+import argparse
+from os import cpu_count
+from pathlib import Path
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import BOARDS, OmwesoBoard
+from .ai import createAgent
+from .classic import SIDE, STORE
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+# a game is stopped after this many moves (an omweso game can go on for a long time)
+MAX_MOVES = 1000
+GAMES_PER_TASK = 50  # games sent to a process at once
+
+
+def stores(board: object) -> list:
+    """Return the stones each player has scored.
+
+    Args:
+        board (object): The engine board
+    Returns:
+        The store of each player, or the stones on each side for omweso (list)
+    """
+    if isinstance(board, OmwesoBoard):
+        # omweso has no stores, stones are won by capturing
+        return [board.sumStones(0), board.sumStones(1)]
+    return [board.pits[STORE], board.pits[SIDE+STORE]]
+
+
+def playGames(gamemode: str, agents: list, first: int, games: int, timeLimit: int,
+              seed: int, maxMoves: int = MAX_MOVES) -> list:
+    """Play some games (in a process of the pool).
+
+    This is run in the process pool so it has to be a module level function
+
+    Args:
+        gamemode (str): The gamemode name in engine.BOARDS
+        agents (list): The agent names of player 0 and 1
+        first (int): The number of the first game
+        games (int): How many games to play
+        timeLimit (int): The time budget for each move in milliseconds
+        seed (int): The seed for the random agents
+        maxMoves (int): The most moves in a game before it is stopped
+    Returns:
+        The result of each game (list of dict)
+    """
+    # MCTS gets no process pool of its own (this is already in the pool)
+    players = [createAgent(name, timeLimit=timeLimit, seed=seed+plr, workers=0)
+               for plr, name in enumerate(agents)]
+    results = []
+    for game in range(first, first+games):
+        board = BOARDS[gamemode]()
+        moves = []
+        while not board.isGameComplete() and len(moves) < maxMoves:
+            move = players[board.turn].chooseMove(board)
+            board.applyMove(move)
+            moves.append(move)
+        results.append({
+            'game': game,
+            'winner': board.winner,  # None if the game was stopped
+            'stores': stores(board),
+            'moves': moves
+        })
+    for player in players:
+        player.close()
+    return results
+
+
+def simulate(gamemode: str, agents: list, games: int, out: Path, timeLimit: int = 20,
+             workers: int = None, seed: int = 0, maxMoves: int = MAX_MOVES) -> dict:
+    """Play the games over a process pool and write each game to the file.
+
+    The games are written as soon as each batch finishes
+    so a long run can be watched (or stopped) while it is going
+
+    Args:
+        gamemode (str): The gamemode name in engine.BOARDS
+        agents (list): The agent names of player 0 and 1
+        games (int): How many games to play
+        out (Path): The JSON lines file to write
+        timeLimit (int): The time budget for each move in milliseconds
+        workers (int): The number of processes (0 to play in this process)
+        seed (int): The seed for the random agents
+        maxMoves (int): The most moves in a game before it is stopped
+    Returns:
+        How many games each player won, tied or were stopped (dict)
+    """
+    workers = (cpu_count() or 1) if workers is None else workers
+    tasks = [(gamemode, agents, first, min(GAMES_PER_TASK, games-first), timeLimit,
+              seed+first*2, maxMoves) for first in range(0, games, GAMES_PER_TASK)]
+    totals = {'0': 0, '1': 0, 'TIE': 0, 'stopped': 0}
+    played = 0
+    start = perf_counter()
+    with open(out, 'w') as file:
+        if workers:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            batches = (future.result() for future in
+                       as_completed([pool.submit(playGames, *task) for task in tasks]))
+        else:
+            pool = None
+            batches = (playGames(*task) for task in tasks)
+        try:
+            for results in batches:
+                for result in results:
+                    file.write(json.dumps(result)+'\n')
+                    winner = result['winner']
+                    totals['stopped' if winner is None else str(winner)] += 1
+                played += len(results)
+                file.flush()
+                elapsed = perf_counter()-start
+                print('{}/{} games ({:.1f} games/s)'.format(played, games, played/elapsed))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    totals['gamesPerSecond'] = played/(perf_counter()-start)
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play games between computer opponents.')
+    parser.add_argument('gamemode', choices=sorted(BOARDS), help='the gamemode to play')
+    parser.add_argument('--games', type=int, default=100, help='how many games (default 100)')
+    parser.add_argument('--agents', nargs=2, default=['random', 'random'],
+                        metavar=('PLAYER0', 'PLAYER1'),
+                        help='the agent of each player, e.g. alphabeta random (default random random)')
+    parser.add_argument('--time', type=int, default=20,
+                        help='time each agent can think for in milliseconds (default 20)')
+    parser.add_argument('--workers', type=int,
+                        help='the number of processes, 0 to play without a pool (default every core)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the random agents (default 0)')
+    parser.add_argument('--max-moves', type=int, default=MAX_MOVES,
+                        help='stop a game after this many moves (default {})'.format(MAX_MOVES))
+    parser.add_argument('--out', type=Path, default=Path('games.jsonl'),
+                        help='the JSON lines file to write (default games.jsonl)')
+    args = parser.parse_args()
+
+    try:
+        for name in args.agents:
+            # check the names before starting the pool
+            createAgent(name).close()
+    except ValueError as error:
+        parser.error(str(error))
+    totals = simulate(args.gamemode, args.agents, args.games, args.out, args.time,
+                      args.workers, args.seed, args.max_moves)
+    print('''Player 0 ({}) won {}, player 1 ({}) won {}, {} ties, {} stopped
+{:.1f} games/s, saved to {}'''.format(args.agents[0], totals['0'], args.agents[1], totals['1'],
+                                      totals['TIE'], totals['stopped'],
+                                      totals['gamesPerSecond'], args.out))
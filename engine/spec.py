@@ -0,0 +1,477 @@
+"""
+Declarative board specs written in Python.
+
+This file describes a gamemode as data instead of code on:
+    - The pit layout (pits on each side, rows, stores)
+    - The rules (sowing order, extra turns, relays, captures, end of the game)
+    - The scene (asset paths, models and pit positions, read by scene/board.py)
+    - Compiling the spec into route tables and an engine board
+
+A spec with the same rules as a hand written engine (engine/classic.py,
+engine/congklak.py or engine/omweso.py) compiles to that engine,
+any other spec (e.g. a new variant) compiles to a table driven engine
+which sows whole laps at once like the hand written ones
+
+Author: Ritesh Ravji
+"""
+
+from typing import Union
+
+from .classic import ClassicBoard, SOW, RELAY, CAPTURE
+from .congklak import CongklakBoard
+from .omweso import OmwesoBoard
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+# the possible values of the rules
+SOWINGS = ('board', 'ring')  # around the whole board or around the players own side
+CAPTURES = (None, 'opposite', 'adjacent')
+GAME_ENDS = ('stores', 'stones')  # most stones in the store or last player with stones
+
+# a relay can go around the board forever so the turn is cut off
+# when a position repeats or after this many laps
+MAX_LAPS = 1000
+
+
+class BoardSpec:
+    """Declarative description of a gamemode.
+
+    The rules are read by the engine and the scene values by scene/board.py,
+    the engine ignores the scene values so a spec can be made without Panda3D
+    """
+
+    def __init__(self, name: str, pits: int = 6, stores: bool = True, rows: int = 1,
+                 sowing: str = 'board', extraTurn: bool = True, relay: bool = False,
+                 capture: Union[str, None] = None, gameEnd: str = 'stores',
+                 stonesPerPit: int = 4, maxLaps: Union[int, None] = None,
+                 assets: Union[str, None] = None, model: str = 'mancala.obj',
+                 modelRotation: tuple = (90, 0), pitCollision: Union[str, None] = None,
+                 storeCollision: Union[str, None] = None, collisionAtPit: bool = False,
+                 positions: Union[list, None] = None, stoneScale: float = 0.35) -> None:
+        """Check and store the spec.
+
+        Args:
+            name (str): The name of the gamemode (e.g. classic)
+            pits (int): The pits on each side (not including the store)
+            stores (bool): If each player has a store after their pits
+            rows (int): The rows of pits on each side (1 or 2), the inner row is the last
+            sowing (str): 'board' to sow around the whole board (skipping the opponents store)
+                or 'ring' to sow around the players own pits
+            extraTurn (bool): If the last stone landing in the players store is another turn
+            relay (bool): If the last stone landing on a pit with stones picks them up and keeps sowing
+            capture (str/None): What happens when the last stone lands
+                None: nothing is captured
+                'opposite': on an empty pit on their own side, it and the opposite pit are banked
+                'adjacent': on an inner pit with both adjacent opponent pits holding stones,
+                    the three pits are moved into the clicked pit
+            gameEnd (str): 'stores' to end when a side is empty and compare the stores
+                or 'stones' to end when a player has no stones (the other player wins)
+            stonesPerPit (int): The number of stones in each pit at the start
+            maxLaps (int/None): The most relays in one turn (None for the engine default)
+            assets (str/None): The assets folder next to the gamemode file (default <name>_assets)
+            model (str): The board model in the assets folder
+            modelRotation (tuple): The pitch and roll of the board model
+            pitCollision (str/None): The collision model of each pit in the assets folder
+                formatted with the side and nth pit (e.g. collision_assets/Player{side}/{n}.obj)
+            storeCollision (str/None): The collision model of each store, formatted with the side
+            collisionAtPit (bool): Move each pit collision model to the pit
+                (for one model shared by every pit, the models are in place otherwise)
+            positions (list/None): The x, y position of every pit and store [side][n]
+            stoneScale (float): The radius of each stone
+        Returns:
+            None
+        """
+        if sowing not in SOWINGS:
+            raise ValueError('The sowing must be one of {}, not {}'.format(SOWINGS, sowing))
+        if capture not in CAPTURES:
+            raise ValueError('The capture must be one of {}, not {}'.format(CAPTURES, capture))
+        if gameEnd not in GAME_ENDS:
+            raise ValueError('The game end must be one of {}, not {}'.format(GAME_ENDS, gameEnd))
+        if rows not in (1, 2) or pits % rows:
+            raise ValueError('The {} pits cannot be split into {} rows'.format(pits, rows))
+        if not stores and (extraTurn or capture == 'opposite' or gameEnd == 'stores'):
+            raise ValueError('The rules of {} need stores'.format(name))
+        if stores and sowing == 'ring':
+            raise ValueError('Ring sowing never reaches the stores')
+        if capture == 'adjacent' and rows != 2:
+            raise ValueError('Adjacent captures need an inner row (rows=2)')
+
+        # the rules
+        self.name = name
+        self.pits = pits
+        self.stores = stores
+        self.rows = rows
+        self.sowing = sowing
+        self.extraTurn = extraTurn
+        self.relay = relay
+        self.capture = capture
+        self.gameEnd = gameEnd
+        self.stonesPerPit = stonesPerPit
+        self.maxLaps = maxLaps
+
+        # the scene
+        self.assets = assets or '{}_assets'.format(name)
+        self.model = model
+        self.modelRotation = modelRotation
+        self.pitCollision = pitCollision
+        self.storeCollision = storeCollision
+        self.collisionAtPit = collisionAtPit
+        self.positions = positions
+        self.stoneScale = stoneScale
+
+        self._engine = None  # compiled on first use
+
+    @property
+    def rules(self) -> tuple:
+        """Return the rules that change how a move is played.
+
+        Args:
+            None
+        Returns:
+            The pits, stores, rows, sowing, extra turn, relay, capture and game end (tuple)
+        """
+        return (self.pits, self.stores, self.rows, self.sowing, self.extraTurn,
+                self.relay, self.capture, self.gameEnd)
+
+    @property
+    def side(self) -> int:
+        """Return the slots on each side (including the store).
+
+        Args:
+            None
+        Returns:
+            The slots on each side (int)
+        """
+        return self.pits+1 if self.stores else self.pits
+
+    def compile(self, fast: bool = True) -> type:
+        """Return the engine board class for the spec.
+
+        The engine is only compiled once
+
+        Args:
+            fast (bool): Use a hand written engine if one has the same rules,
+                False always builds the table driven engine (e.g. to check a hand written engine)
+        Returns:
+            The engine board class (a subclass of ClassicBoard)
+        """
+        if fast and self._engine is not None:
+            return self._engine
+        engine = ENGINES.get(self.rules) if fast else None
+        if engine is None:
+            # e.g. OwareBoard, the tables are class variables so they are looked up once
+            engine = type('{}Board'.format(self.name.title()), (SpecBoard,),
+                          dict(compileTables(self), SPEC=self))
+        if fast:
+            self._engine = engine
+        return engine
+
+    def newBoard(self) -> ClassicBoard:
+        """Return the starting board of the spec.
+
+        Args:
+            None
+        Returns:
+            The engine board (a subclass of ClassicBoard)
+        """
+        engine = self.compile()
+        if self.relay and self.maxLaps is not None:
+            return engine(self.stonesPerPit, self.maxLaps)
+        return engine(self.stonesPerPit)
+
+
+def compileTables(spec: BoardSpec) -> dict:
+    """Work out the route tables of the spec.
+
+    The tables are worked out once so sowing looks up the next slot
+    instead of wrapping and checking every stone (see engine/classic.py)
+
+    Args:
+        spec (BoardSpec): The spec to compile
+    Returns:
+        The tables (dict)
+            PITS, SIDE, SIZE, STORE: the layout of the flat board array (slot = side*SIDE + n)
+            ROUTE: the slot after each slot when player 0 or 1 is sowing [plr][slot]
+            LAP: the slots a full lap drops a stone in [plr]
+            SLOT_PIT: the side and nth pit of each slot
+            OPPOSITE: the slot of the pit opposite each pit (None for the stores)
+            ADJACENT: the slots of the adjacent opponent pits of each inner pit (None otherwise)
+            MAX_LAPS: the most relays in one turn
+    """
+    pits = spec.pits
+    side = spec.side
+    size = side*2
+    store = pits if spec.stores else None
+    row = pits//spec.rows
+    slotPit = [divmod(i, side) for i in range(size)]
+    if spec.sowing == 'board':
+        # around the whole board, jumping over the opponents store
+        skip = [(1-plr)*side+store if spec.stores else None for plr in (0, 1)]
+        route = [[(i+2) % size if (i+1) % size == skip[plr] else (i+1) % size
+                  for i in range(size)] for plr in (0, 1)]
+        lap = [[i for i in range(size) if i != skip[plr]] for plr in (0, 1)]
+    else:
+        # around the players own pits (the last pit wraps back to the first)
+        ring = [i-i % side+(i+1) % pits for i in range(size)]
+        route = [ring, ring]
+        lap = [list(range(plr*side, plr*side+pits)) for plr in (0, 1)]
+    opposite = [None if n == store else (1-s)*side+pits-1-n for s, n in slotPit]
+    # the inner pit n is next to the opponents pits n-row (outer) and pits+row-1-n (inner)
+    adjacent = [((1-s)*side+n-row, (1-s)*side+pits+row-1-n)
+                if spec.rows == 2 and row <= n < pits else None for s, n in slotPit]
+    return {
+        'PITS': pits,
+        'SIDE': side,
+        'SIZE': size,
+        'STORE': store,
+        'ROUTE': route,
+        'LAP': lap,
+        'SLOT_PIT': slotPit,
+        'OPPOSITE': opposite,
+        'ADJACENT': adjacent,
+        'MAX_LAPS': MAX_LAPS if spec.maxLaps is None else spec.maxLaps
+    }
+
+
+class SpecBoard(ClassicBoard):
+    """Table driven board state compiled from a spec.
+
+    The layout and routes are class variables filled in by BoardSpec.compile
+    so one class covers every variant without a hand written engine
+    """
+
+    SPEC = None
+    PITS = SIDE = SIZE = STORE = MAX_LAPS = None
+    ROUTE = LAP = SLOT_PIT = OPPOSITE = ADJACENT = None
+
+    def __init__(self, stonesPerPit: int = None, maxLaps: int = None) -> None:
+        """Setup the starting board.
+
+        Args:
+            stonesPerPit (int): The number of stones in each pit at the start (default the spec)
+            maxLaps (int): The most relays in one turn before the turn is cut off
+        Returns:
+            None
+        """
+        if self.SPEC is None:
+            raise TypeError('SpecBoard has no spec, use BoardSpec.compile to make a board class')
+        if stonesPerPit is None:
+            stonesPerPit = self.SPEC.stonesPerPit
+        # stones in each slot, the stores start empty
+        self.pits = ([stonesPerPit]*self.PITS+[0]*(self.SIDE-self.PITS))*2
+        self._turn = 0  # player 0 goes first
+        self._winner = None  # _ means it is a protected variable (PEP)
+        self._gameComplete = False
+        self.maxLaps = self.MAX_LAPS if maxLaps is None else maxLaps
+        # if the last turn was cut off because the relay repeated a position
+        # (so it would never end) or went over the max laps
+        self.relayCapped = False
+
+    def stonesAt(self, side: int, n: int) -> int:
+        """Return the number of stones in the given pit.
+
+        Args:
+            side (int): The side of the pit
+            n (int): the nth pit
+        Returns:
+            The number of stones (int)
+        """
+        return self.pits[side*self.SIDE+n]
+
+    def sumStones(self, plr: int) -> int:
+        """Return the total stones in the pits of the given side.
+
+        Args:
+            plr (int): Sum for player 0 or 1
+        Returns:
+            The total stones of the given side (not including the store)
+        """
+        start = plr*self.SIDE
+        return sum(self.pits[start:start+self.PITS])
+
+    def score(self, plr: int) -> int:
+        """Return how far ahead the given player is.
+
+        Args:
+            plr (int): Score for player 0 or 1
+        Returns:
+            The players store (or stones without stores) minus the opponents (int)
+        """
+        if self.STORE is None:
+            return self.sumStones(plr)-self.sumStones(1-plr)
+        side = self.SIDE
+        return self.pits[plr*side+self.STORE]-self.pits[(1-plr)*side+self.STORE]
+
+    def legalMoves(self) -> list:
+        """Return the pits the current player can click on.
+
+        Args:
+            None
+        Returns:
+            The nth pit of each pit with stones (list)
+        """
+        if self._gameComplete:
+            return []
+        pits = self.pits
+        start = self._turn*self.SIDE
+        return [n for n in range(self.PITS) if pits[start+n]]
+
+    def applyMove(self, n: int) -> int:
+        """Sow the stones of the current player's nth pit including relays.
+
+        This is the fast version used for searching, see traceMove for the steps
+
+        Args:
+            n (int): The nth pit of the current player
+        Returns:
+            The slot the last stone landed in (int)
+        """
+        return self._sow(n, None)
+
+    def traceMove(self, n: int) -> list:
+        """Sow the stones of the current player's nth pit step by step.
+
+        The board is updated the same as applyMove
+        but every step is recorded so the scene can animate the move
+
+        Args:
+            n (int): The nth pit of the current player
+        Returns:
+            The steps of the move (list)
+                (SOW, slot): drop one stone from the hand into the slot
+                (RELAY, slot): pick up the stones in the slot
+                (CAPTURE, (slot, ...), slot): move the stones of the slots into the last slot
+        """
+        steps = []
+        self._sow(n, steps)
+        return steps
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _sow(self, n: int, steps: Union[list, None]) -> int:
+        """Play the whole turn, recording the steps if a list is given.
+
+        Args:
+            n (int): The nth pit of the current player
+            steps (list/None): The list to record the steps in
+        Returns:
+            The slot the last stone landed in (int)
+        """
+        spec = self.SPEC
+        pits = self.pits
+        turn = self._turn
+        side = self.SIDE
+        origin = i = turn*side+n
+        hand = pits[i]  # pick up all the stones
+        if not hand or self._gameComplete:
+            raise ValueError('The pit {} cannot be played'.format(n))
+        pits[i] = 0
+        store = None if self.STORE is None else turn*side+self.STORE
+        route = self.ROUTE[turn]
+        lap = self.LAP[turn]
+        seen = set()  # positions at the start of each relay
+        laps = 0
+        self.relayCapped = False
+        while True:
+            if steps is None:
+                # every full lap adds a stone to every slot of the lap at once
+                # (a full lap ends back on the slot it started from)
+                fullLaps, left = divmod(hand, len(lap))
+                if fullLaps:
+                    for j in lap:
+                        pits[j] += fullLaps
+                for stone in range(left):
+                    i = route[i]
+                    pits[i] += 1
+            else:
+                for stone in range(hand):
+                    i = route[i]
+                    pits[i] += 1
+                    steps.append((SOW, i))
+
+            if i == store:
+                # the last stone landed in the players own store
+                break
+            if spec.capture == 'adjacent' and self.ADJACENT[i] and i//side == turn:
+                # the last stone landed on an inner pit of the player
+                adj1, adj2 = self.ADJACENT[i]
+                if pits[adj1] and pits[adj2]:
+                    # move the last pit and the adjacent pits to the clicked pit
+                    # (the last pit can be the clicked pit so empty it first)
+                    captured = pits[i]+pits[adj1]+pits[adj2]
+                    pits[i] = pits[adj1] = pits[adj2] = 0
+                    pits[origin] += captured
+                    if steps is not None:
+                        steps.append((CAPTURE, (i, adj1, adj2), origin))
+                    break
+            if pits[i] == 1:
+                if spec.capture == 'opposite' and i//side == turn:
+                    # landed on an empty pit on their own side
+                    # bank the stone and the opposite stones
+                    j = self.OPPOSITE[i]
+                    pits[store] += pits[i]+pits[j]
+                    pits[i] = pits[j] = 0
+                    if steps is not None:
+                        steps.append((CAPTURE, (i, j), store))
+                # landed on an empty pit so the turn is over
+                break
+            if not spec.relay:
+                break
+
+            # landed on a pit with stones so pick them up and keep going
+            position = (i, tuple(pits))
+            laps += 1
+            if position in seen or laps > self.maxLaps:
+                # this relay has been here before, it would never end
+                self.relayCapped = True
+                break
+            seen.add(position)
+            hand = pits[i]
+            pits[i] = 0
+            if steps is not None:
+                steps.append((RELAY, i))
+        self._endTurn(i)
+        return i
+
+    def _endTurn(self, last: int) -> None:
+        """Check for the end of the game and change the turn.
+
+        Args:
+            last (int): The slot the last stone landed in
+        Returns:
+            None
+        """
+        pits = self.pits
+        side = self.SIDE
+        empty = [not any(pits[plr*side:plr*side+self.PITS]) for plr in (0, 1)]
+        if self.SPEC.gameEnd == 'stones':
+            if empty[0] or empty[1]:
+                # the last player with stones wins
+                self._gameComplete = True
+                self._winner = 1 if empty[0] else 0
+        elif empty[0] or empty[1]:
+            # there are no more stones on one side of the board
+            self._gameComplete = True
+            store0 = pits[self.STORE]
+            store1 = pits[side+self.STORE]
+            if store0 > store1:
+                self._winner = 0
+            elif store0 < store1:
+                self._winner = 1
+            else:
+                self._winner = "TIE"
+        if not (self.SPEC.extraTurn and last == self._turn*side+self.STORE):
+            # the last stone did not land in the players own store
+            # so it is the other players turn
+            self._turn = 1-self._turn
+
+
+# the hand written engines, a spec with the same rules compiles to these
+# (pits, stores, rows, sowing, extraTurn, relay, capture, gameEnd)
+ENGINES = {
+    (6, True, 1, 'board', True, False, None, 'stores'): ClassicBoard,
+    (6, True, 1, 'board', True, True, 'opposite', 'stores'): CongklakBoard,
+    (16, False, 2, 'ring', False, True, 'adjacent', 'stones'): OmwesoBoard
+}
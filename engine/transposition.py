@@ -0,0 +1,216 @@
+"""
+Transposition table written in Python.
+
+This file stores the search results of boards on:
+    - Zobrist hashing the pit counts and the player to move
+    - A fixed size table (in MB) so it can't grow forever
+    - Depth-preferred and always-replace buckets
+
+Sowing reaches the same board from different moves all the time
+so the search can look up a board instead of searching it again
+
+Author: Ritesh Ravji
+"""
+
+from array import array
+from random import Random
+from typing import Iterable
+
+from .classic import CAPTURE
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+# seed for the Zobrist keys
+# this is fixed so the same board has the same hash in every process
+# (e.g. for opening books saved to a file)
+ZOBRIST_SEED = 0x6D616E63616C61  # 'mancala' in hex
+
+# the type of score stored
+EXACT = 0  # the score is exact
+LOWER = 1  # the score is at least this (the search was cut off by beta)
+UPPER = 2  # the score is at most this (no move beat alpha)
+
+ENTRY_BYTES = 16  # 8 bytes for the key and 8 bytes for the packed entry
+SLOTS = 2  # depth-preferred and always-replace slots in each bucket
+# the score is stored with this added so it is never negative
+SCORE_OFFSET = 1 << 31
+
+
+def touchedSlots(board: object, n: int, steps: list) -> set:
+    """Return the slots a move changed from the steps of the move.
+
+    Args:
+        board (object): The engine board before the move
+        n (int): The nth pit of the player that moved
+        steps (list): The steps of the move (see traceMove)
+    Returns:
+        The slots the move picked up from, sowed into or captured (set)
+    """
+    # every engine has the same number of slots on each side
+    # and the player picks up from the nth slot of their side
+    slots = {board.turn*(len(board.pits)//2)+n}
+    for step in steps:
+        if step[0] == CAPTURE:
+            # (CAPTURE, slots, slot) moves the stones of the slots into the slot
+            slots.update(step[1])
+            slots.add(step[2])
+        else:
+            slots.add(step[1])
+    return slots
+
+
+class Zobrist:
+    """Zobrist hashes for boards.
+
+    Every slot has a random 64 bit key for each number of stones
+    the hash is the XOR of the keys of every slot (and the player to move)
+    """
+
+    def __init__(self, size: int, maxStones: int, seed: int = ZOBRIST_SEED) -> None:
+        """Create the random keys.
+
+        Args:
+            size (int): The number of slots on the board
+            maxStones (int): The most stones that can be in one slot
+            seed (int): The seed for the random keys
+        Returns:
+            None
+        """
+        rng = Random(seed)
+        self.KEYS = [[rng.getrandbits(64) for count in range(maxStones+1)]
+                     for i in range(size)]
+        self.TURN_KEY = rng.getrandbits(64)  # XORed in when it is player 1's turn
+
+    def hash(self, board: object) -> int:
+        """Return the hash of the whole board.
+
+        Args:
+            board (object): The engine board
+        Returns:
+            The 64 bit hash (int)
+        """
+        keys = self.KEYS
+        key = self.TURN_KEY if board.turn else 0
+        for i, count in enumerate(board.pits):
+            key ^= keys[i][count]
+        return key
+
+    def update(self, key: int, before: list, after: list, slots: Iterable[int],
+               turnChanged: bool) -> int:
+        """Return the hash after a move from the hash before the move.
+
+        Only the slots the move touched are XORed out and back in
+        so the other slots are never looked at
+
+        Args:
+            key (int): The hash before the move
+            before (list): The pits before the move
+            after (list): The pits after the move
+            slots (Iterable): The slots the move touched, each only once (see touchedSlots)
+            turnChanged (bool): If the player to move changed
+        Returns:
+            The 64 bit hash after the move (int)
+        """
+        keys = self.KEYS
+        for i in slots:
+            key ^= keys[i][before[i]] ^ keys[i][after[i]]
+        if turnChanged:
+            key ^= self.TURN_KEY
+        return key
+
+
+class TranspositionTable:
+    """Fixed size hash table of search results.
+
+    The table is two flat arrays of 64 bit numbers so the memory is fixed at creation
+    each bucket has a depth-preferred slot (keeps the deepest search)
+    and an always-replace slot (keeps the newest search)
+    """
+
+    def __init__(self, sizeMB: float = 16) -> None:
+        """Allocate the table.
+
+        Args:
+            sizeMB (float): The memory the table can use in megabytes
+        Returns:
+            None
+        """
+        self.buckets = max(1, int(sizeMB*1024*1024)//(ENTRY_BYTES*SLOTS))
+        self._keys = array('Q', bytes(8*SLOTS*self.buckets))
+        self._entries = array('Q', bytes(8*SLOTS*self.buckets))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of slots (filled or not).
+
+        Args:
+            None
+        Returns:
+            The number of slots (int)
+        """
+        return len(self._keys)
+
+    def clear(self) -> None:
+        """Empty the table and reset the counters.
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        self._keys = array('Q', bytes(len(self._keys)*8))
+        self._entries = array('Q', bytes(len(self._entries)*8))
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key: int) -> tuple:
+        """Look up the board with the given hash.
+
+        Args:
+            key (int): The Zobrist hash of the board
+        Returns:
+            (depth, flag, score, move) if the board is stored, otherwise None
+        """
+        i = (key % self.buckets)*SLOTS
+        keys = self._keys
+        if keys[i] == key and self._entries[i]:
+            entry = self._entries[i]
+        elif keys[i+1] == key and self._entries[i+1]:
+            entry = self._entries[i+1]
+        else:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # unpack the entry (see store)
+        return (entry & 0xFF, (entry >> 8) & 0x3,
+                ((entry >> 16) & 0xFFFFFFFF)-SCORE_OFFSET, (entry >> 48)-1)
+
+    def store(self, key: int, depth: int, flag: int, score: int, move: int) -> None:
+        """Store the search result of the board with the given hash.
+
+        Args:
+            key (int): The Zobrist hash of the board
+            depth (int): How many moves ahead the board was searched
+            flag (int): EXACT, LOWER or UPPER
+            score (int): The score of the board
+            move (int): The best move of the board (-1 if there is none)
+        Returns:
+            None
+        """
+        # pack into 64 bits:
+        # depth (8 bits), flag (2 bits), 6 spare bits, score (32 bits), move+1 (16 bits)
+        entry = (min(depth, 0xFF) | flag << 8 | (score+SCORE_OFFSET) << 16
+                 | (move+1) << 48)
+        i = (key % self.buckets)*SLOTS
+        keys = self._keys
+        entries = self._entries
+        if keys[i] == key or not entries[i] or depth >= entries[i] & 0xFF:
+            # the same board or a deeper search so replace the depth-preferred slot
+            keys[i] = key
+            entries[i] = entry
+        else:
+            # a shallower search so it goes in the always-replace slot
+            keys[i+1] = key
+            entries[i+1] = entry
@@ -0,0 +1,8 @@
+"""
+Panda3D scenes of the gamemodes.
+
+The board, stones and collisions built from a gamemode spec (see engine/spec.py)
+so the gamemode files only describe their board
+
+Author: Ritesh Ravji
+"""
@@ -0,0 +1,630 @@
+"""
+Mancala board scene written in Python.
+
+This file is the shared controller behind the gamemodes on:
+    - Creating the board, pits and stores from the gamemode spec (see engine/spec.py)
+    - Moving stones for every step the engine plays (sowing, relays and captures)
+    - and more...
+
+A gamemode subclasses BoardScene with its spec
+so a new variant gets the whole scene without copying it
+
+Author: Ritesh Ravji
+"""
+
+# don't check for these libraries as these are core libraries
+from time import time
+from pathlib import Path
+from warnings import warn
+from typing import Union, Iterable
+from random import random, randint
+from threading import Event
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because Panda3D is built on C so it uses camel case.
+
+try:
+    from panda3d.core import *
+    from panda3d.physics import *
+    from direct.task import *
+except ImportError:
+    raise ImportError(
+        '''Please import the panda3d library to run this program
+You can do this using pip or https://docs.panda3d.org/1.10/python/introduction/index''')
+
+from engine.spec import BoardSpec
+from engine.classic import SOW, RELAY, CAPTURE
+from .cache import loadModel
+from .stones import StoneRenderer
+from .steering import StoneSteering
+from .sleeping import StoneSleeper
+from .groups import CollisionGroups, CLICK_MASK
+
+# how close a dropped stone must be to the middle of its pit to have landed
+# (the stones rest up to about 1.5 from the middle of a pit)
+LANDED_DISTANCE = 2
+
+
+class ColourGenerator:
+    """Random colour generator."""
+
+    def __init__(self) -> None:
+        """Define an array of colours."""
+        self.COLOURS = [
+            (.85, 0, 0, 0),  # red
+            (0, .85, 0, 0),  # green
+            (0, 0, .85, 0),  # blue
+            (.85, 0, .85, 0)  # pink
+            ]
+
+    def __next__(self) -> Iterable[Union[float, float, float, float]]:
+        """Return a random colour."""
+        return self.COLOURS[randint(0, len(self.COLOURS)-1)]
+
+    def __iter__(self):
+        """Return iterator."""
+        return self
+
+
+class BoardScene:
+    """Functions that are required and called by the main code.
+
+    Everything is built from the spec, a gamemode only sets its spec and opponent
+    """
+
+    def __init__(self, app: object, spec: BoardSpec, folder: Path) -> None:
+        """Setup the class variables.
+
+        This function is run when the gamemode is initalised
+        Setup the variables required for the rest of the class
+
+        Args:
+            app (object): The Mancala.py main class responsible for the app and window
+            spec (BoardSpec): The gamemode spec
+            folder (Path): The folder of the gamemode file (where the assets folder is)
+        Returns:
+            None
+        """
+        # _ means weak internal use
+        # these should not be accessed from outside the class
+        self._APP = app  # store app for use outside init function
+        self._SPEC = spec
+        # the side and nth pit of each slot in the engine board
+        self._SLOT_PIT = [divmod(i, spec.side) for i in range(spec.side*2)]
+
+        # these can be accessed from outside the class
+        self.stones = {}  # dictionary to store stones
+        self.clickables = {}  # dictionary to store clickables
+        self.hoverables = {}  # dictionary to store hoverables
+        self.STONES_PER_PIT = spec.stonesPerPit
+        # the stones are waited for until they arrive (see scene/steering.py)
+        # these are the most seconds to wait in case they never settle
+        self.STEP_TIMEOUT = 2  # the most seconds for the stones to reach a pit
+        self.STONES_TIMEOUT = 5  # the most seconds to wait for captured stones
+        # how fast the stones move (set for every gamemode with "--speed" in Mancala.py)
+        self.SPEED = app.SPEED
+        self.OPPONENT = 'random'  # the computer opponent (see engine/ai.py)
+        self.OPPONENT_TIME = 300  # time the opponent can think for in milliseconds
+        self.OPPONENT_OPTIONS = {}  # extra options for the opponent (see engine/ai.py)
+        # the board state, the scene mirrors this
+        self.board = spec.newBoard()
+        # path to the gamemode assets folder
+        self.ASSETS = folder/spec.assets
+        if not self.ASSETS.exists():
+            raise FileNotFoundError('''The {0} folder was not found...
+Make sure the {0} folder is present in the same directory as {1}.py'''.format(spec.assets, spec.name))
+
+        self._STR_INSTRUCTIONS = self._instructionsFromFile()
+
+    def load(self) -> None:
+        """Load the board on to the scene (render).
+
+        This function is called by the main Mancala.py file
+        Set up and load the board, place stones, setup collisions, etc
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        APP = self._APP  # save space by dropping self
+        SPEC = self._SPEC
+
+        # this is so the main code can tell what objects can be clicked on
+        APP.CLICKABLE_TAG = "clickable"
+        # the mouse ray only tests the nodes under this
+        APP.CLICKABLE_ROOT = APP.render.attachNewNode('clickables')
+
+        # setup camera
+        APP.camera.setPos(-30, 0, 40)  # by experimentation of what looks nice
+        APP.camera.lookAt(0, 0, 0)  # look the the board which is at the center
+        APP.camLens.setFov(50)  # default FOV is 40
+
+        # debug but NOT recommended because of how much the program slows down
+        # traverser.showCollisions(app.render)
+
+        # setup directional light for the mancala board
+        # as it does not show up without it...
+        LIGHT = DirectionalLight("light")
+        LIGHT.setColor((1, 1, 1, 1))
+        LIGHT.setShadowCaster(True, 1024, 1024)
+        LNP = APP.render.attachNewNode(LIGHT)  # light node path
+        LNP.setPos(0, 0, 100)
+        LNP.setHpr(0, -90, 0)  # heading, yaw, pitch (the angle of light)
+        APP.render.setLight(LNP)  # add light to render (the scene)
+
+        # check for board assets
+        modelPath = self.ASSETS/SPEC.model
+        if not modelPath.exists():
+            raise FileNotFoundError('''The {} file was not found...
+Make sure the file is present in the {} folder'''.format(SPEC.model, SPEC.assets))
+
+        if not (self.ASSETS/'collision_assets').exists():
+            raise FileNotFoundError('''The collision_assets folder was not found...
+Make sure the folder is present in the {} folder'''.format(SPEC.assets))
+
+        if not modelPath.with_suffix('.mtl').exists():
+            warn('''The {} file was not found...
+Make sure the file is present in the {} folder
+The mancala board may appear grey without this file'''.format(modelPath.with_suffix('.mtl').name,
+                                                              SPEC.assets),
+                 RuntimeWarning)
+
+        # setup mancala board
+        # the model is converted to a .bam file on first use (see scene/cache.py)
+        self.BOARD = loadModel(modelPath)
+        # rotate because I made the model wrong...
+        pitch, roll = SPEC.modelRotation
+        self.BOARD.setP(self.BOARD, pitch)
+        if roll:
+            self.BOARD.setR(self.BOARD, roll)
+        self.BOARD.reparentTo(APP.render)
+
+        COLOUR_GENERATOR = ColourGenerator()
+        # draws every stone in a few draw calls if the graphics card can instance
+        self._STONE_RENDERER = StoneRenderer(APP, SPEC.stoneScale)
+        # moves the picked up stones in one task (see scene/steering.py)
+        self.steering = StoneSteering(APP, self.SPEED)
+        # a seperate collision group for each pit saves collision calculation between
+        # stones in different pits which will never collide (see scene/groups.py)
+        self._GROUPS = CollisionGroups(APP, SPEC)
+        # takes the resting stones out of the physics (see scene/sleeping.py)
+        self._SLEEPER = StoneSleeper(APP, self._GROUPS)
+
+        if SPEC.collisionAtPit:
+            # the shared collision model is only loaded once
+            # and its geometry is instanced at every pit (see _instanceCollision)
+            sharedCollision = self._collisionModel(SPEC.pitCollision)
+
+        # loop through the board parts
+        # two sides because of two players
+        for side in range(2):
+            self.stones[side] = {}
+            self.clickables[side] = {}
+            self.hoverables[side] = {}
+
+            # clickable obj nth from left
+            for n in range(SPEC.pits):
+                x_pos, y_pos = SPEC.positions[side][n]  # position of the pit
+
+                # create board collisions for each pit
+                if SPEC.collisionAtPit:
+                    # one collision model is shared by every pit
+                    pit = self._instanceCollision(sharedCollision, side, n)
+                    pit.setPos(x_pos, y_pos, 1)
+                else:
+                    self._loadCollision(SPEC.pitCollision.format(side=side, n=n), side, n)
+
+                # create clickable points
+                clickable = APP.loader.loadModel('models/misc/sphere')
+                self.clickables[side][n] = clickable
+                self.hoverables[side][n] = clickable  # all clickables can be hovered over
+                clickable.setPos(x_pos, y_pos, 1)
+                clickable.setScale(1.5, 1.5, 1.5)
+                clickable.setCollideMask(CLICK_MASK)  # only the mouse ray collides with it
+                clickable.reparentTo(APP.CLICKABLE_ROOT)
+                # change name though it is not important
+                clickable.name = 'clickable ' + str(side) + "-" + str(n)
+                # this is how we will tell if we clicked the clickable
+                clickable.setTag(APP.CLICKABLE_TAG, "True")
+                clickable.setTag('hover', "True")  # it is hoverable
+                # it is on the side of player 0/1
+                clickable.setTag('side', str(side))
+                clickable.setTag('n', str(n))  # nth from the left
+                clickable.hide()  # make invisible
+
+                # store stones in array in dictionaries
+                self.stones[side][n] = []
+                for count in range(self.STONES_PER_PIT):
+                    self.stones[side][n].append(
+                        self._createStone(x_pos, y_pos, count, next(COLOUR_GENERATOR), side, n))
+
+            if not SPEC.stores:
+                continue
+            n = SPEC.pits  # the store is after the pits
+            # board collisions for the stone stores
+            # this is where the stones are banked
+            self._loadCollision(SPEC.storeCollision.format(side=side), side, n)
+            self.stones[side][n] = []  # create the array to store stones in
+            # create hoverable point
+            hoverable = APP.loader.loadModel('models/misc/sphere')
+            self.hoverables[side][n] = hoverable
+            x_pos, y_pos = SPEC.positions[side][n]
+            hoverable.setPos(x_pos, y_pos, 1)
+            hoverable.setScale(1.5, 1.5, 1.5)
+            hoverable.hide()
+            hoverable.setTag('hover', "True")
+            hoverable.setTag('side', str(side))
+            hoverable.setTag('n', str(n))
+            hoverable.reparentTo(APP.render)
+
+        self._STONE_RENDERER.start()
+
+        # backup collsion 'floor' in case the stones fall through the model
+        plane = CollisionPlane(Plane(Vec3(0, 0, 1), Point3(0, 0, -0.5)))
+        cn = CollisionNode('plane')
+        cn.addSolid(plane)
+        cn.setIntoCollideMask(self._GROUPS.allMask)  # every pit but not the mouse
+        for root in self._GROUPS.roots:
+            root.attachNewNode(cn)  # the same floor in every layer
+
+    def clickedPit(self, clickedSide: int, clickedN: int) -> None:
+        """Move the stones for the given clicked pit.
+
+        This function is called by the main Mancala.py file
+        The whole turn is run on this function
+
+        Args:
+            clickedSide (int): The side that is clicked
+            clickedN (int): The pit nth from the left that is clicked
+        Returns:
+            None
+        """
+        if clickedSide != self.board.turn:
+            raise ValueError('It is not the turn of player {}'.format(clickedSide))
+
+        clickedStones = self.stones[clickedSide][clickedN]
+        # pick up the stones (the clicked pit can get stones back on a lap)
+        hand = clickedStones[:]
+        clickedStones.clear()
+
+        side = clickedSide
+        n = clickedN
+        # the engine plays the whole turn (including relays)
+        # and the scene follows each step in one loop
+        # an endless relay is already cut off by the engine
+        for step in self.board.traceMove(clickedN):
+            if step[0] == SOW:
+                currentPit = self.hoverables[side][n]
+                goTo = currentPit.getPos()+Vec3(0, 0, 5)
+
+                # carry on as soon as the stones arrive
+                self._waitForArrival([self._moveStones(hand, goTo)], self.STEP_TIMEOUT)
+                self._releaseAllStones()
+
+                # get the next pit (the opponents store is already skipped)
+                side, n = self._SLOT_PIT[step[1]]
+
+                goTo = self.hoverables[side][n].getPos()+Vec3(0, 0, 5)
+
+                self._waitForArrival([self._moveStones(hand, goTo)], self.STEP_TIMEOUT)
+                self._releaseAllStones()
+
+                for stone in hand:
+                    # stop stones from moving
+                    # in case it has any glitchy velocity
+                    self._setStationary(stone)
+
+                # pop removes last stone in array and return it
+                droppedStone = hand.pop()
+                self._setPitMask(droppedStone, side, n)
+                self.stones[side][n].append(droppedStone)  # add to new pit
+                # just incase, stop the stone from moving
+                self._setStationary(droppedStone)
+            elif step[0] == RELAY:
+                # the last stone landed on a pit with stones
+                # as per the rules, pick them up and continue going around
+                # wait for the last stone to drop into the pit
+                landed = self.steering.watch(self.stones[side][n][-1:],
+                                             self.hoverables[side][n].getPos(), LANDED_DISTANCE)
+                self._waitForArrival([landed], self.STEP_TIMEOUT)
+                side, n = self._SLOT_PIT[step[1]]
+                hand = self.stones[side][n][:]
+                self.stones[side][n].clear()
+            elif step[0] == CAPTURE:
+                # the last stone landed where the rules capture stones
+                # (e.g. the opposite pit into the store or the adjacent pits into the clicked pit)
+                captured = [self._SLOT_PIT[i] for i in step[1]]
+                destSide, destN = self._SLOT_PIT[step[2]]
+
+                # hover over the respective pits
+                arrivals = []
+                for capSide, capN in captured:
+                    capGoTo = self.hoverables[capSide][capN].getPos()+Vec3(0, 0, 5)
+                    arrivals.append(self._moveStones(self.stones[capSide][capN], capGoTo))
+
+                self._waitForArrival(arrivals, self.STEP_TIMEOUT)
+
+                # hover over the pit the stones are captured into
+                hoverPit = self.hoverables[destSide][destN]
+                goTo = hoverPit.getPos()+Vec3(0, 0, 5)
+                self._releaseAllStones()
+
+                arrivals = [self._moveStones(self.stones[capSide][capN], goTo)
+                            for capSide, capN in captured]
+
+                # because the stone could potentially move from one side to the other
+                # wait for the stones to arrive
+                self._waitForArrival(arrivals, self.STONES_TIMEOUT)
+
+                self._releaseAllStones()
+                # take the stones out first as a captured pit can be the destination
+                capturedStones = []
+                for capSide, capN in captured:
+                    capturedStones += self.stones[capSide][capN]
+                    self.stones[capSide][capN].clear()
+                for stone in capturedStones:
+                    self._setPitMask(stone, destSide, destN)
+                    self.stones[destSide][destN].append(stone)
+
+                    # stop stones from moving
+                    # in case it has any glitchy velocity
+                    self._setStationary(stone)
+        # no more stones in the hand
+        # the end of the game and the next turn are handled by the engine
+
+    @property
+    def turn(self) -> int:
+        """Return the current turn.
+
+        This function has a property decorator so it can be accessed like a variable/property
+        This means the board turn is not exposed and is less likely to be externally edited
+
+        Args:
+            None
+        Returns:
+            The current turn (player 0 or 1)
+        """
+        return self.board.turn
+
+    def isGameComplete(self) -> bool:
+        """Return if the game is complete.
+
+        Args:
+            None
+        Returns:
+            If the game is complete (bool)
+        """
+        return self.board.isGameComplete()
+
+    @property
+    def instructions(self) -> str:
+        """Return the instructions.
+
+        The instructions are saved at class init and is should be retrieved here
+
+        Args:
+            None
+        Returns:
+            The game instructions (str)
+        """
+        return self._STR_INSTRUCTIONS
+
+    @property
+    def winner(self) -> Union[int, str]:
+        """Return the winner.
+
+        This function has a property decorator so it can be accessed like a variable/property
+        This means the board winner is not exposed and is less likely to be externally edited
+
+        Args:
+            None
+        Returns:
+            The winner (player 0 or 1 or tie)
+        """
+        return self.board.winner
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _instructionsFromFile(self) -> str:
+        """Read the instructions file and return its contents.
+
+        This function is called at class init
+
+        Args:
+            None
+        Returns:
+            The game instructions (str)
+        """
+        if not (self.ASSETS/'rules.txt').exists():
+            warn('''The game rules were not found...
+Make sure the rules.txt file is present in the {} folder'''.format(self._SPEC.assets),
+                 RuntimeWarning)
+            return ''
+        with open(self.ASSETS/"rules.txt", mode='r') as file:
+            instructions = file.read()
+
+        return instructions
+
+    def _collisionModel(self, name: str) -> NodePath:
+        """Load a collision model from the assets folder.
+
+        Args:
+            name (str): The collision model in the assets folder
+        Returns:
+            The collision model, not yet in the scene (NodePath)
+        """
+        path = self.ASSETS/name
+        if not path.exists():
+            raise FileNotFoundError('''The {} file was not found...
+Make sure the file is present in the {} folder'''.format(path.name, path.parent.name))
+        return loadModel(path)
+
+    def _loadCollision(self, name: str, side: int, n: int) -> NodePath:
+        """Load a hidden collision model for a pit or store.
+
+        Args:
+            name (str): The collision model in the assets folder
+            side (int): The side of the pit or store
+            n (int): The nth pit
+        Returns:
+            The collision model (NodePath)
+        """
+        mask = self._GROUPS.mask(side, n)
+        model = self._collisionModel(name)
+        model.setP(model, 90)
+        model.reparentTo(self._GROUPS.root(side, n))
+        model.hide()  # make sure it is not visible
+        for geom in model.find_all_matches("**/+GeomNode"):
+            # add a collide mask so stones in the pit don't fall through
+            geom.setCollideMask(mask)
+        return model
+
+    def _instanceCollision(self, model: NodePath, side: int, n: int) -> NodePath:
+        """Add a hidden copy of a shared collision model for a pit.
+
+        The collide mask belongs to the GeomNode so the GeomNode can't be shared
+        between pits, instead each pit gets its own GeomNodes holding the same Geoms
+        so the vertex data is only in memory once
+
+        Args:
+            model (NodePath): The shared collision model (from _collisionModel)
+            side (int): The side of the pit
+            n (int): The nth pit
+        Returns:
+            The pit collision (NodePath)
+        """
+        mask = self._GROUPS.mask(side, n)
+        pit = self._GROUPS.root(side, n).attachNewNode('pit collision')
+        pit.setP(pit, 90)
+        pit.hide()  # make sure it is not visible
+        for geomPath in model.find_all_matches("**/+GeomNode"):
+            # a shallow copy of the node holds the same Geom objects (not copies)
+            instance = pit.attachNewNode(geomPath.node().makeCopy())
+            instance.setTransform(geomPath.getTransform(model))
+            # add a collide mask so stones in the pit don't fall through
+            instance.setCollideMask(mask)
+        return pit
+
+    def _createStone(self, x: float, y: float, count: int, colour: tuple,
+                     side: int, n: int) -> NodePath:
+        """Create a stone with physics above the pit.
+
+        Args:
+            x (float): The x position of the pit
+            y (float): The y position of the pit
+            count (int): The number of stones already in the pit (stacks the stones)
+            colour (tuple): The colour of the stone
+            side (int): The side of the pit
+            n (int): The nth pit
+        Returns:
+            The stone (NodePath)
+        """
+        APP = self._APP
+        scale = self._SPEC.stoneScale
+        mask = self._GROUPS.mask(side, n)
+
+        # start physics logic
+        node = NodePath("PhysicsNode")
+        node.reparentTo(self._GROUPS.root(side, n))
+        an = ActorNode("stone-physics")
+        panp = node.attachNewNode(an)
+        APP.physicsMgr.attachPhysicalNode(an)
+        # the visible sphere is drawn by the stone renderer (see scene/stones.py)
+        stone = self._STONE_RENDERER.add(panp, colour)
+
+        # set stone position
+        # when we move the stone we must move the node path Panp
+        # this is because Panp is moved by the physics system
+        # add random() to add a randomness to the stone scattering
+        panp.setPos(x+random()/4, y+random()/4, 5+count*5)
+
+        # create a collision sphere which will set how the stone looks to the collision system
+        # (the sphere is centred on the physics node)
+        cs = CollisionSphere(Point3(0, 0, 0), scale)
+        cn = CollisionNode('cnode')
+
+        # from objects are the 'moving' objs
+        # into objects are the non moving 'walls'
+
+        # used when the stone is colliding into
+        cn.setFromCollideMask(mask)
+        # used when the stone is collided into
+        cn.setIntoCollideMask(mask)
+        cnode_path = panp.attachNewNode(cn)
+        cnode_path.node().addSolid(cs)  # attach collision sphere
+        self._GROUPS.addStone(cnode_path, panp)  # add to the pusher and traverser of the pit
+        # show collision objects for debugging
+        # cnodePath.show()
+        self._SLEEPER.add(stone)  # the stone sleeps once it rests in the pit
+        return stone
+
+    def _setPitMask(self, stone: NodePath, side: int, n: int) -> None:
+        """Set the collide masks of the stone to the given pit.
+
+        Args:
+            stone (NodePath): The stone represented by Panda3D as a node path
+            side (int): The side of the pit
+            n (int): The nth pit
+        Returns:
+            None
+        """
+        self._GROUPS.moveStone(stone.getParent(), side, n)
+
+    def _waitForArrival(self, arrivals: list, maxTime: float) -> bool:
+        """Wait for stones to arrive, giving up after the max time.
+
+        Args:
+            arrivals (list): The events set once each group of stones arrives
+                (returned by _moveStones)
+            maxTime (float): The most seconds to wait at speed 1
+        Returns:
+            atPos (bool): If the stones have arrived
+        """
+        deadline = time()+maxTime/self.SPEED
+        for arrival in arrivals:
+            if not arrival.wait(max(deadline-time(), 0)):
+                return False  # too slow, carry on anyway
+        return True
+
+    def _moveStones(self, clickedStones: list, goTo: Vec3) -> Event:
+        """Move clicked stones to position.
+
+        Stones are move to go_to in the background, so it is non-blocking
+
+        Args:
+            clickedStones (list): The list of clicked stones to move
+            goTo (Vec3): A Panda3D class containing x, y, z coords to move to
+        Returns:
+            The event set once the stones have arrived (Event)
+        """
+        # sleeping stones must be in the physics to move
+        self._SLEEPER.wake(clickedStones)
+        # every moving stone is steered by one task
+        return self.steering.steer(clickedStones, goTo)
+
+    def _releaseAllStones(self) -> None:
+        """Release all the stones.
+
+        Stones will no longer be moved by _moveStones in the background
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        self.steering.release()
+
+    def _setStationary(self, stone: NodePath) -> None:
+        """Set the stone stationary (no velocity).
+
+        Args:
+            stone (NodePath): The stone represented by Panda3D as a node path
+        Returns:
+            None
+        """
+        an = stone.getParent().node()
+        phyObj = an.getPhysicsObject()
+
+        phyObj.setVelocity(Vec3(0, 0, 0))
@@ -0,0 +1,338 @@
+"""
+Compiled model cache written in Python.
+
+This file speeds up loading the board and collision models on:
+    - Converting each .obj model to Panda3D's binary .bam format on first use
+    - Keying the .bam file on the content hash of the model (and its .mtl file)
+    - Loading the .bam file on later runs instead of parsing the .obj again
+    - Keeping recently used models in memory by content hash so a reset
+      or switching gamemodes (e.g. classic and congklak share the same models)
+      copies the model without reading the disk
+
+A .obj file is parsed by assimp every time it is loaded (hundreds of milliseconds
+for the board models) while the .bam file is read in about a millisecond
+
+Prewarm the cache from the command line (e.g. after changing a model):
+    python3 -m scene.cache
+
+Author: Ritesh Ravji
+"""
+
+import json
+import argparse
+from collections import OrderedDict
+from hashlib import sha1
+from pathlib import Path
+from warnings import warn
+from time import perf_counter
+from typing import Union
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because Panda3D is built on C so it uses camel case.
+
+try:
+    from panda3d.core import Filename, Loader, LoaderOptions, NodePath, PandaSystem
+except ImportError:
+    raise ImportError(
+        '''Please import the panda3d library to run this program
+You can do this using pip or https://docs.panda3d.org/1.10/python/introduction/index''')
+
+ROOT = Path(__file__).parent.parent.resolve()
+CACHE_DIR = ROOT/'cache'  # the .bam files
+GAMEMODES = ROOT/'gamemodes'
+# the content hash of each model by path, so a model that has not changed
+# (same modified time and size) is not hashed again
+INDEX_FILE = 'index.json'
+# only the models parsed by assimp are cached (Panda3D models are already fast)
+CACHED_TYPES = ('.obj',)
+# the most bytes of vertex and index data kept in memory
+MEMORY_LIMIT = 64*1024*1024
+
+# the index is read once and shared by every load
+_index = None
+
+
+def _readIndex() -> dict:
+    """Return the index of content hashes, reading it on first use.
+
+    Args:
+        None
+    Returns:
+        {path: [modified time, size, hash]} (dict)
+    """
+    global _index
+    if _index is None:
+        try:
+            _index = json.loads((CACHE_DIR/INDEX_FILE).read_text())
+        except (OSError, ValueError):
+            # no cache yet (or a broken index), every model is hashed again
+            _index = {}
+    return _index
+
+
+def _writeIndex() -> None:
+    """Save the index of content hashes.
+
+    Args:
+        None
+    Returns:
+        None
+    """
+    tmp = CACHE_DIR/(INDEX_FILE+'.tmp')
+    tmp.write_text(json.dumps(_readIndex(), indent=1))
+    tmp.replace(CACHE_DIR/INDEX_FILE)  # replace in one go so the index is never half written
+
+
+def contentHash(path: Path) -> str:
+    """Return the hash of the model, its .mtl file and the Panda3D version.
+
+    The material file changes how the model looks so it is part of the hash
+    and a new Panda3D version may write .bam files differently
+
+    Args:
+        path (Path): The model file
+    Returns:
+        The hex digest (str)
+    """
+    index = _readIndex()
+    mtl = path.with_suffix('.mtl')
+    stats = [path.stat()]+([mtl.stat()] if mtl.exists() else [])
+    stamp = [[stat.st_mtime_ns, stat.st_size] for stat in stats]
+    entry = index.get(str(path))
+    if entry is not None and entry[0] == stamp:
+        return entry[1]  # not changed since it was last hashed
+    digest = sha1(path.read_bytes())
+    if mtl.exists():
+        digest.update(mtl.read_bytes())
+    digest.update(PandaSystem.getVersionString().encode())
+    index[str(path)] = [stamp, digest.hexdigest()]
+    # save the new hash straight away, otherwise a model whose .bam file is already cached
+    # (e.g. the modified time changed after a checkout) would be hashed again every launch
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        _writeIndex()
+    except OSError as error:
+        # the game still works without the index, the model is just hashed again next time
+        warn('Could not save the cache index: {}'.format(error), RuntimeWarning)
+    return digest.hexdigest()
+
+
+def cachePath(path: Path) -> Path:
+    """Return the .bam file of the model.
+
+    Args:
+        path (Path): The model file
+    Returns:
+        The .bam file in the cache folder (Path)
+    """
+    return CACHE_DIR/'{}-{}.bam'.format(path.stem, contentHash(path)[:16])
+
+
+def modelBytes(model: NodePath) -> int:
+    """Return the bytes of vertex and index data held by the model.
+
+    Args:
+        model (NodePath): The model
+    Returns:
+        The number of bytes (int)
+    """
+    size = 0
+    for geomPath in model.find_all_matches('**/+GeomNode'):
+        node = geomPath.node()
+        for k in range(node.getNumGeoms()):
+            geom = node.getGeom(k)
+            data = geom.getVertexData()
+            for i in range(data.getNumArrays()):
+                size += data.getArray(i).getDataSizeBytes()
+            for i in range(geom.getNumPrimitives()):
+                vertices = geom.getPrimitive(i).getVertices()
+                if vertices is not None:
+                    size += vertices.getDataSizeBytes()
+    return size
+
+
+class ModelMemory:
+    """Least recently used models kept in memory by content hash.
+
+    The models in memory are never put in the scene, loadModel returns copies
+    (the nodes are copied but the geometry is shared)
+    """
+
+    def __init__(self, limit: int = MEMORY_LIMIT) -> None:
+        """Setup the empty memory.
+
+        Args:
+            limit (int): The most bytes of model data to keep
+        Returns:
+            None
+        """
+        self.limit = limit
+        self.bytes = 0
+        self._models = OrderedDict()  # {hash: (model, bytes)} oldest first
+        self.hits = 0
+
+    def __len__(self) -> int:
+        """Return the number of models in memory.
+
+        Args:
+            None
+        Returns:
+            The number of models (int)
+        """
+        return len(self._models)
+
+    def get(self, key: str) -> Union[NodePath, None]:
+        """Return a copy of the model with the hash.
+
+        Args:
+            key (str): The content hash of the model
+        Returns:
+            A copy of the model, None if it is not in memory
+        """
+        entry = self._models.get(key)
+        if entry is None:
+            return None
+        self._models.move_to_end(key)  # most recently used
+        self.hits += 1
+        return entry[0].copyTo(NodePath())
+
+    def put(self, key: str, model: NodePath) -> None:
+        """Keep the model, forgetting the least recently used models over the limit.
+
+        Args:
+            key (str): The content hash of the model
+            model (NodePath): The model (a copy is kept)
+        Returns:
+            None
+        """
+        size = modelBytes(model)
+        if size > self.limit or key in self._models:
+            return
+        self._models[key] = (model.copyTo(NodePath()), size)
+        self.bytes += size
+        while self.bytes > self.limit:
+            # forget the least recently used model
+            self.bytes -= self._models.popitem(last=False)[1][1]
+
+    def clear(self) -> None:
+        """Forget every model.
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        self._models.clear()
+        self.bytes = 0
+
+
+# shared by every gamemode so a model loaded by one gamemode is reused by the others
+MEMORY = ModelMemory()
+
+
+def _loadFile(path: Path) -> NodePath:
+    """Load a model file without the Panda3D cache.
+
+    Args:
+        path (Path): The model file
+    Returns:
+        The model (NodePath)
+    """
+    options = LoaderOptions(LoaderOptions.LF_no_cache | LoaderOptions.LF_report_errors)
+    node = Loader.getGlobalPtr().loadSync(Filename.fromOsSpecific(str(path)), options)
+    if node is None:
+        raise IOError('Could not load the model {}'.format(path))
+    return NodePath(node)
+
+
+def loadModel(path: Union[str, Path]) -> NodePath:
+    """Load a model, converting it to a .bam file on first use.
+
+    The returned model is a new copy every time so it can be moved freely
+    (the geometry of a model kept in memory is shared between the copies)
+
+    Args:
+        path (str/Path): The model file (e.g. an .obj file in the assets folder)
+    Returns:
+        The model (NodePath)
+    """
+    path = Path(path).resolve()
+    if path.suffix.lower() not in CACHED_TYPES:
+        return _loadFile(path)
+    try:
+        key = contentHash(path)
+    except OSError as error:
+        warn('Could not hash the model {}: {}'.format(path, error), RuntimeWarning)
+        return _loadFile(path)
+    model = MEMORY.get(key)
+    if model is not None:
+        return model  # already loaded (by any gamemode), no disk reads
+    bam = cachePath(path)
+    if bam.exists():
+        try:
+            model = _loadFile(bam)
+            MEMORY.put(key, model)
+            return model
+        except IOError:
+            pass  # a broken .bam file (e.g. the game was closed while writing), convert again
+    model = _loadFile(path)
+    MEMORY.put(key, model)
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        tmp = bam.with_suffix('.tmp')
+        if not model.writeBamFile(Filename.fromOsSpecific(str(tmp))):
+            raise OSError('the .bam file could not be written')
+        tmp.replace(bam)  # another process never sees a half written file
+    except OSError as error:
+        # the game still works without the cache (e.g. a read only folder)
+        warn('Could not cache the model {}: {}'.format(path, error), RuntimeWarning)
+    return model
+
+
+def prewarm(folder: Path = GAMEMODES, verbose: bool = False) -> int:
+    """Convert every model in the folder so the first game starts fast.
+
+    Args:
+        folder (Path): The folder to search (including sub folders)
+        verbose (bool): Print each model
+    Returns:
+        The number of models (int)
+    """
+    models = sorted(path for suffix in CACHED_TYPES for path in folder.rglob('*'+suffix))
+    for path in models:
+        start = perf_counter()
+        loadModel(path)
+        if verbose:
+            print('{} ({:.0f}ms)'.format(path.relative_to(folder), (perf_counter()-start)*1000))
+    return len(models)
+
+
+def clear() -> int:
+    """Delete every cached model (on disk and in memory).
+
+    Args:
+        None
+    Returns:
+        The number of files deleted (int)
+    """
+    global _index
+    files = list(CACHE_DIR.glob('*.bam'))+list(CACHE_DIR.glob(INDEX_FILE))
+    for file in files:
+        file.unlink()
+    _index = None
+    MEMORY.clear()
+    return len(files)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert the gamemode models to .bam files.')
+    parser.add_argument('folder', nargs='?', type=Path, default=GAMEMODES,
+                        help='the folder of models (default the gamemodes folder)')
+    parser.add_argument('--clear', action='store_true', help='delete the cache first')
+    args = parser.parse_args()
+
+    if args.clear:
+        print('Deleted {} cached files'.format(clear()))
+    start = perf_counter()
+    count = prewarm(args.folder.resolve(), verbose=True)
+    print('Cached {} models in {} in {:.1f}s'.format(count, CACHE_DIR, perf_counter()-start))
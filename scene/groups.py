@@ -0,0 +1,243 @@
+"""
+Collision groups for the pits written in Python.
+
+This file gives every pit and store a collision group on:
+    - Giving pits that are close together different bits
+    - Reusing the same bit for pits that are far apart (their stones can never touch)
+    - Splitting the board into layers, each with its own traverser,
+      when a board needs more groups than there are bits
+
+A stone only collides with the pit it is in and the stones in that pit
+so collision tests stay per pit on any size of board
+
+Author: Ritesh Ravji
+"""
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because Panda3D is built on C so it uses camel case.
+
+try:
+    from panda3d.core import BitMask32, CollisionTraverser, GeomNode, NodePath
+    from panda3d.physics import PhysicsCollisionHandler
+except ImportError:
+    raise ImportError(
+        '''Please import the panda3d library to run this program
+You can do this using pip or https://docs.panda3d.org/1.10/python/introduction/index''')
+
+from engine.spec import BoardSpec
+
+# Bitmasks are like collision groups
+# if the 'from' and 'to' objects have at least one digit in common
+# a collision test is attempted, learn more here:
+# https://docs.panda3d.org/1.10/python/programming/collision-detection/collision-bitmasks
+
+# bit 20 is the default mask of visible models (e.g. the board model)
+# so it is never given to a pit
+RESERVED_BIT = GeomNode.getDefaultCollideMask().getLowestOnBit()
+# the clickables and the mouse ray have their own bit so a stone never tests a clickable
+CLICK_BIT = 31
+CLICK_MASK = BitMask32.bit(CLICK_BIT)
+GROUP_BITS = tuple(bit for bit in range(32) if bit not in (RESERVED_BIT, CLICK_BIT))
+# pits closer than this get different groups
+# (a pit collision model is about 4.4 wide so the stones of pits this far apart never touch)
+SEPARATION = 8
+
+
+def allocateGroups(points: list, separation: float = SEPARATION) -> list:
+    """Return a group for each point where close points never share a group.
+
+    Each point takes the lowest group not taken by a point closer than the separation
+    (greedy graph colouring), so groups are reused across the board
+
+    Args:
+        points (list): The x, y of each pit
+        separation (float): The distance under which points need different groups
+    Returns:
+        The group of each point, 0 upwards (list)
+    """
+    groups = []
+    for i, (x, y) in enumerate(points):
+        taken = {groups[j] for j, (otherX, otherY) in enumerate(points[:i])
+                 if (x-otherX)**2+(y-otherY)**2 < separation**2}
+        group = 0
+        while group in taken:
+            group += 1
+        groups.append(group)
+    return groups
+
+
+class CollisionGroups:
+    """The collide mask, scene root and traverser of every pit and store.
+
+    Most boards fit in one layer (the render and the app traverser)
+    larger boards get a root node and a traverser for each extra layer
+    """
+
+    def __init__(self, app: object, spec: BoardSpec, separation: float = SEPARATION) -> None:
+        """Allocate the groups of the board.
+
+        Args:
+            app (object): The Mancala.py main class responsible for the app and window
+            spec (BoardSpec): The gamemode spec
+            separation (float): The distance under which pits need different groups
+        Returns:
+            None
+        """
+        self._APP = app
+        slots = [(side, n) for side in range(2) for n in range(spec.side)]
+        groups = allocateGroups([spec.positions[side][n] for side, n in slots], separation)
+        self.groups = max(groups)+1
+        self.layers = (self.groups-1)//len(GROUP_BITS)+1
+        self._masks = {side: {} for side in range(2)}
+        self._layers = {side: {} for side in range(2)}
+        for (side, n), group in zip(slots, groups):
+            layer, bit = divmod(group, len(GROUP_BITS))
+            self._masks[side][n] = BitMask32.bit(GROUP_BITS[bit])
+            self._layers[side][n] = layer
+
+        if self.layers == 1:
+            self.roots = [app.render]
+            self.traversers = [app.cTrav]
+            self.pushers = [app.pusher]
+        else:
+            # the same bit means a different pit in each layer
+            # so each layer is only traversed by its own traverser
+            self.roots = []
+            for layer in range(self.layers):
+                root = app.render.attachNewNode('collision layer {}'.format(layer))
+                root.setTag('layer', str(layer))
+                self.roots.append(root)
+            self.traversers = [app.cTrav]+[CollisionTraverser('physics layer {}'.format(layer))
+                                           for layer in range(1, self.layers)]
+            # a handler keeps track of the collisions of one traversal, so one for each layer
+            self.pushers = [app.pusher]+[self._copyPusher(app.pusher)
+                                         for layer in range(1, self.layers)]
+        # step every layer with the physics (see scene/physics.py)
+        app.PHYSICS_LOOP.traversals = list(zip(self.traversers, self.roots))
+
+    @property
+    def allMask(self) -> BitMask32:
+        """Return a mask with every group bit (e.g. for the backup floor).
+
+        Args:
+            None
+        Returns:
+            The mask (BitMask32)
+        """
+        mask = BitMask32.allOff()
+        for bit in GROUP_BITS:
+            mask.setBit(bit)
+        return mask
+
+    def mask(self, side: int, n: int) -> BitMask32:
+        """Return the collide mask of the pit.
+
+        Args:
+            side (int): The side of the pit
+            n (int): The nth pit
+        Returns:
+            The mask (BitMask32)
+        """
+        return self._masks[side][n]
+
+    def root(self, side: int, n: int) -> NodePath:
+        """Return the node the collisions and stones of the pit go under.
+
+        Args:
+            side (int): The side of the pit
+            n (int): The nth pit
+        Returns:
+            The root (NodePath)
+        """
+        return self.roots[self._layers[side][n]]
+
+    def layerOf(self, nodePath: NodePath) -> int:
+        """Return the layer the node is in.
+
+        Args:
+            nodePath (NodePath): A node under one of the roots (e.g. a stone)
+        Returns:
+            The layer (int)
+        """
+        layer = nodePath.getNetTag('layer')
+        return int(layer) if layer else 0
+
+    def addStone(self, cnodePath: NodePath, thruster: NodePath) -> None:
+        """Add the collision sphere of a new stone to the physics of its layer.
+
+        Args:
+            cnodePath (NodePath): The collision node of the stone
+            thruster (NodePath): The node path moved by the physics system of the stone
+        Returns:
+            None
+        """
+        layer = self.layerOf(thruster)
+        # add to physics pusher which keeps it out of other objects
+        self.pushers[layer].addCollider(cnodePath, thruster)
+        self.addCollider(cnodePath)
+
+    def addCollider(self, cnodePath: NodePath) -> None:
+        """Start testing the stone for collisions.
+
+        Args:
+            cnodePath (NodePath): The collision node of the stone
+        Returns:
+            None
+        """
+        layer = self.layerOf(cnodePath)
+        self.traversers[layer].addCollider(cnodePath, self.pushers[layer])
+
+    def removeCollider(self, cnodePath: NodePath) -> None:
+        """Stop testing the stone for collisions (it can still be hit).
+
+        Args:
+            cnodePath (NodePath): The collision node of the stone
+        Returns:
+            None
+        """
+        self.traversers[self.layerOf(cnodePath)].removeCollider(cnodePath)
+
+    def moveStone(self, thruster: NodePath, side: int, n: int) -> None:
+        """Put a stone in the group of the pit.
+
+        Args:
+            thruster (NodePath): The node path moved by the physics system of the stone
+            side (int): The side of the pit
+            n (int): The nth pit
+        Returns:
+            None
+        """
+        cnodePath = thruster.find('cnode')
+        cn = cnodePath.node()  # collision node
+        cn.setFromCollideMask(self._masks[side][n])
+        cn.setIntoCollideMask(self._masks[side][n])
+        oldLayer = self.layerOf(thruster)
+        newLayer = self._layers[side][n]
+        if oldLayer == newLayer:
+            return
+        # a different layer, move the stone to its root and traverser
+        # only awake stones are in the traverser (see scene/sleeping.py)
+        awake = self.traversers[oldLayer].removeCollider(cnodePath)
+        self.pushers[oldLayer].removeCollider(cnodePath)
+        thruster.getParent().reparentTo(self.roots[newLayer])  # the roots are all at the origin
+        self.pushers[newLayer].addCollider(cnodePath, thruster)
+        if awake:
+            self.traversers[newLayer].addCollider(cnodePath, self.pushers[newLayer])
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _copyPusher(self, pusher: object) -> object:
+        """Return a new pusher with the same settings.
+
+        Args:
+            pusher (PhysicsCollisionHandler): The pusher of the app
+        Returns:
+            The new pusher (PhysicsCollisionHandler)
+        """
+        copy = PhysicsCollisionHandler()
+        copy.setDynamicFrictionCoef(pusher.getDynamicFrictionCoef())
+        copy.setStaticFrictionCoef(pusher.getStaticFrictionCoef())
+        for i in range(pusher.getNumInPatterns()):
+            copy.addInPattern(pusher.getInPattern(i))
+        return copy
@@ -0,0 +1,100 @@
+"""
+Fixed timestep physics written in Python.
+
+This file steps the physics and collisions on:
+    - A fixed rate (e.g. 60 steps a second) no matter the frame rate
+    - Saving up the frame time and running as many steps as it covers
+    - Capping the steps in one frame so a slow frame can't snowball
+    - How far the next step is (alpha) so the stones can be drawn in between steps
+
+Panda3D steps the physics by the frame time by default
+so the stones behaved differently on a fast computer and a slow one
+
+Author: Ritesh Ravji
+"""
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because Panda3D is built on C so it uses camel case.
+
+try:
+    from panda3d.core import ClockObject
+    from direct.task import Task
+except ImportError:
+    raise ImportError(
+        '''Please import the panda3d library to run this program
+You can do this using pip or https://docs.panda3d.org/1.10/python/introduction/index''')
+
+TASK_NAME = 'physicsLoop'
+# the physics steps a second
+DEFAULT_RATE = 60
+# the most steps in one frame, any more time is dropped
+# (the game slows down instead of freezing on a computer that can't keep up)
+MAX_STEPS = 4
+# the same sort as the collisionLoop task it replaces (after the app tasks, before drawing)
+TASK_SORT = 30
+
+
+class FixedTimestep:
+    """Steps the physics manager and the collision traverser at a fixed rate.
+
+    This replaces the physics in the 'manager-update' task and the 'collisionLoop' task
+    """
+
+    def __init__(self, app: object, rate: float = DEFAULT_RATE, maxSteps: int = MAX_STEPS) -> None:
+        """Take over the physics and start stepping.
+
+        Args:
+            app (object): The Mancala.py main class responsible for the app and window
+            rate (float): The physics steps a second
+            maxSteps (int): The most steps in one frame
+        Returns:
+            None
+        """
+        if rate <= 0:
+            raise ValueError('The physics rate must be more than 0')
+        self._APP = app
+        self.step = 1/rate  # seconds of each step
+        self.maxSteps = maxSteps
+        self.accumulator = 0.0  # seconds not yet stepped
+        # how far the time is between the last step and the next (0-1)
+        self.alpha = 0.0
+        self.steps = 0  # steps since the app started
+        self.dropped = 0.0  # seconds dropped because of slow frames
+        # (traverser, root) run after each step, a large board has one for each layer
+        # of collision groups (see scene/groups.py)
+        self.traversals = [(app.cTrav, app.render)]
+
+        # the physics manager still integrates, but only when it is stepped here
+        app.physicsMgrEnabled = 0
+        app.taskMgr.remove('collisionLoop')
+        app.taskMgr.add(self._stepTask, TASK_NAME, sort=TASK_SORT)
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _stepTask(self, task: object) -> int:
+        """Run the steps covered by the frame time.
+
+        Args:
+            task (object): The task passed through by Panda3D
+        Returns:
+            Task.cont (int): A constant used internally by Panda3D
+                to run the task again next frame (see Panda3D documentation for more)
+        """
+        APP = self._APP
+        self.accumulator += ClockObject.getGlobalClock().getDt()
+        steps = int(self.accumulator/self.step)
+        if steps > self.maxSteps:
+            # too far behind, drop the time rather than catching up
+            self.dropped += (steps-self.maxSteps)*self.step
+            self.accumulator -= (steps-self.maxSteps)*self.step
+            steps = self.maxSteps
+        for i in range(steps):
+            # the same order as Panda3D, move the stones then push them out of each other
+            APP.physicsMgr.doPhysics(self.step)
+            for traverser, root in self.traversals:
+                traverser.traverse(root)
+        self.accumulator -= steps*self.step
+        self.steps += steps
+        self.alpha = self.accumulator/self.step
+        return Task.cont
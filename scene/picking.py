@@ -0,0 +1,153 @@
+"""
+Screen space pit picking written in Python.
+
+This file finds the pit under the mouse on:
+    - Projecting the middle of every clickable onto the screen once
+      (again only when the camera, the lens or the board changes)
+    - Picking the nearest projected pit to the mouse (no collision ray)
+    - Highlighting the pit under the mouse every frame while the player picks a pit
+
+The clickables never move and the camera is still once the board is loaded
+so a click is a few sums for each pit instead of a collision traversal
+
+Author: Ritesh Ravji
+"""
+
+from typing import Union
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because Panda3D is built on C so it uses camel case.
+
+try:
+    from panda3d.core import NodePath, Point2, Point3, TransparencyAttrib
+    from direct.task import Task
+except ImportError:
+    raise ImportError(
+        '''Please import the panda3d library to run this program
+You can do this using pip or https://docs.panda3d.org/1.10/python/introduction/index''')
+
+TASK_NAME = 'hoverPits'
+# the radius of the clickable sphere model (models/misc/sphere) before it is scaled
+SPHERE_RADIUS = 1
+# the colour of the pit under the mouse (see through so the stones can still be seen)
+HIGHLIGHT_COLOUR = (1, 1, 1, 0.3)
+
+
+class ScreenPicker:
+    """Picks the clickable under the mouse from a table of projected pits.
+
+    The table is made the first time it is needed and again
+    whenever the camera, the lens (e.g. the window was resized) or the board changes
+    """
+
+    def __init__(self, app: object) -> None:
+        """Setup the picker and start the hover task.
+
+        Args:
+            app (object): The Mancala.py main class responsible for the app and window
+        Returns:
+            None
+        """
+        self._APP = app
+        # (clickable, screen x, screen y, squared screen radius) of every clickable
+        # the screen x is scaled by the aspect ratio so distances are the same both ways
+        self._table = []
+        self._key = None  # what the table was made from
+        self.projections = 0  # times the table was made (e.g. to check it is not every frame)
+        self.highlight = False  # highlight the pit under the mouse (set while the player picks)
+        self.hovered = None  # the clickable under the mouse
+        app.taskMgr.add(self._hoverTask, TASK_NAME)
+
+    def pick(self, x: float, y: float) -> Union[NodePath, None]:
+        """Return the clickable at a point on the screen.
+
+        Args:
+            x (float): The x of the point (-1 left to 1 right, e.g. the mouse)
+            y (float): The y of the point (-1 bottom to 1 top)
+        Returns:
+            The nearest clickable covering the point, None if there is none (NodePath)
+        """
+        x *= self._APP.camLens.getAspectRatio()  # the screen is wider than it is tall
+        picked = None
+        nearest = None
+        for clickable, pitX, pitY, radiusSquared in self._projected():
+            # compare squared distances (no square root)
+            distance = (x-pitX)**2+(y-pitY)**2
+            if distance <= radiusSquared and (nearest is None or distance < nearest):
+                picked = clickable
+                nearest = distance
+        return picked
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _projected(self) -> list:
+        """Return the table, making it again if the camera, lens or board has changed.
+
+        Args:
+            None
+        Returns:
+            The (clickable, screen x, screen y, squared screen radius) of every clickable (list)
+        """
+        APP = self._APP
+        root = getattr(APP, 'CLICKABLE_ROOT', None)
+        if root is None or root.isEmpty():
+            return []  # no board loaded
+        key = (root, APP.camera.getMat(APP.render), APP.camLens.getProjectionMat())
+        if key != self._key:
+            self._table = self._project(root)
+            self._key = key
+            self.projections += 1
+        return self._table
+
+    def _project(self, root: NodePath) -> list:
+        """Project every clickable onto the screen.
+
+        Args:
+            root (NodePath): The node the clickables are under
+        Returns:
+            The (clickable, screen x, screen y, squared screen radius) of every clickable (list)
+        """
+        APP = self._APP
+        lens = APP.camLens
+        aspect = lens.getAspectRatio()
+        table = []
+        for clickable in root.findAllMatches('**/=' + APP.CLICKABLE_TAG):
+            middle = APP.cam.getRelativePoint(clickable, Point3(0, 0, 0))
+            # a point on the edge of the sphere, side on to the camera
+            radius = clickable.getSx(APP.render)*SPHERE_RADIUS
+            edge = middle+Point3(radius, 0, 0)
+            middle2d = Point2()
+            edge2d = Point2()
+            if not lens.project(middle, middle2d) or not lens.project(edge, edge2d):
+                continue  # off the screen
+            table.append((clickable, middle2d.x*aspect, middle2d.y,
+                          ((edge2d.x-middle2d.x)*aspect)**2))
+        return table
+
+    def _hoverTask(self, task: object) -> int:
+        """Highlight the clickable under the mouse.
+
+        Args:
+            task (object): The task passed through by Panda3D
+        Returns:
+            Task.cont (int): A constant used internally by Panda3D
+                to run the task again next frame (see Panda3D documentation for more)
+        """
+        APP = self._APP
+        hovered = None
+        if self.highlight and APP.mouseWatcherNode.hasMouse():
+            mouse = APP.mouseWatcherNode.getMouse()
+            hovered = self.pick(mouse.getX(), mouse.getY())
+            if hovered is not None and not APP.isPickable(hovered):
+                hovered = None  # only the pits the player can pick are highlighted
+        if hovered is not self.hovered:
+            if self.hovered is not None and not self.hovered.isEmpty():
+                self.hovered.hide()  # the clickables are invisible
+            if hovered is not None:
+                hovered.setTransparency(TransparencyAttrib.MAlpha)
+                hovered.setDepthWrite(False)  # don't hide the stones in the pit
+                hovered.setColor(*HIGHLIGHT_COLOUR)
+                hovered.show()
+            self.hovered = hovered
+        return Task.cont
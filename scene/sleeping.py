@@ -0,0 +1,233 @@
+"""
+Physics sleeping for the stones written in Python.
+
+This file saves physics work on:
+    - Putting a stone to sleep once it has rested in a pit for a few physics steps
+      (taking it out of the physics manager and the collision traverser)
+    - Waking a stone when it is moved or another stone hits it
+    - Taking every stone out of the physics once the board is cleared
+
+A sleeping stone can still be hit (it is still in the scene) but it does not test
+for collisions or move, so the physics cost follows the moving stones
+
+Author: Ritesh Ravji
+"""
+
+from threading import Lock
+from typing import Iterable
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because Panda3D is built on C so it uses camel case.
+
+try:
+    from panda3d.core import NodePath, Vec3
+    from direct.showbase.DirectObject import DirectObject
+    from direct.task import Task
+except ImportError:
+    raise ImportError(
+        '''Please import the panda3d library to run this program
+You can do this using pip or https://docs.panda3d.org/1.10/python/introduction/index''')
+
+TASK_NAME = 'sleepStones'
+# the event thrown when a stone starts touching a stone (or the board)
+# %(stone)it is the number of the stone that was hit, nothing for the board
+HIT_PATTERN = 'stoneHit-%(stone)it'
+# a stone sleeps after staying this close to the same spot for this many physics steps
+# (the velocity of a resting stone jitters as it is pushed by its neighbours
+# so the distance it has moved is used instead)
+# steps are counted instead of frames as the physics runs at its own rate (see scene/physics.py)
+SLEEP_DISTANCE = 0.1
+SLEEP_STEPS = 30
+# only stones lower than this sleep, the stones float above the board
+# before the game starts (no gravity) and hover above the pits when moved
+SLEEP_HEIGHT = 2.5
+# a stone is only woken by a stone moving faster than this (units per second)
+# otherwise the resting stones next to it keep waking it up
+WAKE_SPEED = 1
+
+
+class StoneSleeper(DirectObject):
+    """Puts resting stones to sleep and wakes them up.
+
+    Stones are awake when added, the task checks the awake stones every frame
+    """
+
+    def __init__(self, app: object, groups: object) -> None:
+        """Setup the sleeper with no stones.
+
+        Args:
+            app (object): The Mancala.py main class responsible for the app and window
+            groups (CollisionGroups): The collision groups of the board (see scene/groups.py)
+        Returns:
+            None
+        """
+        DirectObject.__init__(self)
+        self._APP = app
+        self._GROUPS = groups
+        # (actor node, thruster, collision node path) of each stone by number
+        self._stones = []
+        # {number: [anchor position, physics steps near it]} of the awake stones
+        self._awake = {}
+        # stones to wake next frame (the physics can only be changed on the main thread)
+        self._toWake = set()
+        self._toWakeLock = Lock()
+        self.sleeping = 0  # the number of sleeping stones
+        self._lastSteps = app.PHYSICS_LOOP.steps  # the physics steps when the task last ran
+
+        for pusher in groups.pushers:
+            patterns = [pusher.getInPattern(i) for i in range(pusher.getNumInPatterns())]
+            if HIT_PATTERN not in patterns:
+                pusher.addInPattern(HIT_PATTERN)
+        # the task of the last board takes its stones out once the board is cleared
+        app.taskMgr.add(self._sleepTask, TASK_NAME)
+
+    def __len__(self) -> int:
+        """Return the number of awake stones.
+
+        Args:
+            None
+        Returns:
+            The number of awake stones (int)
+        """
+        return len(self._awake)
+
+    def add(self, stone: NodePath) -> None:
+        """Add an awake stone.
+
+        The stone must already be in the physics manager and the collision traverser
+
+        Args:
+            stone (NodePath): The stone represented by Panda3D as a node path
+        Returns:
+            None
+        """
+        thruster = stone.getParent()  # moved by the physics system
+        number = len(self._stones)
+        thruster.setTag('stone', str(number))  # so the hit event says which stone was hit
+        self._stones.append((thruster.node(), thruster, thruster.find('cnode')))
+        self._awake[number] = [thruster.getPos(), 0]
+
+    def wake(self, stones: Iterable[NodePath]) -> None:
+        """Wake the stones next frame.
+
+        This can be called from any thread (e.g. the game thread moving stones)
+
+        Args:
+            stones (Iterable[NodePath]): The stones to wake
+        Returns:
+            None
+        """
+        numbers = {int(stone.getNetTag('stone')) for stone in stones}
+        with self._toWakeLock:
+            self._toWake |= numbers
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _sleep(self, number: int) -> None:
+        """Take a stone out of the physics.
+
+        Args:
+            number (int): The number of the stone
+        Returns:
+            None
+        """
+        APP = self._APP
+        an, thruster, cnodePath = self._stones[number]
+        phyObj = an.getPhysicsObject()
+        phyObj.setVelocity(Vec3(0, 0, 0))
+        # the stone is not stepped while it sleeps so it is drawn where it is (see scene/stones.py)
+        phyObj.setLastPosition(phyObj.getPosition())
+        APP.physicsMgr.removePhysicalNode(an)
+        self._GROUPS.removeCollider(cnodePath)
+        del self._awake[number]
+        self.sleeping += 1
+        # wake up if a moving stone hits this stone
+        self.accept('stoneHit-{}'.format(number), self._onHit, [number])
+
+    def _wake(self, number: int) -> None:
+        """Put a sleeping stone back in the physics.
+
+        Args:
+            number (int): The number of the stone
+        Returns:
+            None
+        """
+        if number in self._awake:
+            self._awake[number][1] = 0  # already awake, start counting again
+            return
+        APP = self._APP
+        an, thruster, cnodePath = self._stones[number]
+        APP.physicsMgr.attachPhysicalNode(an)
+        self._GROUPS.addCollider(cnodePath)
+        self._awake[number] = [thruster.getPos(), 0]
+        self.sleeping -= 1
+        self.ignore('stoneHit-{}'.format(number))
+
+    def _onHit(self, number: int, entry: object) -> None:
+        """Wake a sleeping stone that was hit by a moving stone.
+
+        Args:
+            number (int): The number of the stone
+            entry (object): The collision entry passed through by the event
+        Returns:
+            None
+        """
+        an = entry.getFromNodePath().getParent().node()  # the actor node of the other stone
+        if an.getPhysicsObject().getVelocity().length() > WAKE_SPEED:
+            self._wake(number)
+
+    def _clear(self) -> None:
+        """Take every stone out of the physics.
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        APP = self._APP
+        for number in list(self._awake):
+            an, thruster, cnodePath = self._stones[number]
+            APP.physicsMgr.removePhysicalNode(an)
+            self._GROUPS.removeCollider(cnodePath)
+        self._awake.clear()
+        self.ignoreAll()
+
+    def _sleepTask(self, task: object) -> int:
+        """Wake the stones waiting to wake and put the resting stones to sleep.
+
+        Args:
+            task (object): The task passed through by Panda3D
+        Returns:
+            Task.cont to run again next frame, Task.done once the board is cleared (int)
+        """
+        if self._stones and self._stones[0][1].getTop() != self._APP.render:
+            # the scene was cleared (e.g. reset or a new gamemode)
+            self._clear()
+            return Task.done
+        if self._toWake:
+            with self._toWakeLock:
+                toWake, self._toWake = self._toWake, set()
+            for number in toWake:
+                self._wake(number)
+
+        # a fast computer steps the physics less than once a frame, a slow one more
+        totalSteps = self._APP.PHYSICS_LOOP.steps
+        steps = totalSteps-self._lastSteps
+        self._lastSteps = totalSteps
+        if not steps:
+            return Task.cont  # nothing has moved
+
+        resting = []
+        for number, awake in self._awake.items():
+            pos = self._stones[number][1].getPos()
+            if pos.z < SLEEP_HEIGHT and (pos-awake[0]).length() <= SLEEP_DISTANCE:
+                awake[1] += steps
+                if awake[1] >= SLEEP_STEPS:
+                    resting.append(number)
+            else:
+                awake[0] = pos  # moved, start counting from here
+                awake[1] = 0
+        for number in resting:
+            self._sleep(number)
+        return Task.cont
@@ -0,0 +1,270 @@
+"""
+Batched stone steering written in Python.
+
+This file moves the picked up stones towards a point on:
+    - One task that steers every moving stone (instead of a task for each stone)
+    - Working out the velocity of every stone in one pass (with NumPy for a lot of stones)
+    - Signalling when a group of stones has arrived (close to its point and settled)
+      so a move waits for the stones instead of a fixed time
+    - Timing each frame so the cost of steering can be checked (and seen in PStats)
+
+The task and the velocity maths used to run once per stone per frame
+so a congklak capture of 30+ stones was 30+ tasks every frame
+
+Author: Ritesh Ravji
+"""
+
+from time import perf_counter
+from threading import Event, Lock
+from typing import Iterable, Union
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because Panda3D is built on C so it uses camel case.
+
+try:
+    from panda3d.core import ClockObject, NodePath, PStatCollector, Vec3
+    from direct.task import Task
+except ImportError:
+    raise ImportError(
+        '''Please import the panda3d library to run this program
+You can do this using pip or https://docs.panda3d.org/1.10/python/introduction/index''')
+
+try:
+    # NumPy works out every velocity at once
+    import numpy as np
+except ImportError:
+    np = None  # NumPy is optional, the velocities are worked out one by one without it
+
+TASK_NAME = 'steerStones'
+MAX_SPEED = 10  # the max speed possible when moving a stone (at speed 1)
+# how close the middle of a group of stones must be to its point to have arrived
+# (the stones in a group collide so they can't all be on the point)
+ARRIVAL_DISTANCE = 0.5
+# the stones have settled once the middle of the group is slower than this (units per second)
+SETTLED_SPEED = 1
+# the fewest stones worth steering with NumPy (getting the positions in and out of
+# Panda3D costs about the same either way, so NumPy only wins on a lot of stones)
+MIN_VECTORISED_STONES = 128
+# how much the cost of a frame counts towards the average cost
+AVERAGE_WEIGHT = 0.05
+# the steering time shows up under 'App' in PStats
+COLLECTOR = PStatCollector('App:Steer stones')
+
+
+class StoneSteering:
+    """Steers groups of stones towards their points in one task.
+
+    Stones are added with steer and let go with release,
+    the stones are steered in the background so it is non-blocking
+    steer and watch return an event which is set once the stones have arrived
+    """
+
+    def __init__(self, app: object, speed: float = 1,
+                 vectorised: Union[bool, None] = None) -> None:
+        """Setup the steering with no stones.
+
+        Args:
+            app (object): The Mancala.py main class responsible for the app and window
+            speed (float): How fast the stones move (2 is twice as fast)
+            vectorised (bool/None): Use NumPy for a lot of stones, None to use it if it is installed
+        Returns:
+            None
+        """
+        self._APP = app
+        self.maxSpeed = MAX_SPEED*speed
+        self.vectorised = np is not None if vectorised is None else vectorised
+        if self.vectorised and np is None:
+            raise ImportError('''Please import the numpy library to vectorise the steering
+You can do this using pip (pip install numpy)''')
+        # (physics objects, thrusters, targets, target array) of every steered stone
+        # the whole tuple is replaced so the task never sees half an update
+        # (stones are steered from the game thread and moved by the task on the main thread)
+        self._steered = ((), (), (), None)
+        # (thrusters, point, distance, event, last middle) of every group waiting to arrive
+        # groups are added by the game thread and removed by the task so they are locked
+        self._arrivals = []
+        self._arrivalsLock = Lock()
+        self._task = None
+        app.taskMgr.remove(TASK_NAME)  # the stones of the last board
+        self.frameCost = 0.0  # seconds the last frame of steering took
+        self.averageCost = 0.0  # moving average of frameCost
+        self.frames = 0  # frames steered since the board was loaded
+
+    def __len__(self) -> int:
+        """Return the number of stones being steered.
+
+        Args:
+            None
+        Returns:
+            The number of stones (int)
+        """
+        return len(self._steered[0])
+
+    def steer(self, stones: Iterable[NodePath], goTo: Vec3) -> Event:
+        """Start moving the stones to the position.
+
+        Args:
+            stones (Iterable[NodePath]): The stones to move
+            goTo (Vec3): A Panda3D class containing x, y, z coords to move to
+        Returns:
+            The event set once the stones have arrived (Event)
+        """
+        physicsObjects, thrusters, targets, targetArray = self._steered
+        newThrusters = [stone.getParent() for stone in stones]  # moved by the physics system
+        arrival = self._watchThrusters(newThrusters, goTo, ARRIVAL_DISTANCE)
+        if not newThrusters:
+            return arrival
+        physicsObjects = physicsObjects+tuple(
+            thruster.node().getPhysicsObject() for thruster in newThrusters)
+        thrusters = thrusters+tuple(newThrusters)
+        targets = targets+(Vec3(goTo),)*len(newThrusters)
+        if self.vectorised and len(targets) >= MIN_VECTORISED_STONES:
+            targetArray = np.array([(target.x, target.y, target.z) for target in targets],
+                                   dtype=np.float64)
+        self._steered = (physicsObjects, thrusters, targets, targetArray)
+        return arrival
+
+    def watch(self, stones: Iterable[NodePath], point: Vec3, distance: float) -> Event:
+        """Wait for stones to settle near a point without steering them.
+
+        e.g. a dropped stone landing in its pit
+
+        Args:
+            stones (Iterable[NodePath]): The stones to watch
+            point (Vec3): A Panda3D class containing x, y, z coords to arrive at
+            distance (float): How close the middle of the stones must be to the point
+        Returns:
+            The event set once the stones have arrived (Event)
+        """
+        return self._watchThrusters([stone.getParent() for stone in stones], point, distance)
+
+    def release(self) -> None:
+        """Release all the stones.
+
+        Stones will no longer be moved in the background
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        self._steered = ((), (), (), None)
+        with self._arrivalsLock:
+            self._arrivals = []
+        if self._task is not None:
+            self._task.remove()
+            self._task = None
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _watchThrusters(self, thrusters: list, point: Vec3, distance: float) -> Event:
+        """Add a group of stones waiting to arrive and make sure the task is running.
+
+        Args:
+            thrusters (list): The node path moved by the physics system of each stone
+            point (Vec3): A Panda3D class containing x, y, z coords to arrive at
+            distance (float): How close the middle of the stones must be to the point
+        Returns:
+            The event set once the stones have arrived (Event)
+        """
+        arrival = Event()
+        if not thrusters:
+            arrival.set()  # no stones to wait for
+            return arrival
+        with self._arrivalsLock:
+            self._arrivals.append((tuple(thrusters), Vec3(point), distance, arrival, None))
+        if self._task is None or not self._task.isAlive():
+            self._task = self._APP.taskMgr.add(self._steerTask, TASK_NAME)
+        return arrival
+
+    def _steerTask(self, task: object) -> int:
+        """Set the velocity of every steered stone and signal the arrived groups.
+
+        Args:
+            task (object): The task passed through by Panda3D
+        Returns:
+            Task.cont (int): A constant used internally by Panda3D
+                to run the task again next frame (see Panda3D documentation for more)
+        """
+        physicsObjects, thrusters, targets, targetArray = self._steered
+        if not physicsObjects and not self._arrivals:
+            return Task.cont  # released while the task was waiting to run
+        COLLECTOR.start()
+        start = perf_counter()
+        if targetArray is not None:
+            self._steerArrays(physicsObjects, thrusters, targetArray)
+        elif physicsObjects:
+            self._steerEach(physicsObjects, thrusters, targets)
+        if self._arrivals:
+            self._checkArrivals(ClockObject.getGlobalClock().getDt())
+        self.frameCost = perf_counter()-start
+        COLLECTOR.stop()
+        self.frames += 1
+        self.averageCost += (self.frameCost-self.averageCost)*AVERAGE_WEIGHT
+        return Task.cont
+
+    def _steerArrays(self, physicsObjects: tuple, thrusters: tuple, targets: object) -> None:
+        """Work out every velocity at once with NumPy.
+
+        Args:
+            physicsObjects (tuple): The physics object of each stone
+            thrusters (tuple): The node path moved by the physics system of each stone
+            targets (np.ndarray): The position to move to of each stone (n, 3)
+        Returns:
+            None
+        """
+        # a list of tuples is much faster to convert than a list of Panda3D vectors
+        positions = np.array([(pos.x, pos.y, pos.z) for pos in
+                              [thruster.getPos() for thruster in thrusters]], dtype=np.float64)
+        moveVecs = targets-positions  # direction*size from each stone to its target
+        moveDists = np.sqrt(np.einsum('ij,ij->i', moveVecs, moveVecs))  # sizes
+        # sigmoid function, to calculate the speed of each stone
+        ratios = 2/(1+np.power(2.7, -moveDists))-1
+        # a stone already at its target has no direction (and no speed)
+        speeds = np.divide(self.maxSpeed*ratios, moveDists,
+                           out=np.zeros_like(moveDists), where=moveDists > 0)
+        velocities = (moveVecs*speeds[:, None]).tolist()
+        for phyObj, velocity in zip(physicsObjects, velocities):
+            phyObj.setVelocity(*velocity)
+
+    def _steerEach(self, physicsObjects: tuple, thrusters: tuple, targets: tuple) -> None:
+        """Work out the velocities one by one (without NumPy).
+
+        Args:
+            physicsObjects (tuple): The physics object of each stone
+            thrusters (tuple): The node path moved by the physics system of each stone
+            targets (tuple): The position to move to of each stone
+        Returns:
+            None
+        """
+        for phyObj, thruster, goTo in zip(physicsObjects, thrusters, targets):
+            moveVec = goTo-thruster.getPos()  # direction*size from current stone position to go_to
+            moveDist = moveVec.length()  # size
+            ratio = (2/(1+pow(2.7, -moveDist))-1)  # sigmoid function, to calculate the speed
+            phyObj.setVelocity(moveVec.normalized()*self.maxSpeed*ratio)
+
+    def _checkArrivals(self, dt: float) -> None:
+        """Set the event of every group that is close to its point and has settled.
+
+        The stones in a group keep pushing each other around a little
+        so it is the middle of the group that has to settle
+
+        Args:
+            dt (float): The seconds since the last frame
+        Returns:
+            None
+        """
+        with self._arrivalsLock:
+            waiting = []
+            for thrusters, point, distance, arrival, lastMiddle in self._arrivals:
+                middle = sum((thruster.getPos() for thruster in thrusters), Vec3(0, 0, 0))
+                middle /= len(thrusters)
+                # the first frame has nothing to compare with so the stones are not settled
+                settled = (lastMiddle is not None and dt > 0
+                           and (middle-lastMiddle).length() <= SETTLED_SPEED*dt)
+                if settled and (middle-point).length() <= distance:
+                    arrival.set()  # the stones have arrived, stop checking
+                else:
+                    waiting.append((thrusters, point, distance, arrival, middle))
+            self._arrivals = waiting
@@ -0,0 +1,275 @@
+"""
+Instanced stone rendering written in Python.
+
+This file draws every stone on the board on:
+    - One sphere drawn with hardware instancing (one draw call for up to 64 stones)
+    - A shader that places and colours each instance from arrays
+    - Copying the physics positions into the arrays every frame
+    - Drawing the stones in between the last two physics steps (see scene/physics.py)
+    - Falling back to one sphere model per stone when the graphics card can't instance
+      (or can't compile the shader)
+
+The stones still have their own physics node and collision sphere,
+only the visible spheres are replaced
+
+Author: Ritesh Ravji
+"""
+
+from typing import Union
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because Panda3D is built on C so it uses camel case.
+
+try:
+    from panda3d.core import *
+    from direct.task import Task
+except ImportError:
+    raise ImportError(
+        '''Please import the panda3d library to run this program
+You can do this using pip or https://docs.panda3d.org/1.10/python/introduction/index''')
+
+# the most stones in one draw call (each stone is two vec4 uniforms)
+# OpenGL 3.1 only promises 1024 vertex uniform components (256 vec4s)
+# so the two arrays (512 components) leave room for the matrix and the driver
+BATCH_SIZE = 64
+TASK_NAME = 'stoneInstances'
+# after the physics is stepped (sort 30) and before the frame is drawn (sort 50)
+TASK_SORT = 40
+# the shader needs GLSL 1.40 for gl_InstanceID
+SHADER_VERSION = (1, 40)
+
+VERTEX_SHADER = '''#version 140
+uniform mat4 p3d_ModelViewProjectionMatrix;
+uniform vec4 stonePositions[{size}];  // x, y, z and the radius of each stone
+uniform vec4 stoneColours[{size}];
+in vec4 p3d_Vertex;
+out vec4 colour;
+
+void main() {{
+    vec4 stone = stonePositions[gl_InstanceID];
+    gl_Position = p3d_ModelViewProjectionMatrix*vec4(p3d_Vertex.xyz*stone.w+stone.xyz, 1);
+    colour = stoneColours[gl_InstanceID];
+}}
+'''.format(size=BATCH_SIZE)
+
+# the sphere model has no normals so the stones are a flat colour (the same as without instancing)
+FRAGMENT_SHADER = '''#version 140
+in vec4 colour;
+out vec4 p3d_FragColor;
+
+void main() {
+    p3d_FragColor = vec4(colour.rgb, 1);
+}
+'''
+
+
+def supportsInstancing(app: object) -> bool:
+    """Return if the graphics card can draw the instanced stones.
+
+    Args:
+        app (object): The Mancala.py main class responsible for the app and window
+    Returns:
+        If instancing and GLSL 1.40 shaders are supported (bool)
+    """
+    gsg = app.win.getGsg() if app.win else None
+    if gsg is None:
+        return False
+    version = (gsg.getDriverShaderVersionMajor(), gsg.getDriverShaderVersionMinor())
+    return (gsg.getSupportsGeometryInstancing() and gsg.getSupportsGlsl()
+            and version >= SHADER_VERSION)
+
+
+class StoneRenderer:
+    """Draws the stones of a board.
+
+    Stones are added while the board loads then start creates the instanced batches
+    """
+
+    def __init__(self, app: object, scale: float, instanced: Union[bool, None] = None) -> None:
+        """Setup the renderer.
+
+        Args:
+            app (object): The Mancala.py main class responsible for the app and window
+            scale (float): The radius of each stone
+            instanced (bool/None): Use instancing, None to use it if it is supported
+        Returns:
+            None
+        """
+        self._APP = app
+        self.scale = scale
+        self.instanced = supportsInstancing(app) if instanced is None else instanced
+        self._stones = []  # the stone nodes moved by the physics system
+        self._physicsObjects = []  # the physics object moving each stone
+        self._colours = []
+        self._batches = []  # (sphere, positions) for each draw call
+        self._root = None  # holds the instanced spheres (empty without instancing)
+
+    def __len__(self) -> int:
+        """Return the number of stones.
+
+        Args:
+            None
+        Returns:
+            The number of stones (int)
+        """
+        return len(self._stones)
+
+    @property
+    def drawCalls(self) -> int:
+        """Return the draw calls used to draw the stones.
+
+        Args:
+            None
+        Returns:
+            The number of draw calls (int)
+        """
+        return len(self._batches) if self.instanced else len(self._stones)
+
+    def add(self, parent: NodePath, colour: tuple) -> NodePath:
+        """Add a stone to the physics node.
+
+        Args:
+            parent (NodePath): The physics node path that moves the stone
+            colour (tuple): The colour of the stone
+        Returns:
+            The stone (NodePath)
+        """
+        scale = self.scale
+        if self.instanced:
+            # an empty node that follows the physics, drawn by the batch
+            stone = parent.attachNewNode('stone')
+        else:
+            stone = self._sphere(colour)
+            stone.reparentTo(parent)
+        stone.setScale(scale, scale, scale)
+        self._stones.append(stone)
+        self._physicsObjects.append(parent.node().getPhysicsObject())
+        self._colours.append(colour)
+        return stone
+
+    def start(self) -> None:
+        """Create the instanced batches and start updating the positions every frame.
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        APP = self._APP
+        for phyObj in self._physicsObjects:
+            # the stones were placed after they were added, don't draw them coming from 0, 0, 0
+            phyObj.setLastPosition(phyObj.getPosition())
+        APP.taskMgr.remove(TASK_NAME)  # the stones of the last board
+        self._root = APP.render.attachNewNode('stones')
+        if self.instanced:
+            shader = Shader.make(Shader.SL_GLSL, VERTEX_SHADER, FRAGMENT_SHADER)
+            if not self._compiles(shader):
+                # e.g. the driver has fewer uniforms than the arrays need
+                # so draw a sphere in each stone instead
+                self.instanced = False
+                for stone, colour in zip(self._stones, self._colours):
+                    self._sphere(colour).reparentTo(stone)
+        if not self.instanced:
+            # the spheres are already in the scene, they only need to be moved in between steps
+            # (the empty root tells the task when the board is cleared)
+            APP.taskMgr.add(self._updateTask, TASK_NAME, sort=TASK_SORT)
+            return
+        # the batches are moved in the shader so the node is never culled
+        self._root.node().setBounds(OmniBoundingVolume())
+        self._root.node().setFinal(True)
+        self._root.setCollideMask(BitMask32.allOff())  # the mouse should not pick the sphere
+        sphere = APP.loader.loadModel('models/misc/sphere')
+        sphere.flattenStrong()  # the vertices are used as they are by the shader
+        for first in range(0, len(self._stones), BATCH_SIZE):
+            colours = self._colours[first:first+BATCH_SIZE]
+            positions = PTA_LVecBase4f.emptyArray(BATCH_SIZE)
+            colourArray = PTA_LVecBase4f.emptyArray(BATCH_SIZE)
+            for i, colour in enumerate(colours):
+                colourArray[i] = LVecBase4f(*colour)
+            batch = sphere.copyTo(self._root)
+            batch.setShader(shader)
+            batch.setShaderInput('stonePositions', positions)
+            batch.setShaderInput('stoneColours', colourArray)
+            batch.setInstanceCount(len(colours))
+            batch.setCollideMask(BitMask32.allOff())
+            self._batches.append((batch, positions))
+        self._updatePositions()
+        APP.taskMgr.add(self._updateTask, TASK_NAME, sort=TASK_SORT)
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _sphere(self, colour: tuple) -> NodePath:
+        """Load a sphere model for a stone that is not instanced.
+
+        Args:
+            colour (tuple): The colour of the stone
+        Returns:
+            The sphere (NodePath)
+        """
+        sphere = self._APP.loader.loadModel('models/misc/sphere')
+        # priority 1 so the colour is not overridden by the grey colour in the model
+        sphere.setColor(colour, 1)
+        return sphere
+
+    def _compiles(self, shader: Shader) -> bool:
+        """Return if the graphics card can compile the shader.
+
+        The shader is compiled now instead of when the first frame is drawn
+        so the stones can still be drawn without it
+
+        Args:
+            shader (Shader): The instancing shader
+        Returns:
+            If the shader compiled (bool)
+        """
+        gsg = self._APP.win.getGsg() if self._APP.win else None
+        if shader is None or gsg is None:
+            return False
+        # the context is None (and the error flag is set) if the driver rejects the shader
+        context = shader.prepareNow(gsg.getPreparedObjects(), gsg)
+        return context is not None and not shader.getErrorFlag()
+
+    def _updatePositions(self) -> None:
+        """Copy the position of every stone into the shader arrays.
+
+        The stones are drawn in between the last two physics steps
+        so they move smoothly when the physics rate is lower than the frame rate
+
+        Args:
+            None
+        Returns:
+            None
+        """
+        render = self._APP.render
+        stones = self._stones
+        physicsObjects = self._physicsObjects
+        # how far back from the last step to draw (0 at the last step, 1 at the one before)
+        back = 1-self._APP.PHYSICS_LOOP.alpha
+        if not self.instanced:
+            for stone, phyObj in zip(stones, physicsObjects):
+                # move the sphere back from its physics node
+                stone.setPos((phyObj.getLastPosition()-phyObj.getPosition())*back)
+            return
+        scale = self.scale
+        for batchN, (batch, positions) in enumerate(self._batches):
+            first = batchN*BATCH_SIZE
+            for i in range(min(BATCH_SIZE, len(stones)-first)):
+                phyObj = physicsObjects[first+i]
+                x, y, z = (stones[first+i].getPos(render)
+                           + (phyObj.getLastPosition()-phyObj.getPosition())*back)
+                positions[i] = LVecBase4f(x, y, z, scale)
+
+    def _updateTask(self, task: object) -> int:
+        """Update the positions every frame until the board is cleared.
+
+        Args:
+            task (object): The task passed through by Panda3D
+        Returns:
+            Task.cont to run again next frame, Task.done once the board is cleared (int)
+        """
+        if not self._root.hasParent():
+            # the scene was cleared (e.g. reset or a new gamemode)
+            return Task.done
+        self._updatePositions()
+        return Task.cont
@@ -0,0 +1,124 @@
+"""
+Batched board tests written in Python.
+
+This file checks the NumPy boards (see engine/batch.py) on:
+    - Sowing, extra turns and the end of the game matching the classic engine row by row
+    - Relays, captures and cut off turns matching the congklak engine row by row
+    - Boards that are complete (or skipped) staying the same
+
+Run with "python3 -m unittest" (or pytest) from the Mancala folder
+
+Author: Ritesh Ravji
+"""
+
+import unittest
+from random import Random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # NumPy is optional, the batched boards are not tested without it
+
+from engine.classic import ClassicBoard, SIDE, PITS
+from engine.congklak import CongklakBoard
+
+if np is not None:
+    from engine.batch import ClassicBatch, CongklakBatch, NO_WINNER, TIE
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+SEED = 11
+BOARDS = 2000  # boards in each batch
+ROUNDS = 5  # batches of random boards for each test
+MAX_STONES = 30  # the most stones in a pit of a random board
+
+
+def _randomBoard(boardClass: type, rng: Random) -> ClassicBoard:
+    """Return a random board part way through a game.
+
+    Half the boards are from random games, half have random stones in every slot
+
+    Args:
+        boardClass (type): The engine board of the gamemode
+        rng (Random): The random boards
+    Returns:
+        The board (ClassicBoard)
+    """
+    if rng.random() < 0.5:
+        board = boardClass(rng.randint(1, 20))
+        for move in range(rng.randint(0, 60)):
+            if board.isGameComplete():
+                break
+            board.applyMove(rng.choice(board.legalMoves()))
+        return board
+    board = boardClass()
+    board.pits = [rng.randint(0, MAX_STONES) for slot in board.pits]
+    board._turn = rng.randint(0, 1)
+    for side in (0, 1):
+        # both sides need stones or the game would already be over
+        if not any(board.pits[side*SIDE:side*SIDE+PITS]):
+            board.pits[side*SIDE+rng.randrange(PITS)] = 1
+    return board
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class TestBatch(unittest.TestCase):
+    """Every row of a batch moves the same as its engine board."""
+
+    def test_classicRows(self) -> None:
+        """Random classic boards and pits."""
+        self._checkRows(ClassicBoard, ClassicBatch)
+
+    def test_congklakRows(self) -> None:
+        """Random congklak boards and pits."""
+        self._checkRows(CongklakBoard, CongklakBatch)
+
+    def test_congklakCappedRows(self) -> None:
+        """Random congklak boards with turns cut off after a few relays."""
+        self._checkRows(CongklakBoard, CongklakBatch, maxLaps=3)
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _checkRows(self, boardClass: type, batchClass: type, maxLaps: int = None) -> None:
+        """Play a random move on random boards in a batch and one by one.
+
+        Args:
+            boardClass (type): The engine board of the gamemode
+            batchClass (type): The batch of the gamemode
+            maxLaps (int): The most relays in one turn (None for the default)
+        Returns:
+            None
+        """
+        rng = Random(SEED)
+        for batchRound in range(ROUNDS):
+            boards = [_randomBoard(boardClass, rng) for board in range(BOARDS)]
+            if maxLaps is not None:
+                for board in boards:
+                    board.maxLaps = maxLaps
+            batch = batchClass.fromBoards(boards)
+            if maxLaps is not None:
+                batch.maxLaps = maxLaps
+            # a random legal move, some boards are skipped (-1)
+            moves = [rng.choice(board.legalMoves()) if board.legalMoves() and rng.random() < 0.9
+                     else -1 for board in boards]
+            last = batch.applyMoves(np.array(moves))
+
+            for row, (board, move) in enumerate(zip(boards, moves)):
+                expected = -1
+                if move >= 0:
+                    expected = board.applyMove(move)
+                self.assertEqual(last[row], expected)
+                self.assertEqual(batch.pits[row].tolist(), board.pits)
+                self.assertEqual(batch.turn[row], board.turn)
+                self.assertEqual(batch.complete[row], board.isGameComplete())
+                winner = (NO_WINNER if board.winner is None else
+                          TIE if board.winner == "TIE" else board.winner)
+                self.assertEqual(batch.winner[row], winner)
+                if move >= 0 and hasattr(board, 'relayCapped'):
+                    self.assertEqual(batch.relayCapped[row], board.relayCapped)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Endgame database tests written in Python.
+
+This file checks the classic endgame database (see engine/endgame.py) on:
+    - Ranking and unranking the pit counts in both directions
+    - Looking up the final score of random boards against a brute force negamax
+
+Run with "python3 -m unittest" (or pytest) from the Mancala folder
+
+Author: Ritesh Ravji
+"""
+
+import unittest
+import tempfile
+from pathlib import Path
+from random import Random
+
+from engine.classic import ClassicBoard, SIDE, PITS
+from engine.endgame import Ranking, EndgameDB, build, save, BOARD_PITS
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+SEED = 8
+MAX_STONES = 6  # small enough to build in about a second
+PROBES = 2000  # random boards looked up
+
+
+def _negamax(board: ClassicBoard, memo: dict) -> int:
+    """Return the final score of the board for the player to move, searching every move.
+
+    Args:
+        board (ClassicBoard): The engine board, it is not changed
+        memo (dict): The scores of the boards already searched
+    Returns:
+        The players final store minus the opponents final store (int)
+    """
+    me = board.turn
+    if board.isGameComplete():
+        return board.score(me)
+    key = (tuple(board.pits), me)
+    if key not in memo:
+        best = None
+        for n in board.legalMoves():
+            child = board.copy()
+            child.applyMove(n)
+            value = _negamax(child, memo)
+            if child.turn != me:
+                value = -value
+            if best is None or value > best:
+                best = value
+        memo[key] = best
+    return memo[key]
+
+
+def _randomCounts(rng: Random, stones: int) -> list:
+    """Return the given stones dropped in random pits.
+
+    Args:
+        rng (Random): The random pits
+        stones (int): The stones to drop
+    Returns:
+        The stones in the 12 pits (list)
+    """
+    counts = [0]*BOARD_PITS
+    for stone in range(stones):
+        counts[rng.randrange(BOARD_PITS)] += 1
+    return counts
+
+
+class TestRanking(unittest.TestCase):
+    """Every board has its own rank and the rank gives the board back."""
+
+    def test_everyRank(self) -> None:
+        """Unrank then rank every board with a few stones."""
+        ranking = Ranking(4)
+        seen = set()
+        for r in range(ranking.count(4)):
+            counts = ranking.unrank(r)
+            self.assertEqual(len(counts), BOARD_PITS)
+            self.assertTrue(all(count >= 0 for count in counts))
+            self.assertLessEqual(sum(counts), 4)
+            self.assertEqual(ranking.rank(counts), r)
+            seen.add(tuple(counts))
+        self.assertEqual(len(seen), ranking.count(4))
+
+    def test_randomBoards(self) -> None:
+        """Rank then unrank random boards with up to the default stones."""
+        rng = Random(SEED)
+        ranking = Ranking(12)
+        for board in range(PROBES):
+            counts = _randomCounts(rng, rng.randint(0, 12))
+            r = ranking.rank(counts)
+            self.assertLess(r, ranking.count(12))
+            # boards with fewer stones come first
+            self.assertGreaterEqual(r, ranking.count(sum(counts)-1) if sum(counts) else 0)
+            self.assertEqual(ranking.unrank(r), counts)
+
+
+class TestEndgameDB(unittest.TestCase):
+    """The database gives the same final scores as searching to the end."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Build a small database in a temporary folder."""
+        cls._folder = tempfile.TemporaryDirectory()
+        path = Path(cls._folder.name)/'endgame.db'
+        save(build(MAX_STONES), MAX_STONES, path)
+        cls.db = EndgameDB(path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Close the database and delete the folder."""
+        cls.db.close()
+        cls._folder.cleanup()
+
+    def test_probeMatchesNegamax(self) -> None:
+        """Random boards (either player to move, any stores) against the search."""
+        rng = Random(SEED)
+        memo = {}
+        for probe in range(PROBES):
+            counts = _randomCounts(rng, rng.randint(1, MAX_STONES))
+            board = ClassicBoard(0)
+            board.pits = counts[:PITS]+[rng.randint(0, 20)]+counts[PITS:]+[rng.randint(0, 20)]
+            board._turn = rng.randint(0, 1)
+            if not any(counts[:PITS]) or not any(counts[PITS:]):
+                # one side is empty so it would already be over
+                continue
+            self.assertEqual(self.db.probe(board), _negamax(board, memo), board.pits)
+
+    def test_tooManyStones(self) -> None:
+        """Boards with more stones than the database are not looked up."""
+        board = ClassicBoard(1)
+        self.assertIsNone(self.db.probe(board))  # 12 stones in the pits
+        board.pits = [1]*MAX_STONES+[0]*(SIDE*2-MAX_STONES)  # every stone on side 0
+        board.pits[SIDE] = 1  # one stone too many
+        self.assertIsNone(self.db.probe(board))
+        board.pits[0] = 0
+        self.assertIsNotNone(self.db.probe(board))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Sowing tests written in Python.
+
+This file checks the lap at once sowing (see sow in engine/classic.py) on:
+    - Comparing sow with dropping the stones one slot at a time
+    - Playing random classic games against a one stone at a time reference
+    - Playing random congklak and omweso games against the step by step traceMove
+
+Run with "python3 -m unittest" (or pytest) from the Mancala folder
+
+Author: Ritesh Ravji
+"""
+
+import unittest
+from random import Random
+
+from engine.classic import ClassicBoard, sow, SIDE, SIZE, STORE
+from engine.congklak import CongklakBoard
+from engine.omweso import OmwesoBoard, sowRing, NEXT, PITS as OMWESO_PITS
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+SEED = 12
+# the stones in each pit at the start of the random games
+# (13 or more means the first moves sow at least a full lap)
+STONES_PER_PIT = range(1, 21)
+GAMES = 5  # random games for each number of stones per pit
+MAX_MOVES = 300  # a game is cut off after this many moves
+
+
+def _nextPit(i: int, plr: int) -> int:
+    """Return the slot after i for the sowing player (the opponents store is skipped).
+
+    Args:
+        i (int): The slot in the flat board array
+        plr (int): The player sowing (player 0 or 1)
+    Returns:
+        The next slot (int)
+    """
+    i = (i+1) % SIZE
+    if i == (1-plr)*SIDE+STORE:
+        i = (i+1) % SIZE
+    return i
+
+
+def _sowEach(pits: list, i: int, hand: int, plr: int) -> int:
+    """Drop the stones one at a time (the reference sow).
+
+    Args:
+        pits (list): The stones in each slot, this is changed
+        i (int): The slot the stones were picked up from
+        hand (int): The number of stones to sow
+        plr (int): The player sowing (player 0 or 1)
+    Returns:
+        The slot the last stone landed in (int)
+    """
+    for stone in range(hand):
+        i = _nextPit(i, plr)
+        pits[i] += 1
+    return i
+
+
+def _applyEach(board: ClassicBoard, n: int) -> int:
+    """Play a classic move with the reference sow.
+
+    Args:
+        board (ClassicBoard): The board, this is changed
+        n (int): The pit nth from the left of the current player
+    Returns:
+        The slot the last stone landed in (int)
+    """
+    i = board.turn*SIDE+n
+    hand = board.pits[i]
+    board.pits[i] = 0
+    i = _sowEach(board.pits, i, hand, board.turn)
+    board._endTurn(i)
+    return i
+
+
+def _randomGames(boardClass: type, rng: Random):
+    """Yield a board and a legal move from random games of every stones per pit.
+
+    Args:
+        boardClass (type): The engine board of the gamemode
+        rng (Random): The random moves
+    Returns:
+        A generator of (board, move) before the move is played
+    """
+    for stonesPerPit in STONES_PER_PIT:
+        for game in range(GAMES):
+            board = boardClass(stonesPerPit)
+            for move in range(MAX_MOVES):
+                if board.isGameComplete():
+                    break
+                n = rng.choice(board.legalMoves())
+                yield board, n
+                board.applyMove(n)
+
+
+class TestSow(unittest.TestCase):
+    """Sowing a lap at once is the same as sowing a stone at a time."""
+
+    def test_sowMatchesEachStone(self) -> None:
+        """Sow every hand size from every slot for both players."""
+        rng = Random(SEED)
+        for plr in (0, 1):
+            # stones are never picked up from the opponents store
+            for i in (i for i in range(SIZE) if i != (1-plr)*SIDE+STORE):
+                # 0 to 3 full laps (13 slots each) and every stone left over
+                for hand in range((SIZE-1)*3+1):
+                    pits = [rng.randint(0, 20) for j in range(SIZE)]
+                    expected = pits[:]
+                    last = sow(pits, i, hand, plr)
+                    self.assertEqual(last, _sowEach(expected, i, hand, plr))
+                    self.assertEqual(pits, expected)
+
+    def test_sowRingMatchesEachStone(self) -> None:
+        """Sow every hand size around both omweso rings."""
+        rng = Random(SEED)
+        for start in (0, OMWESO_PITS):
+            for i in range(start, start+OMWESO_PITS):
+                for hand in range(OMWESO_PITS*3+1):
+                    pits = [rng.randint(0, 20) for j in range(OMWESO_PITS*2)]
+                    expected = pits[:]
+                    last = sowRing(pits, start, i, hand)
+                    j = i
+                    for stone in range(hand):
+                        j = NEXT[j]
+                        expected[j] += 1
+                    self.assertEqual(last, j)
+                    self.assertEqual(pits, expected)
+
+    def test_classicApplyMove(self) -> None:
+        """Random classic games give the same boards as the reference."""
+        for board, n in _randomGames(ClassicBoard, Random(SEED)):
+            expected = board.copy()
+            played = board.copy()
+            self.assertEqual(played.applyMove(n), _applyEach(expected, n))
+            self.assertEqual(played.pits, expected.pits)
+            self.assertEqual(played.turn, expected.turn)
+            self.assertEqual(played.winner, expected.winner)
+
+    def test_congklakApplyMove(self) -> None:
+        """Random congklak games give the same boards as traceMove."""
+        self._checkTraceMove(CongklakBoard)
+
+    def test_omwesoApplyMove(self) -> None:
+        """Random omweso games give the same boards as traceMove."""
+        self._checkTraceMove(OmwesoBoard)
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _checkTraceMove(self, boardClass: type) -> None:
+        """Check applyMove against traceMove (which drops the stones one at a time).
+
+        Args:
+            boardClass (type): The engine board of the gamemode
+        Returns:
+            None
+        """
+        for board, n in _randomGames(boardClass, Random(SEED)):
+            traced = board.copy()
+            played = board.copy()
+            steps = traced.traceMove(n)
+            played.applyMove(n)
+            self.assertTrue(steps)
+            self.assertEqual(played.pits, traced.pits)
+            self.assertEqual(played.turn, traced.turn)
+            self.assertEqual(played.winner, traced.winner)
+            self.assertEqual(played.relayCapped, traced.relayCapped)
+
+
+if __name__ == '__main__':
+    unittest.main()
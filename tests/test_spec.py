@@ -0,0 +1,103 @@
+"""
+Board spec tests written in Python.
+
+This file checks the table driven engine (see SpecBoard in engine/spec.py) on:
+    - Compiling the classic, congklak and omweso rules to their hand written engines
+    - Playing random games on the table driven engine against the hand written engines
+    - Comparing the steps of traceMove with the hand written engines
+
+Run with "python3 -m unittest" (or pytest) from the Mancala folder
+
+Author: Ritesh Ravji
+"""
+
+import unittest
+from random import Random
+
+from engine.classic import ClassicBoard
+from engine.congklak import CongklakBoard
+from engine.omweso import OmwesoBoard
+from engine.spec import BoardSpec, SpecBoard, ENGINES
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+SEED = 14
+# the stones in each pit at the start of the random games
+# (13 or more means the first classic moves sow at least a full lap)
+STONES_PER_PIT = range(1, 17)
+GAMES = 4  # random games for each number of stones per pit
+MAX_MOVES = 300  # a game is cut off after this many moves
+
+
+def _spec(engine: type) -> BoardSpec:
+    """Return a spec with the same rules as a hand written engine.
+
+    Args:
+        engine (type): The hand written engine board
+    Returns:
+        The spec (BoardSpec)
+    """
+    for rules, ruleEngine in ENGINES.items():
+        if ruleEngine is engine:
+            return BoardSpec(engine.__name__, *rules)
+
+
+class TestSpecBoard(unittest.TestCase):
+    """The table driven engine plays the same as the hand written engines."""
+
+    def test_compilesToEngines(self) -> None:
+        """The rules of a hand written engine compile to it unless fast is off."""
+        for engine in (ClassicBoard, CongklakBoard, OmwesoBoard):
+            spec = _spec(engine)
+            self.assertIs(spec.compile(), engine)
+            self.assertTrue(issubclass(spec.compile(fast=False), SpecBoard))
+
+    def test_classic(self) -> None:
+        """Random classic games (full laps, extra turns)."""
+        self._checkGames(ClassicBoard)
+
+    def test_congklak(self) -> None:
+        """Random congklak games (relays, opposite captures)."""
+        self._checkGames(CongklakBoard)
+
+    def test_omweso(self) -> None:
+        """Random omweso games (ring sowing, adjacent captures)."""
+        self._checkGames(OmwesoBoard)
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _checkGames(self, engine: type) -> None:
+        """Play the same random moves on both engines and compare every board.
+
+        Args:
+            engine (type): The hand written engine board
+        Returns:
+            None
+        """
+        specBoard = _spec(engine).compile(fast=False)
+        rng = Random(SEED)
+        for stonesPerPit in STONES_PER_PIT:
+            for game in range(GAMES):
+                board = engine(stonesPerPit)
+                tables = specBoard(stonesPerPit, getattr(board, 'maxLaps', None))
+                self.assertEqual(tables.pits, board.pits)
+                for move in range(MAX_MOVES):
+                    self.assertEqual(tables.isGameComplete(), board.isGameComplete())
+                    if board.isGameComplete():
+                        break
+                    self.assertEqual(tables.legalMoves(), board.legalMoves())
+                    n = rng.choice(board.legalMoves())
+                    # the steps of the same move on copies
+                    self.assertEqual(tables.copy().traceMove(n), board.copy().traceMove(n))
+                    self.assertEqual(tables.applyMove(n), board.applyMove(n))
+                    self.assertEqual(tables.pits, board.pits)
+                    self.assertEqual(tables.turn, board.turn)
+                    self.assertEqual(tables.winner, board.winner)
+                    self.assertEqual(tables.score(0), board.score(0))
+                    self.assertEqual(tables.relayCapped, getattr(board, 'relayCapped', False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Transposition table tests written in Python.
+
+This file checks engine/transposition.py on:
+    - Updating the Zobrist hash from the touched slots against hashing the whole board
+    - The depth-preferred and always-replace slots of a bucket
+    - The size limit in MB and the hit and miss counters
+
+Run with "python3 -m unittest" (or pytest) from the Mancala folder
+
+Author: Ritesh Ravji
+"""
+
+import unittest
+from random import Random
+
+from engine.classic import ClassicBoard
+from engine.congklak import CongklakBoard
+from engine.omweso import OmwesoBoard
+from engine.transposition import (Zobrist, TranspositionTable, touchedSlots, ENTRY_BYTES,
+                                  SLOTS, EXACT, LOWER, UPPER)
+
+# PEP: in order to preserve continuity, use camel case variable names
+# this is because the rest of the program follows Panda3D which uses camel case.
+
+SEED = 5
+STONES_PER_PIT = range(1, 9)  # the stones in each pit at the start of the random games
+GAMES = 3  # random games for each number of stones per pit
+MAX_MOVES = 200  # a game is cut off after this many moves
+
+
+class TestZobrist(unittest.TestCase):
+    """Updating the hash from the touched slots gives the hash of the whole board."""
+
+    def test_classicUpdate(self) -> None:
+        """Random classic games."""
+        self._checkUpdate(ClassicBoard)
+
+    def test_congklakUpdate(self) -> None:
+        """Random congklak games (relays and captures)."""
+        self._checkUpdate(CongklakBoard)
+
+    def test_omwesoUpdate(self) -> None:
+        """Random omweso games (captures into the clicked pit)."""
+        self._checkUpdate(OmwesoBoard)
+
+    # Code used by the this class only
+    # single leading underscore means weak 'internal use' (PEP)
+
+    def _checkUpdate(self, boardClass: type) -> None:
+        """Check the updated hash after every move of random games.
+
+        Args:
+            boardClass (type): The engine board of the gamemode
+        Returns:
+            None
+        """
+        rng = Random(SEED)
+        for stonesPerPit in STONES_PER_PIT:
+            for game in range(GAMES):
+                board = boardClass(stonesPerPit)
+                zobrist = Zobrist(len(board.pits), sum(board.pits))
+                key = zobrist.hash(board)
+                for move in range(MAX_MOVES):
+                    if board.isGameComplete():
+                        break
+                    n = rng.choice(board.legalMoves())
+                    child = board.copy()
+                    slots = touchedSlots(board, n, child.traceMove(n))
+                    # every slot that changed was touched
+                    self.assertTrue(all(i in slots for i in range(len(board.pits))
+                                        if board.pits[i] != child.pits[i]))
+                    key = zobrist.update(key, board.pits, child.pits, slots,
+                                         child.turn != board.turn)
+                    self.assertEqual(key, zobrist.hash(child))
+                    board = child
+
+
+class TestTranspositionTable(unittest.TestCase):
+    """The buckets, the size limit and the counters."""
+
+    def test_sizeLimit(self) -> None:
+        """The table fills the size in MB and no more."""
+        for sizeMB in (0.25, 1, 3.5):
+            table = TranspositionTable(sizeMB)
+            self.assertLessEqual(len(table)*ENTRY_BYTES, sizeMB*1024*1024)
+            self.assertGreater((len(table)+SLOTS)*ENTRY_BYTES, sizeMB*1024*1024)
+            self.assertEqual(len(table), table.buckets*SLOTS)
+        # always at least one bucket
+        self.assertEqual(len(TranspositionTable(0)), SLOTS)
+
+    def test_entryRoundTrip(self) -> None:
+        """The packed entry comes back the same."""
+        table = TranspositionTable(0.01)
+        for key, entry in ((1, (0, EXACT, 0, 0)), (2, (255, LOWER, -48, -1)),
+                           (3, (7, UPPER, 2**31-1, 15))):
+            table.store(key, *entry)
+            self.assertEqual(table.probe(key), entry)
+
+    def test_depthPreferred(self) -> None:
+        """A deeper search keeps its slot, shallower searches share the other slot."""
+        table = TranspositionTable(0.01)
+        # keys a whole number of buckets apart go in the same bucket
+        deep, shallow, newer, deeper = (5+table.buckets*i for i in range(4))
+        table.store(deep, 6, EXACT, 10, 1)
+        table.store(shallow, 2, EXACT, 20, 2)
+        self.assertEqual(table.probe(deep), (6, EXACT, 10, 1))
+        self.assertEqual(table.probe(shallow), (2, EXACT, 20, 2))
+        # the always-replace slot keeps the newest shallower search
+        table.store(newer, 3, LOWER, 30, 3)
+        self.assertIsNone(table.probe(shallow))
+        self.assertEqual(table.probe(newer), (3, LOWER, 30, 3))
+        self.assertEqual(table.probe(deep), (6, EXACT, 10, 1))
+        # an equal or deeper search takes the depth-preferred slot
+        table.store(deeper, 6, UPPER, 40, 4)
+        self.assertIsNone(table.probe(deep))
+        self.assertEqual(table.probe(deeper), (6, UPPER, 40, 4))
+        self.assertEqual(table.probe(newer), (3, LOWER, 30, 3))
+
+    def test_sameBoardReplaced(self) -> None:
+        """The same board is replaced in place even by a shallower search."""
+        table = TranspositionTable(0.01)
+        table.store(9, 6, EXACT, 10, 1)
+        table.store(9, 1, LOWER, 11, 2)
+        self.assertEqual(table.probe(9), (1, LOWER, 11, 2))
+        # it was not copied into the always-replace slot
+        self.assertIsNone(table.probe(9+table.buckets))
+
+    def test_counters(self) -> None:
+        """Every probe is a hit or a miss and clear empties the table."""
+        table = TranspositionTable(0.01)
+        self.assertIsNone(table.probe(1))
+        table.store(1, 4, EXACT, 0, 3)
+        table.probe(1)
+        table.probe(1)
+        table.probe(2)
+        self.assertEqual((table.hits, table.misses), (2, 2))
+        table.clear()
+        self.assertEqual((table.hits, table.misses), (0, 0))
+        self.assertIsNone(table.probe(1))
+        self.assertEqual((table.hits, table.misses), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()